@@ -0,0 +1,19 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+
+
+def staff_required_json(view):
+    """
+    Limits an operational endpoint to staff users, or to everyone while DEBUG is
+    on, answering anyone else with a JSON 403.
+    """
+    @wraps(view)
+    def wrapped_view(request, *args, **kwargs):
+        if not (settings.DEBUG or request.user.is_staff):
+            return JsonResponse({"error": "Staff access required."}, status=403)
+
+        return view(request, *args, **kwargs)
+
+    return wrapped_view
@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_site.settings')
+# Persistent connections leak under ASGI (see ecommerce_site.database_profiles);
+# use the postgresql pool for connection reuse instead.
+os.environ['DATABASE_CONN_MAX_AGE'] = '0'
 
 application = get_asgi_application()
@@ -0,0 +1,96 @@
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 128 * 1024 * 1024,
+    "busy_timeout": 5000,
+    "cache_size": -20000,
+    "temp_store": "MEMORY",
+}
+
+# Persistent connections are only reused by threaded WSGI workers. Under ASGI
+# each request runs its queries on a fresh executor thread, so a connection
+# kept open past the request is never reused and only holds a file descriptor
+# or server slot. ecommerce_site.asgi therefore forces 0.
+DEFAULT_CONN_MAX_AGE = 0
+
+
+def get_sqlite_init_command(pragmas):
+    return ";".join(f"PRAGMA {pragma}={value}" for pragma, value in pragmas.items())
+
+
+def get_sqlite_database(base_dir, environ, tuned=True):
+    sqlite_database = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": environ.get("DATABASE_NAME", str(base_dir / "db.sqlite3")),
+        "OPTIONS": {},
+    }
+
+    if tuned:
+        sqlite_database["OPTIONS"] = {
+            "init_command": get_sqlite_init_command(SQLITE_PRAGMAS),
+            "transaction_mode": "IMMEDIATE",
+            "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000,
+        }
+
+    return sqlite_database
+
+
+def get_postgresql_database(environ):
+    postgresql_database = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": environ.get("DATABASE_NAME", "ecommerce_site"),
+        "USER": environ.get("DATABASE_USER", ""),
+        "PASSWORD": environ.get("DATABASE_PASSWORD", ""),
+        "HOST": environ.get("DATABASE_HOST", ""),
+        "PORT": environ.get("DATABASE_PORT", ""),
+        "OPTIONS": {},
+    }
+
+    if environ.get("DATABASE_POOL_MAX_SIZE"):
+        # Django's pool replaces persistent connections, so CONN_MAX_AGE must stay 0.
+        postgresql_database["OPTIONS"]["pool"] = {
+            "min_size": int(environ.get("DATABASE_POOL_MIN_SIZE", 2)),
+            "max_size": int(environ["DATABASE_POOL_MAX_SIZE"]),
+            "timeout": int(environ.get("DATABASE_POOL_TIMEOUT", 10)),
+        }
+
+    return postgresql_database
+
+
+def get_default_database(base_dir, environ):
+    """
+    Builds DATABASES["default"] for the DATABASE_PROFILE environment variable:
+
+    sqlite (default) opens the file in WAL mode so readers never wait for the
+    writer, and starts transactions IMMEDIATE so a read-then-write transaction
+    waits for the write lock up front instead of failing when it upgrades.
+    sqlite-default keeps SQLite's stock settings for comparison. postgresql uses
+    psycopg's pool when DATABASE_POOL_MAX_SIZE is set.
+
+    Unpooled connections are closed after each request unless
+    DATABASE_CONN_MAX_AGE is set, which only helps WSGI deployments; they are
+    health checked before reuse. ASGI deployments that need connection reuse
+    should use the postgresql profile's pool.
+    """
+    database_profile = environ.get("DATABASE_PROFILE", "sqlite")
+
+    if database_profile == "sqlite":
+        default_database = get_sqlite_database(base_dir, environ)
+    elif database_profile == "sqlite-default":
+        default_database = get_sqlite_database(base_dir, environ, tuned=False)
+    elif database_profile == "postgresql":
+        default_database = get_postgresql_database(environ)
+    else:
+        raise ValueError(
+            f"Unknown DATABASE_PROFILE {database_profile!r}; use sqlite, sqlite-default or postgresql."
+        )
+
+    if "pool" in default_database["OPTIONS"]:
+        default_database["CONN_MAX_AGE"] = 0
+    else:
+        default_database["CONN_MAX_AGE"] = int(
+            environ.get("DATABASE_CONN_MAX_AGE", DEFAULT_CONN_MAX_AGE)
+        )
+        default_database["CONN_HEALTH_CHECKS"] = True
+
+    return default_database
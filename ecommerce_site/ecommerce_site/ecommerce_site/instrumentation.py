@@ -0,0 +1,287 @@
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction
+)
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from .access import staff_required_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INSTRUMENTATION_SETTINGS = {
+    # Wrap every SQL execution to count queries, time them and spot repeats.
+    "CAPTURE_SQL": True,
+    "SLOW_REQUEST_MS": 500,
+    "MAX_QUERIES": 50,
+    # The same statement run this many times in one request is reported as N+1.
+    "DUPLICATE_QUERY_THRESHOLD": 5,
+}
+
+DURATION_BUCKET_EDGES_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_COUNT_BUCKET_EDGES = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def get_instrumentation_settings():
+    return {**DEFAULT_INSTRUMENTATION_SETTINGS, **getattr(settings, "REQUEST_INSTRUMENTATION", {})}
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: counts[i] holds the values <= edges[i], and the last
+    bucket everything above the largest edge.
+    """
+
+    def __init__(self, edges):
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1)
+
+    def add(self, value):
+        self.counts[bisect_left(self.edges, value)] += 1
+
+    def to_dict(self):
+        return {
+            **{f"<={edge}": count for edge, count in zip(self.edges, self.counts)},
+            f">{self.edges[-1]}": self.counts[-1],
+        }
+
+
+class EndpointStatistics:
+    def __init__(self):
+        self.request_count = 0
+        self.slow_request_count = 0
+        self.duplicate_query_request_count = 0
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.query_count = 0
+        self.max_total_ms = 0.0
+        self.max_query_count = 0
+        self.total_ms_histogram = Histogram(DURATION_BUCKET_EDGES_MS)
+        self.db_ms_histogram = Histogram(DURATION_BUCKET_EDGES_MS)
+        self.query_count_histogram = Histogram(QUERY_COUNT_BUCKET_EDGES)
+
+    def record(self, request_profile, is_slow):
+        self.request_count += 1
+        self.slow_request_count += is_slow
+        self.duplicate_query_request_count += bool(request_profile.duplicate_queries)
+        self.total_ms += request_profile.total_ms
+        self.db_ms += request_profile.db_ms
+        self.query_count += request_profile.query_count
+        self.max_total_ms = max(self.max_total_ms, request_profile.total_ms)
+        self.max_query_count = max(self.max_query_count, request_profile.query_count)
+        self.total_ms_histogram.add(request_profile.total_ms)
+        self.db_ms_histogram.add(request_profile.db_ms)
+        self.query_count_histogram.add(request_profile.query_count)
+
+    def to_dict(self):
+        return {
+            "requests": self.request_count,
+            "slow_requests": self.slow_request_count,
+            "requests_with_duplicate_queries": self.duplicate_query_request_count,
+            "mean_total_ms": round(self.total_ms / self.request_count, 2),
+            "mean_db_ms": round(self.db_ms / self.request_count, 2),
+            "mean_queries": round(self.query_count / self.request_count, 2),
+            "max_total_ms": round(self.max_total_ms, 2),
+            "max_queries": self.max_query_count,
+            "total_ms_histogram": self.total_ms_histogram.to_dict(),
+            "db_ms_histogram": self.db_ms_histogram.to_dict(),
+            "query_count_histogram": self.query_count_histogram.to_dict(),
+        }
+
+
+_endpoint_statistics_lock = threading.Lock()
+_endpoint_statistics = {}
+
+
+def record_request(endpoint_name, request_profile, is_slow):
+    with _endpoint_statistics_lock:
+        _endpoint_statistics.setdefault(endpoint_name, EndpointStatistics()).record(
+            request_profile, is_slow
+        )
+
+
+def get_endpoint_statistics():
+    with _endpoint_statistics_lock:
+        return {
+            endpoint_name: endpoint_statistics.to_dict()
+            for endpoint_name, endpoint_statistics in sorted(_endpoint_statistics.items())
+        }
+
+
+def reset_endpoint_statistics():
+    with _endpoint_statistics_lock:
+        _endpoint_statistics.clear()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.query_count = 0
+        self.db_ms = 0.0
+        self.total_ms = 0.0
+        self.statement_counts = Counter()
+        self.duplicate_queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        # Statements are compared with their placeholders, so a query repeated with
+        # different parameters, the N+1 pattern, counts as one statement.
+        self.query_count += 1
+        self.statement_counts[sql] += 1
+        query_started_at = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - query_started_at) * 1000
+
+    def find_duplicate_queries(self, threshold):
+        self.duplicate_queries = {
+            sql: statement_count
+            for sql, statement_count in self.statement_counts.items()
+            if statement_count >= threshold
+        }
+
+
+# Async views run their queries on sync_to_async threads, and each thread has its
+# own connection objects, so a wrapper added to the request thread's connections
+# would miss them. Every connection instead carries profile_query permanently,
+# and the profile of the running request travels in a context variable, which
+# sync_to_async copies into its threads.
+_current_request_profile = contextvars.ContextVar("request_profile", default=None)
+
+
+def profile_query(execute, sql, params, many, context):
+    request_profile = _current_request_profile.get()
+
+    if request_profile is None:
+        return execute(sql, params, many, context)
+
+    return request_profile(execute, sql, params, many, context)
+
+
+def install_query_profiler(database_connection):
+    if profile_query not in database_connection.execute_wrappers:
+        database_connection.execute_wrappers.append(profile_query)
+
+
+def install_query_profiler_on_connect(sender, connection, **kwargs):
+    install_query_profiler(connection)
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Records query count, DB time and total time of every request under its URL
+    name, flags repeated statements, adds a Server-Timing header and logs requests
+    over the REQUEST_INSTRUMENTATION thresholds. Runs natively under both WSGI and
+    ASGI, so it never forces async views onto a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+        connection_created.connect(
+            install_query_profiler_on_connect, dispatch_uid="request_instrumentation"
+        )
+
+        for database_connection in connections.all(initialized_only=True):
+            install_query_profiler(database_connection)
+
+    def start_request(self):
+        instrumentation_settings = get_instrumentation_settings()
+        request_profile = RequestProfile()
+        profile_token = _current_request_profile.set(
+            request_profile if instrumentation_settings["CAPTURE_SQL"] else None
+        )
+
+        return instrumentation_settings, request_profile, profile_token, time.perf_counter()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        instrumentation_settings, request_profile, profile_token, request_started_at = (
+            self.start_request()
+        )
+
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_request_profile.reset(profile_token)
+
+        return self.finish_request(
+            request, response, instrumentation_settings, request_profile, request_started_at
+        )
+
+    async def __acall__(self, request):
+        instrumentation_settings, request_profile, profile_token, request_started_at = (
+            self.start_request()
+        )
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_request_profile.reset(profile_token)
+
+        return self.finish_request(
+            request, response, instrumentation_settings, request_profile, request_started_at
+        )
+
+    def finish_request(
+        self, request, response, instrumentation_settings, request_profile, request_started_at
+    ):
+        request_profile.total_ms = (time.perf_counter() - request_started_at) * 1000
+        request_profile.find_duplicate_queries(instrumentation_settings["DUPLICATE_QUERY_THRESHOLD"])
+
+        resolver_match = getattr(request, "resolver_match", None)
+        endpoint_name = resolver_match.view_name if resolver_match else "<unresolved>"
+        is_slow = (
+            request_profile.total_ms >= instrumentation_settings["SLOW_REQUEST_MS"]
+            or request_profile.query_count > instrumentation_settings["MAX_QUERIES"]
+        )
+
+        record_request(endpoint_name, request_profile, is_slow)
+        response["Server-Timing"] = (
+            f"db;dur={request_profile.db_ms:.1f};desc=\"{request_profile.query_count} queries\", "
+            f"total;dur={request_profile.total_ms:.1f}"
+        )
+
+        if is_slow or request_profile.duplicate_queries:
+            logger.warning(
+                "%s %s (%s): %.1f ms, %d queries, %.1f ms in the database%s",
+                request.method,
+                request.path,
+                endpoint_name,
+                request_profile.total_ms,
+                request_profile.query_count,
+                request_profile.db_ms,
+                "".join(
+                    f"\n  repeated {statement_count}x: {sql[:200]}"
+                    for sql, statement_count in request_profile.duplicate_queries.items()
+                ),
+            )
+
+        return response
+
+
+@require_http_methods(["GET", "DELETE"])
+@staff_required_json
+def request_statistics(request):
+    if request.method == "DELETE":
+        reset_endpoint_statistics()
+
+    return JsonResponse(get_endpoint_statistics())
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database_profiles import get_default_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ecommerce_site.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,11 +80,9 @@ WSGI_APPLICATION = 'ecommerce_site.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Selected with DATABASE_PROFILE; see ecommerce_site.database_profiles.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': get_default_database(BASE_DIR, os.environ),
 }
 
 
@@ -126,3 +128,85 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = "users.User"
+
+# Product search backend. The FTS5 index table only exists on SQLite (see
+# products migration 0009), so other databases default to LikeSearchBackend.
+PRODUCT_SEARCH_BACKEND = os.environ.get(
+    "PRODUCT_SEARCH_BACKEND",
+    "products.search.SQLiteFTS5SearchBackend"
+    if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3"
+    else "products.search.LikeSearchBackend",
+)
+
+# Per-request query count and timing, aggregated by URL name and served at
+# /api/instrumentation/ (see ecommerce_site.instrumentation).
+REQUEST_INSTRUMENTATION = {
+    "CAPTURE_SQL": os.environ.get("REQUEST_INSTRUMENTATION_CAPTURE_SQL", "1") == "1",
+    "SLOW_REQUEST_MS": int(os.environ.get("REQUEST_INSTRUMENTATION_SLOW_REQUEST_MS", 500)),
+    "MAX_QUERIES": int(os.environ.get("REQUEST_INSTRUMENTATION_MAX_QUERIES", 50)),
+    "DUPLICATE_QUERY_THRESHOLD": int(
+        os.environ.get("REQUEST_INSTRUMENTATION_DUPLICATE_QUERY_THRESHOLD", 5)
+    ),
+}
+
+# The catalog cache holds versioned product and category payloads (see
+# products.catalog_cache). Set CATALOG_CACHE_BACKEND to a shared backend such as
+# django.core.cache.backends.redis.RedisCache in production so every worker sees
+# the same versions; the local-memory default suits development and tests.
+CATALOG_CACHE_BACKEND = os.environ.get(
+    "CATALOG_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        "BACKEND": CATALOG_CACHE_BACKEND,
+        "LOCATION": os.environ.get("CATALOG_CACHE_LOCATION", "catalog"),
+        "TIMEOUT": int(os.environ.get("CATALOG_CACHE_TIMEOUT", 15 * 60)),
+    },
+}
+
+if CATALOG_CACHE_BACKEND.endswith(".LocMemCache"):
+    CACHES["catalog"]["OPTIONS"] = {"MAX_ENTRIES": 10000}
+
+# Anonymous carts live in the session (see orders.session_carts), so the default
+# database backend would write a django_session row on every cart change. Signed
+# cookies keep the session in the browser and write nothing server-side. The
+# tradeoffs: session data is signed but not encrypted, and a session cannot be
+# revoked server-side, so a copied cookie stays valid until it expires even after
+# logout. Set SESSION_ENGINE to django.contrib.sessions.backends.cached_db to keep
+# revocable sessions at the cost of a row write per change.
+SESSION_ENGINE = os.environ.get("SESSION_ENGINE", "django.contrib.sessions.backends.signed_cookies")
+
+# Shared secret the payment provider signs status callbacks with (HMAC-SHA256 of
+# the request body in the X-Payment-Signature header). Callbacks are refused
+# while it is empty.
+PAYMENT_CALLBACK_SECRET = os.environ.get("PAYMENT_CALLBACK_SECRET", "")
+
+# Product image pipeline (see products.images): originals are fetched from
+# PRODUCT_IMAGE_SOURCE and their resized variants are written under
+# PRODUCT_IMAGE_CACHE_ROOT, named by content hash, and served from
+# PRODUCT_IMAGE_CACHE_URL. products.images.LocalFileImageSource reads originals
+# from a local directory instead of the network.
+PRODUCT_IMAGE_SOURCE = {
+    "BACKEND": os.environ.get("PRODUCT_IMAGE_SOURCE_BACKEND", "products.images.HTTPImageSource"),
+    "OPTIONS": {},
+}
+
+if PRODUCT_IMAGE_SOURCE["BACKEND"].endswith(".LocalFileImageSource"):
+    PRODUCT_IMAGE_SOURCE["OPTIONS"] = {
+        "root": os.environ.get("PRODUCT_IMAGE_SOURCE_ROOT", BASE_DIR / "media" / "image-source"),
+    }
+
+PRODUCT_IMAGE_CACHE_ROOT = Path(
+    os.environ.get("PRODUCT_IMAGE_CACHE_ROOT", BASE_DIR / "media" / "product-images")
+)
+PRODUCT_IMAGE_CACHE_URL = "/media/product-images/"
+
+# Where export_catalog_snapshot writes the static catalog pages and their
+# manifest for the front end or a CDN to serve.
+CATALOG_SNAPSHOT_ROOT = Path(
+    os.environ.get("CATALOG_SNAPSHOT_ROOT", BASE_DIR / "media" / "catalog-snapshot")
+)
@@ -14,9 +14,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
+
+from .instrumentation import request_statistics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/products/', include('products.urls')),
+    path('api/', include('orders.urls')),
+    path('api/instrumentation/', request_statistics, name='request-statistics'),
 ]
+
+# Resized product images are served by the web server in production; static()
+# only adds this route while DEBUG is on.
+urlpatterns += static(settings.PRODUCT_IMAGE_CACHE_URL, document_root=settings.PRODUCT_IMAGE_CACHE_ROOT)
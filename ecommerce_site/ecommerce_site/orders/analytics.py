@@ -0,0 +1,244 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Count, DecimalField, ExpressionWrapper, F, Sum
+)
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .choices import OrderStatusChoices
+from .models import (
+    DailyCategorySales,
+    DailyProductSales,
+    Order,
+    OrderItem,
+    RolledUpOrder,
+    SalesRollupWatermark
+)
+
+SALES_ROLLUP_WATERMARK_NAME = "daily_sales"
+SALES_ROLLUP_BATCH_SIZE = 500
+# Orders committed late can carry a modified time just before the previous run's
+# watermark; rereading this window is safe because the ledger makes runs idempotent.
+SALES_ROLLUP_OVERLAP = timedelta(minutes=5)
+
+ROLLUP_TOTAL_FIELDS = ("revenue", "units", "order_count")
+
+
+def get_order_item_totals(order_ids):
+    """
+    Returns {(date, product_id): (category_id, revenue, units, order_count)} for the
+    given orders, aggregated by the database in one query.
+    """
+    return {
+        (order_item_totals["date"], order_item_totals["product_id"]): (
+            order_item_totals["product__category_id"],
+            order_item_totals["revenue"],
+            order_item_totals["units"],
+            order_item_totals["order_count"],
+        )
+        for order_item_totals in OrderItem.objects.filter(order_id__in=order_ids)
+        .values("product_id", "product__category_id", date=TruncDate("order__created"))
+        .annotate(
+            revenue=Sum(
+                ExpressionWrapper(
+                    F("quantity") * F("price_at_purchase"),
+                    output_field=DecimalField(max_digits=14, decimal_places=2),
+                )
+            ),
+            units=Sum("quantity"),
+            order_count=Count("order_id", distinct=True),
+        )
+        .order_by()
+    }
+
+
+def apply_rollup_deltas(rollup_model, key_field, deltas_by_key):
+    """
+    Adds {(date, key): [revenue, units, order_count]} onto the rollup rows, reading
+    the touched rows once and writing them back with one bulk upsert.
+    """
+    if not deltas_by_key:
+        return
+
+    touched_rows = rollup_model.objects.select_for_update().filter(
+        date__in={rollup_date for rollup_date, _ in deltas_by_key},
+        **{f"{key_field}__in": {rollup_key for _, rollup_key in deltas_by_key}},
+    )
+    totals_by_key = {
+        (rollup_row.date, getattr(rollup_row, key_field)): [
+            getattr(rollup_row, total_field) for total_field in ROLLUP_TOTAL_FIELDS
+        ]
+        for rollup_row in touched_rows
+    }
+
+    for rollup_key, deltas in deltas_by_key.items():
+        totals = totals_by_key.setdefault(rollup_key, [Decimal(0), 0, 0])
+
+        for total_index, delta in enumerate(deltas):
+            totals[total_index] += delta
+
+    rollup_model.objects.bulk_create(
+        [
+            rollup_model(
+                date=rollup_date,
+                **{key_field: rollup_key},
+                **dict(zip(ROLLUP_TOTAL_FIELDS, totals_by_key[(rollup_date, rollup_key)])),
+            )
+            for rollup_date, rollup_key in deltas_by_key
+        ],
+        update_conflicts=True,
+        unique_fields=["date", key_field],
+        update_fields=list(ROLLUP_TOTAL_FIELDS),
+    )
+
+
+def roll_up_orders(added_order_ids, removed_order_ids):
+    product_deltas = defaultdict(lambda: [Decimal(0), 0, 0])
+    category_deltas = defaultdict(lambda: [Decimal(0), 0, 0])
+
+    for order_ids, sign in ((added_order_ids, 1), (removed_order_ids, -1)):
+        if not order_ids:
+            continue
+
+        for (rollup_date, product_id), (category_id, revenue, units, order_count) in (
+            get_order_item_totals(order_ids).items()
+        ):
+            for deltas in (
+                product_deltas[(rollup_date, product_id)],
+                category_deltas[(rollup_date, category_id)],
+            ):
+                deltas[0] += sign * revenue
+                deltas[1] += sign * units
+
+            product_deltas[(rollup_date, product_id)][2] += sign * order_count
+
+        # An order with two products of one category counts once for the category.
+        for rollup_date, category_id, _ in (
+            OrderItem.objects.filter(order_id__in=order_ids)
+            .values_list(TruncDate("order__created"), "product__category_id", "order_id")
+            .distinct()
+        ):
+            category_deltas[(rollup_date, category_id)][2] += sign
+
+    apply_rollup_deltas(DailyProductSales, "product_id", product_deltas)
+    apply_rollup_deltas(DailyCategorySales, "category_id", category_deltas)
+
+
+def roll_up_changed_orders(changed_orders):
+    """
+    Counts newly completed orders into the daily rollups and takes out counted
+    orders that have since been canceled or reopened. changed_orders is a list of
+    (order_id, status, created) tuples.
+    """
+    counted_order_ids = set(
+        RolledUpOrder.objects.filter(
+            order_id__in=[order_id for order_id, _, _ in changed_orders]
+        ).values_list("order_id", flat=True)
+    )
+    added_orders = [
+        (order_id, created)
+        for order_id, status, created in changed_orders
+        if status == OrderStatusChoices.COMPLETED and order_id not in counted_order_ids
+    ]
+    removed_order_ids = [
+        order_id
+        for order_id, status, _ in changed_orders
+        if status != OrderStatusChoices.COMPLETED and order_id in counted_order_ids
+    ]
+
+    roll_up_orders([order_id for order_id, _ in added_orders], removed_order_ids)
+
+    RolledUpOrder.objects.filter(order_id__in=removed_order_ids).delete()
+    RolledUpOrder.objects.bulk_create(
+        [
+            RolledUpOrder(order_id=order_id, date=timezone.localdate(created))
+            for order_id, created in added_orders
+        ]
+    )
+
+    return len(added_orders), len(removed_order_ids)
+
+
+def run_sales_rollup(batch_size=SALES_ROLLUP_BATCH_SIZE):
+    """
+    Processes every order modified since the last run, one transaction per batch,
+    and moves the watermark forward. Returns (added, removed) order counts.
+    """
+    run_started_at = timezone.now()
+    watermark = SalesRollupWatermark.objects.filter(name=SALES_ROLLUP_WATERMARK_NAME).first()
+    changed_orders = Order.objects.filter(modified__lte=run_started_at)
+
+    if watermark is not None:
+        changed_orders = changed_orders.filter(
+            modified__gte=watermark.processed_until - SALES_ROLLUP_OVERLAP
+        )
+
+    added_orders_counter = removed_orders_counter = 0
+    last_seen = None
+
+    while True:
+        batch_orders = changed_orders.order_by("modified", "id")
+
+        if last_seen is not None:
+            batch_orders = batch_orders.filter(modified__gte=last_seen[0]).exclude(
+                modified=last_seen[0], id__lte=last_seen[1]
+            )
+
+        batch_orders = list(batch_orders.values_list("id", "status", "created", "modified")[:batch_size])
+
+        if not batch_orders:
+            break
+
+        with transaction.atomic():
+            added_batch_counter, removed_batch_counter = roll_up_changed_orders(
+                [(order_id, status, created) for order_id, status, created, _ in batch_orders]
+            )
+
+        added_orders_counter += added_batch_counter
+        removed_orders_counter += removed_batch_counter
+        last_seen = (batch_orders[-1][3], batch_orders[-1][0])
+
+    SalesRollupWatermark.objects.update_or_create(
+        name=SALES_ROLLUP_WATERMARK_NAME, defaults={"processed_until": run_started_at}
+    )
+
+    return added_orders_counter, removed_orders_counter
+
+
+def reset_sales_rollup():
+    with transaction.atomic():
+        DailyProductSales.objects.all().delete()
+        DailyCategorySales.objects.all().delete()
+        RolledUpOrder.objects.all().delete()
+        SalesRollupWatermark.objects.filter(name=SALES_ROLLUP_WATERMARK_NAME).delete()
+
+
+def get_daily_revenue(start_date, end_date):
+    return list(
+        DailyCategorySales.objects.filter(date__range=(start_date, end_date))
+        .values("date")
+        .annotate(revenue=Sum("revenue"), units=Sum("units"))
+        .order_by("date")
+    )
+
+
+def get_category_revenue(start_date, end_date):
+    return list(
+        DailyCategorySales.objects.filter(date__range=(start_date, end_date))
+        .values("category_id", category_name=F("category__name"))
+        .annotate(revenue=Sum("revenue"), units=Sum("units"), order_count=Sum("order_count"))
+        .order_by("-revenue")
+    )
+
+
+def get_top_selling_products(start_date, end_date, limit=10):
+    return list(
+        DailyProductSales.objects.filter(date__range=(start_date, end_date))
+        .values("product_id", product_name=F("product__name"))
+        .annotate(revenue=Sum("revenue"), units=Sum("units"))
+        .order_by("-units", "-revenue")[:limit]
+    )
@@ -0,0 +1,163 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+)
+from django.db.models.functions import Coalesce
+
+from products.models import ProductDetail
+
+from .models import (
+    Cart,
+    CartItem
+)
+
+
+class CartItemError(Exception):
+    pass
+
+
+def get_cart_summary_expressions():
+    # Lines of deactivated products can no longer be bought, so they count for
+    # nothing, as they already do in session carts.
+    cart_items = (
+        CartItem.objects.filter(cart=OuterRef("pk"), product__is_active=True)
+        .order_by()
+        .values("cart")
+    )
+
+    return {
+        "item_count": Coalesce(
+            Subquery(cart_items.annotate(total_quantity=Sum("quantity")).values("total_quantity")),
+            0,
+        ),
+        "subtotal": Coalesce(
+            Subquery(
+                cart_items.annotate(
+                    total_price=Sum(F("quantity") * F("product_detail__price"))
+                ).values("total_price")
+            ),
+            Value(Decimal(0)),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+    }
+
+
+def refresh_cart_summaries(carts):
+    """
+    Recomputes the cached item_count and subtotal of the given carts with a single
+    UPDATE ... SET ... = (SELECT SUM(...)) statement.
+    """
+    carts.update(**get_cart_summary_expressions())
+
+
+def refresh_product_cart_summaries(product_ids):
+    """
+    Refreshes the summaries of every cart holding one of the products, for writes
+    that reprice or deactivate them without model signals, such as bulk imports.
+    """
+    refresh_cart_summaries(
+        Cart.objects.filter(
+            pk__in=CartItem.objects.filter(product_id__in=product_ids).values("cart_id")
+        )
+    )
+
+
+def get_cart_contents(cart):
+    """
+    Returns the cart's line items with live prices and their totals, read with one
+    annotated query.
+    """
+    cart_items = list(
+        CartItem.objects.filter(cart=cart, product__is_active=True)
+        .annotate(
+            line_total=ExpressionWrapper(
+                F("quantity") * F("product_detail__price"),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )
+        )
+        .order_by("id")
+        .values(
+            "id",
+            "quantity",
+            "line_total",
+            "product_id",
+            "product_detail_id",
+            product_name=F("product__name"),
+            size=F("product_detail__size"),
+            color=F("product_detail__color"),
+            price=F("product_detail__price"),
+        )
+    )
+
+    return {
+        "item_count": sum(cart_item["quantity"] for cart_item in cart_items),
+        "subtotal": sum(
+            (cart_item["line_total"] or Decimal(0) for cart_item in cart_items), Decimal(0)
+        ).quantize(Decimal("0.01")),
+        "items": cart_items,
+    }
+
+
+def add_cart_item(cart, product_detail_id, quantity=1):
+    if quantity < 1:
+        raise CartItemError("quantity must be a positive integer.")
+
+    with transaction.atomic():
+        if not CartItem.objects.filter(cart=cart, product_detail_id=product_detail_id).update(
+            quantity=F("quantity") + quantity
+        ):
+            product_id = (
+                ProductDetail.objects.filter(pk=product_detail_id, product__is_active=True)
+                .values_list("product_id", flat=True)
+                .first()
+            )
+
+            if product_id is None:
+                raise CartItemError(f"Product detail {product_detail_id} is not available.")
+
+            try:
+                with transaction.atomic():
+                    CartItem.objects.create(
+                        cart=cart,
+                        product_id=product_id,
+                        product_detail_id=product_detail_id,
+                        quantity=quantity,
+                    )
+            except IntegrityError:
+                # A concurrent request created the line first.
+                CartItem.objects.filter(cart=cart, product_detail_id=product_detail_id).update(
+                    quantity=F("quantity") + quantity
+                )
+
+        refresh_cart_summaries(Cart.objects.filter(pk=cart.pk))
+
+
+def set_cart_item_quantity(cart, product_detail_id, quantity):
+    if quantity < 0:
+        raise CartItemError("quantity must not be negative.")
+
+    if quantity == 0:
+        remove_cart_item(cart, product_detail_id)
+        return
+
+    with transaction.atomic():
+        if not CartItem.objects.filter(cart=cart, product_detail_id=product_detail_id).update(
+            quantity=quantity
+        ):
+            raise CartItemError(f"Product detail {product_detail_id} is not in the cart.")
+
+        refresh_cart_summaries(Cart.objects.filter(pk=cart.pk))
+
+
+def remove_cart_item(cart, product_detail_id):
+    with transaction.atomic():
+        CartItem.objects.filter(cart=cart, product_detail_id=product_detail_id).delete()
+        refresh_cart_summaries(Cart.objects.filter(pk=cart.pk))
+
+
+async def aget_cart_summary(user):
+    cart_summary = await Cart.objects.filter(user=user).values("item_count", "subtotal").afirst()
+
+    return cart_summary or {"item_count": 0, "subtotal": Decimal(0)}
@@ -11,4 +11,9 @@ class PaymentStatusChoices(models.TextChoices):
     PENDING = "PENDING", "Pending"
     DONE = "DONE", "Done"
     FAILED = "FAILED", "Failed"
-    
+
+
+class StockReservationStatusChoices(models.TextChoices):
+    HELD = "HELD", "Held"
+    COMMITTED = "COMMITTED", "Committed"
+    RELEASED = "RELEASED", "Released"
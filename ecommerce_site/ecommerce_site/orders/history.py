@@ -0,0 +1,65 @@
+from django.db.models import (
+    Count, IntegerField, OuterRef, Prefetch, Subquery, Sum
+)
+from django.db.models.functions import Coalesce
+
+from .models import (
+    Order,
+    OrderItem
+)
+
+
+def get_order_history_queryset(user):
+    """
+    Returns the user's orders with their item counts annotated, the payment joined
+    and the items prefetched, so a page costs two queries however many orders and
+    items it holds.
+    """
+    order_items = OrderItem.objects.filter(order=OuterRef("pk")).order_by().values("order")
+
+    return (
+        Order.objects.filter(user=user)
+        .select_related("payment")
+        .annotate(
+            line_count=Coalesce(
+                Subquery(order_items.annotate(total=Count("id")).values("total")),
+                0,
+                output_field=IntegerField(),
+            ),
+            item_count=Coalesce(
+                Subquery(order_items.annotate(total=Sum("quantity")).values("total")),
+                0,
+                output_field=IntegerField(),
+            ),
+        )
+        .prefetch_related(
+            Prefetch(
+                "order_items",
+                queryset=OrderItem.objects.select_related("product").order_by("id"),
+            )
+        )
+    )
+
+
+def serialize_order(order):
+    payment = getattr(order, "payment", None)
+
+    return {
+        "id": order.id,
+        "created": order.created.isoformat(),
+        "status": order.status,
+        "total_amount": str(order.total_amount),
+        "line_count": order.line_count,
+        "item_count": order.item_count,
+        "payment_status": payment.status if payment else None,
+        "items": [
+            {
+                "product_id": order_item.product_id,
+                "product_name": order_item.product.name,
+                "product_detail_id": order_item.product_detail_id,
+                "quantity": order_item.quantity,
+                "price_at_purchase": str(order_item.price_at_purchase),
+            }
+            for order_item in order.order_items.all()
+        ],
+    }
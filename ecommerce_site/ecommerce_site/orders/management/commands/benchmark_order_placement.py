@@ -0,0 +1,139 @@
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+from django.db import connection
+
+from orders.models import (
+    Cart,
+    CartItem
+)
+from orders.placement import place_order
+from products.benchmarks import throwaway_sqlite_database
+from products.models import (
+    Category,
+    Product,
+    ProductDetail
+)
+from users.models import (
+    ShippingAddress,
+    User
+)
+
+DEFAULT_CART_SIZES = [1, 10, 100]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks order placement for carts of different sizes on a throwaway SQLite "
+        "database, reporting the query count and median latency of each cart size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=DEFAULT_CART_SIZES,
+            help="Cart sizes to benchmark (default: 1 10 100).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Orders placed per cart size (default: 20).",
+        )
+
+    def create_benchmark_fixtures(self, product_details_counter):
+        category = Category.objects.create(name="Benchmark")
+        products = Product.objects.bulk_create(
+            [
+                Product(code=f"BENCH-{product_index}", name=f"Benchmark {product_index}", category=category)
+                for product_index in range(product_details_counter)
+            ]
+        )
+        product_details = ProductDetail.objects.bulk_create(
+            [
+                ProductDetail(
+                    product=product,
+                    size="M",
+                    material="Cotton",
+                    color="Black",
+                    stock=1_000_000,
+                    price=1000 + product_index,
+                    description="",
+                )
+                for product_index, product in enumerate(products)
+            ]
+        )
+        user = User.objects.create_user(
+            username="benchmark", email="benchmark@example.com", password="benchmark"
+        )
+        shipping_address = ShippingAddress.objects.create(
+            recipient_name="Benchmark",
+            recipient_phone_number="+92-300-0000000",
+            recipient_area_postal_code="00000",
+            recipient_address="Benchmark Street",
+            recipient_email="benchmark@example.com",
+            user=user,
+        )
+
+        return Cart.objects.create(user=user), shipping_address, product_details
+
+    def fill_cart(self, cart, product_details):
+        CartItem.objects.bulk_create(
+            [
+                CartItem(
+                    cart=cart,
+                    product_id=product_detail.product_id,
+                    product_detail=product_detail,
+                    quantity=2,
+                )
+                for product_detail in product_details
+            ]
+        )
+
+    def benchmark_cart_size(self, cart, shipping_address, product_details, repeat):
+        executed_queries_counters = []
+        durations = []
+
+        def count_query(execute, sql, params, many, context):
+            executed_queries_counters[-1] += 1
+
+            return execute(sql, params, many, context)
+
+        for _ in range(repeat):
+            self.fill_cart(cart, product_details)
+            executed_queries_counters.append(0)
+
+            with connection.execute_wrapper(count_query):
+                placement_started_at = time.perf_counter()
+                place_order(cart, shipping_address)
+                durations.append(time.perf_counter() - placement_started_at)
+
+        return executed_queries_counters, durations
+
+    def handle(self, *args, **options):
+        if min(options["sizes"]) < 1 or options["repeat"] < 1:
+            raise CommandError("--sizes and --repeat must be positive integers.")
+
+        with tempfile.TemporaryDirectory(prefix="order_benchmark_") as benchmark_directory:
+            with throwaway_sqlite_database(Path(benchmark_directory) / "order_placement.sqlite3"):
+                cart, shipping_address, product_details = self.create_benchmark_fixtures(
+                    max(options["sizes"])
+                )
+
+                for cart_size in options["sizes"]:
+                    executed_queries_counters, durations = self.benchmark_cart_size(
+                        cart, shipping_address, product_details[:cart_size], options["repeat"]
+                    )
+
+                    self.stdout.write(
+                        f"{cart_size} items: {min(executed_queries_counters)}-"
+                        f"{max(executed_queries_counters)} queries, "
+                        f"median {statistics.median(durations) * 1000:.1f} ms"
+                    )
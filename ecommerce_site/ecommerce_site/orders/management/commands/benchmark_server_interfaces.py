@@ -0,0 +1,371 @@
+import asyncio
+import io
+import itertools
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management import call_command
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+from django.core.wsgi import get_wsgi_application
+
+from orders.models import (
+    Order,
+    Payment
+)
+from orders.payments import (
+    PAYMENT_SIGNATURE_HEADER,
+    get_payment_signature
+)
+from products.benchmarks import throwaway_sqlite_database
+from products.catalog_import.synthetic import write_synthetic_catalog
+from products.models import ProductDetail
+from users.models import (
+    ShippingAddress,
+    User
+)
+
+BENCHMARK_CSRF_TOKEN = "b" * 32
+BENCHMARK_PAYMENT_CALLBACK_SECRET = "benchmark"
+
+
+class BenchmarkClient:
+    """
+    One virtual client cycling through the async endpoints: a catalog page, a
+    product detail, an anonymous cart add and a payment callback. It keeps the
+    session cookie the site hands out, like a browser would.
+    """
+
+    def __init__(self, product_ids, product_detail_ids, payment_ids):
+        self.product_ids = product_ids
+        self.product_detail_ids = product_detail_ids
+        self.payment_ids = payment_ids
+        self.cookies = {"csrftoken": BENCHMARK_CSRF_TOKEN}
+        self.request_counter = 0
+
+    def next_request(self):
+        """
+        Returns (method, path, query_string, headers, body) of the next request.
+        """
+        request_kind = self.request_counter % 4
+        request_index = self.request_counter // 4
+        self.request_counter += 1
+        headers = {
+            "cookie": "; ".join(f"{name}={value}" for name, value in self.cookies.items()),
+        }
+
+        if request_kind == 0:
+            return "GET", "/api/products/", "page_size=20", headers, b""
+
+        if request_kind == 1:
+            product_id = self.product_ids[request_index % len(self.product_ids)]
+
+            return "GET", f"/api/products/{product_id}/", "", headers, b""
+
+        if request_kind == 2:
+            headers["content-type"] = "application/x-www-form-urlencoded"
+            headers["x-csrftoken"] = BENCHMARK_CSRF_TOKEN
+            body = urlencode({
+                "product_detail_id": self.product_detail_ids[request_index % len(self.product_detail_ids)],
+            }).encode("ascii")
+
+            return "POST", "/api/cart/items/", "", headers, body
+
+        body = json.dumps({"status": "DONE"}).encode("utf-8")
+        headers["content-type"] = "application/json"
+        headers[PAYMENT_SIGNATURE_HEADER.lower()] = get_payment_signature(body)
+
+        return "POST", f"/api/payments/{next(self.payment_ids)}/callback/", "", headers, body
+
+    def store_cookies(self, set_cookie_headers):
+        for set_cookie_header in set_cookie_headers:
+            for name, morsel in SimpleCookie(set_cookie_header).items():
+                self.cookies[name] = morsel.value
+
+
+def summarize_run(latencies, failed_requests_counter, duration):
+    latencies = sorted(latencies)
+
+    return (
+        f"{len(latencies) / duration:.1f} requests/sec, "
+        f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms, "
+        f"{failed_requests_counter} failed"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the async catalog, cart and payment callback endpoints through "
+        "Django's WSGI handler on a fixed pool of worker threads and through its ASGI "
+        "handler on a single event loop, with clients that take --client-delay ms to "
+        "send each request, and reports throughput and latency of both."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--products",
+            type=int,
+            default=500,
+            help="Synthetic products loaded before the run (default: 500).",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Requests sent through each interface (default: 2000).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="WSGI worker threads (default: 8).",
+        )
+        parser.add_argument(
+            "--connections",
+            type=int,
+            default=200,
+            help="Concurrent ASGI connections (default: 200).",
+        )
+        parser.add_argument(
+            "--client-delay",
+            type=float,
+            default=250.0,
+            help="Milliseconds each client takes to send its request (default: 250).",
+        )
+
+    def create_benchmark_fixtures(self, options, benchmark_directory):
+        feed_path = Path(benchmark_directory) / "catalog.json"
+
+        with open(feed_path, "w", encoding="utf-8") as feed_file:
+            write_synthetic_catalog(feed_file, options["products"], seed=0)
+
+        with open(os.devnull, "w") as devnull:
+            call_command(
+                "load_product_catalog_json_and_populate_models",
+                file=str(feed_path),
+                bulk=True,
+                stdout=devnull,
+            )
+
+        ProductDetail.objects.update(stock=1_000_000)
+        user = User.objects.create_user(
+            username="benchmark", email="benchmark@example.com", password="benchmark"
+        )
+        shipping_address = ShippingAddress.objects.create(
+            recipient_name="Benchmark",
+            recipient_phone_number="+92-300-0000000",
+            recipient_area_postal_code="00000",
+            recipient_address="Benchmark Street",
+            recipient_email="benchmark@example.com",
+            user=user,
+        )
+        # Every callback settles a different pending payment.
+        orders = Order.objects.bulk_create(
+            [
+                Order(user=user, shipping_address=shipping_address, total_amount=1000)
+                for _ in range(options["requests"] // 2 + 1)
+            ]
+        )
+        payment_ids = [
+            payment.id
+            for payment in Payment.objects.bulk_create(
+                [Payment(order=order, amount=order.total_amount) for order in orders]
+            )
+        ]
+
+        return (
+            list(ProductDetail.objects.values_list("product_id", flat=True).distinct()),
+            list(ProductDetail.objects.values_list("id", flat=True)),
+            payment_ids,
+        )
+
+    def run_wsgi(self, benchmark_clients, options):
+        """
+        Each worker thread serves one client at a time and is blocked for the whole
+        time the client takes to send its request, as a sync server worker is.
+        """
+        wsgi_application = get_wsgi_application()
+        client_delay = options["client_delay"] / 1000
+        remaining_requests = itertools.count(options["requests"], -1)
+        latencies = []
+        failed_requests = []
+
+        def run_client(benchmark_client):
+            while next(remaining_requests) > 0:
+                method, path, query_string, headers, body = benchmark_client.next_request()
+                environ = {
+                    "REQUEST_METHOD": method,
+                    "PATH_INFO": path,
+                    "QUERY_STRING": query_string,
+                    "SERVER_NAME": "localhost",
+                    "SERVER_PORT": "80",
+                    "SERVER_PROTOCOL": "HTTP/1.1",
+                    "REMOTE_ADDR": "127.0.0.1",
+                    "CONTENT_LENGTH": str(len(body)),
+                    "CONTENT_TYPE": headers.pop("content-type", ""),
+                    "wsgi.input": io.BytesIO(body),
+                    "wsgi.errors": sys.stderr,
+                    "wsgi.url_scheme": "http",
+                    "wsgi.multithread": True,
+                    "wsgi.multiprocess": False,
+                    "wsgi.run_once": False,
+                    **{
+                        f"HTTP_{header_name.upper().replace('-', '_')}": header_value
+                        for header_name, header_value in headers.items()
+                    },
+                }
+                response_status = []
+
+                def start_response(status, response_headers, exc_info=None):
+                    response_status.append(int(status.split()[0]))
+                    benchmark_client.store_cookies(
+                        header_value
+                        for header_name, header_value in response_headers
+                        if header_name.lower() == "set-cookie"
+                    )
+
+                request_started_at = time.perf_counter()
+                time.sleep(client_delay)
+                response = wsgi_application(environ, start_response)
+                b"".join(response)
+                response.close()
+                latencies.append(time.perf_counter() - request_started_at)
+
+                if response_status[0] >= 400:
+                    failed_requests.append(response_status[0])
+
+        run_started_at = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            list(executor.map(run_client, benchmark_clients[:options["workers"]]))
+
+        return summarize_run(latencies, len(failed_requests), time.perf_counter() - run_started_at)
+
+    async def arun_asgi(self, benchmark_clients, options):
+        """
+        All connections share one event loop; a client still sending its request
+        is an awaiting coroutine, not a blocked thread.
+        """
+        asgi_application = get_asgi_application()
+        client_delay = options["client_delay"] / 1000
+        remaining_requests = itertools.count(options["requests"], -1)
+        latencies = []
+        failed_requests = []
+
+        async def run_client(benchmark_client):
+            while next(remaining_requests) > 0:
+                method, path, query_string, headers, body = benchmark_client.next_request()
+                scope = {
+                    "type": "http",
+                    "asgi": {"version": "3.0"},
+                    "http_version": "1.1",
+                    "method": method,
+                    "scheme": "http",
+                    "path": path,
+                    "raw_path": path.encode("ascii"),
+                    "query_string": query_string.encode("ascii"),
+                    "headers": [(b"host", b"localhost")] + [
+                        (header_name.encode("latin-1"), str(header_value).encode("latin-1"))
+                        for header_name, header_value in headers.items()
+                    ],
+                    "client": ("127.0.0.1", 0),
+                    "server": ("localhost", 80),
+                }
+                response_sent = asyncio.Event()
+                response_status = []
+                request_body_sent = False
+
+                async def receive():
+                    nonlocal request_body_sent
+
+                    if not request_body_sent:
+                        request_body_sent = True
+                        await asyncio.sleep(client_delay)
+
+                        return {"type": "http.request", "body": body, "more_body": False}
+
+                    # Django listens for a disconnect while the view runs.
+                    await response_sent.wait()
+
+                    return {"type": "http.disconnect"}
+
+                async def send(message):
+                    if message["type"] == "http.response.start":
+                        response_status.append(message["status"])
+                        benchmark_client.store_cookies(
+                            header_value.decode("latin-1")
+                            for header_name, header_value in message["headers"]
+                            if header_name.lower() == b"set-cookie"
+                        )
+                    elif not message.get("more_body"):
+                        response_sent.set()
+
+                request_started_at = time.perf_counter()
+                await asgi_application(scope, receive, send)
+                latencies.append(time.perf_counter() - request_started_at)
+
+                if response_status[0] >= 400:
+                    failed_requests.append(response_status[0])
+
+        run_started_at = time.perf_counter()
+        await asyncio.gather(
+            *(run_client(benchmark_client) for benchmark_client in benchmark_clients)
+        )
+
+        return summarize_run(latencies, len(failed_requests), time.perf_counter() - run_started_at)
+
+    def handle(self, *args, **options):
+        if min(options["products"], options["requests"], options["workers"], options["connections"]) < 1:
+            raise CommandError("--products, --requests, --workers and --connections must be positive.")
+
+        if options["client_delay"] < 0:
+            raise CommandError("--client-delay must not be negative.")
+
+        settings.ALLOWED_HOSTS = ["localhost"]
+        settings.PAYMENT_CALLBACK_SECRET = BENCHMARK_PAYMENT_CALLBACK_SECRET
+        # Slow client delays would otherwise log every request as slow.
+        logging.getLogger("ecommerce_site.instrumentation").setLevel(logging.ERROR)
+
+        with tempfile.TemporaryDirectory(prefix="server_interface_benchmark_") as benchmark_directory:
+            with throwaway_sqlite_database(Path(benchmark_directory) / "server_interfaces.sqlite3"):
+                product_ids, product_detail_ids, payment_ids = self.create_benchmark_fixtures(
+                    options, benchmark_directory
+                )
+                # Each interface settles its own half of the pending payments. The
+                # clients of one run share an iterator; next() on it is atomic.
+                wsgi_payment_ids = iter(payment_ids[::2])
+                wsgi_summary = self.run_wsgi(
+                    [
+                        BenchmarkClient(product_ids, product_detail_ids, wsgi_payment_ids)
+                        for _ in range(options["workers"])
+                    ],
+                    options,
+                )
+                self.stdout.write(f"WSGI, {options['workers']} worker threads: {wsgi_summary}")
+
+                asgi_payment_ids = iter(payment_ids[1::2])
+                asgi_summary = asyncio.run(
+                    self.arun_asgi(
+                        [
+                            BenchmarkClient(product_ids, product_detail_ids, asgi_payment_ids)
+                            for _ in range(options["connections"])
+                        ],
+                        options,
+                    )
+                )
+                self.stdout.write(
+                    f"ASGI, one event loop, {options['connections']} connections: {asgi_summary}"
+                )
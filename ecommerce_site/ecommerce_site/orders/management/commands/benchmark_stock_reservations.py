@@ -0,0 +1,246 @@
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+from django.db import (
+    OperationalError, connection
+)
+from django.db.models import Sum
+
+from orders.choices import StockReservationStatusChoices
+from orders.models import StockReservationItem
+from orders.reservations import (
+    InsufficientStockError,
+    StockReservationExpiredError,
+    commit_stock_reservation,
+    release_expired_stock_reservations,
+    reserve_stock
+)
+from products.benchmarks import throwaway_sqlite_database
+from products.models import (
+    Category,
+    Product,
+    ProductDetail
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress-tests stock reservations on a throwaway SQLite database: many threads "
+        "reserve, commit and abandon random baskets while a sweeper releases expired "
+        "holds, then checks that no product detail was oversold and reports checkouts/sec."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Concurrent checkout threads (default: 8).",
+        )
+        parser.add_argument(
+            "--checkouts-per-thread",
+            type=int,
+            default=200,
+            help="Checkouts attempted by each thread (default: 200).",
+        )
+        parser.add_argument(
+            "--product-details",
+            type=int,
+            default=20,
+            help="Product details competing for stock (default: 20).",
+        )
+        parser.add_argument(
+            "--stock",
+            type=int,
+            default=50,
+            help="Initial stock of every product detail (default: 50).",
+        )
+        parser.add_argument(
+            "--max-items",
+            type=int,
+            default=3,
+            help="Most distinct product details in one basket (default: 3).",
+        )
+        parser.add_argument(
+            "--ttl",
+            type=float,
+            default=0.5,
+            help="Seconds an uncommitted reservation is held (default: 0.5).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed for the basket generator (default: 0).",
+        )
+
+    def create_product_details(self, product_details_counter, stock):
+        category = Category.objects.create(name="Benchmark")
+        products = Product.objects.bulk_create(
+            [
+                Product(code=f"BENCH-{product_index}", name=f"Benchmark {product_index}", category=category)
+                for product_index in range(product_details_counter)
+            ]
+        )
+
+        return [
+            product_detail.id
+            for product_detail in ProductDetail.objects.bulk_create(
+                [
+                    ProductDetail(
+                        product=product,
+                        size="M",
+                        material="Cotton",
+                        color="Black",
+                        stock=stock,
+                        price=1000,
+                        description="",
+                    )
+                    for product in products
+                ]
+            )
+        ]
+
+    def run_checkouts(self, product_detail_ids, options, thread_seed, outcome_counters, counters_lock):
+        basket_random = random.Random(thread_seed)
+        thread_outcome_counters = dict.fromkeys(outcome_counters, 0)
+
+        try:
+            for _ in range(options["checkouts_per_thread"]):
+                basket = [
+                    (product_detail_id, basket_random.randint(1, 3))
+                    for product_detail_id in basket_random.sample(
+                        product_detail_ids, basket_random.randint(1, options["max_items"])
+                    )
+                ]
+
+                try:
+                    reservation = reserve_stock(basket, ttl=timedelta(seconds=options["ttl"]))
+
+                    # Half of the checkouts pay, the rest are abandoned for the sweeper.
+                    if basket_random.random() < 0.5:
+                        commit_stock_reservation(reservation)
+                        thread_outcome_counters["committed"] += 1
+                    else:
+                        thread_outcome_counters["abandoned"] += 1
+                except InsufficientStockError:
+                    thread_outcome_counters["rejected"] += 1
+                except StockReservationExpiredError:
+                    thread_outcome_counters["expired"] += 1
+                except OperationalError:
+                    thread_outcome_counters["lock_errors"] += 1
+        finally:
+            connection.close()
+
+            with counters_lock:
+                for outcome, outcome_counter in thread_outcome_counters.items():
+                    outcome_counters[outcome] += outcome_counter
+
+    def run_sweeper(self, stop_sweeping, outcome_counters, counters_lock):
+        try:
+            while not stop_sweeping.wait(0.05):
+                try:
+                    released_reservations_counter = release_expired_stock_reservations()
+                except OperationalError:
+                    continue
+
+                with counters_lock:
+                    outcome_counters["released"] += released_reservations_counter
+        finally:
+            connection.close()
+
+    def check_no_oversell(self, product_detail_ids, stock):
+        held_quantities_by_product_detail_id = dict(
+            StockReservationItem.objects.filter(
+                reservation__status__in=[
+                    StockReservationStatusChoices.HELD,
+                    StockReservationStatusChoices.COMMITTED,
+                ]
+            )
+            .values("product_detail_id")
+            .annotate(held_quantity=Sum("quantity"))
+            .values_list("product_detail_id", "held_quantity")
+        )
+
+        for product_detail_id, remaining_stock in ProductDetail.objects.filter(
+            pk__in=product_detail_ids
+        ).values_list("id", "stock"):
+            held_quantity = held_quantities_by_product_detail_id.get(product_detail_id, 0)
+
+            if remaining_stock + held_quantity != stock:
+                raise CommandError(
+                    f"Product detail {product_detail_id} is inconsistent: {remaining_stock} in "
+                    f"stock and {held_quantity} reserved out of {stock}."
+                )
+
+    def handle(self, *args, **options):
+        if min(options["threads"], options["checkouts_per_thread"], options["stock"]) < 1:
+            raise CommandError("--threads, --checkouts-per-thread and --stock must be positive.")
+
+        if not 1 <= options["max_items"] <= options["product_details"]:
+            raise CommandError("--max-items must be between 1 and --product-details.")
+
+        outcome_counters = dict.fromkeys(
+            ("committed", "abandoned", "rejected", "expired", "lock_errors", "released"), 0
+        )
+        counters_lock = threading.Lock()
+
+        with tempfile.TemporaryDirectory(prefix="stock_benchmark_") as benchmark_directory:
+            with throwaway_sqlite_database(Path(benchmark_directory) / "stock_reservations.sqlite3"):
+                product_detail_ids = self.create_product_details(
+                    options["product_details"], options["stock"]
+                )
+                connection.close()
+
+                stop_sweeping = threading.Event()
+                sweeper_thread = threading.Thread(
+                    target=self.run_sweeper, args=(stop_sweeping, outcome_counters, counters_lock)
+                )
+                checkout_threads = [
+                    threading.Thread(
+                        target=self.run_checkouts,
+                        args=(
+                            product_detail_ids,
+                            options,
+                            options["seed"] + thread_index,
+                            outcome_counters,
+                            counters_lock,
+                        ),
+                    )
+                    for thread_index in range(options["threads"])
+                ]
+
+                benchmark_started_at = time.perf_counter()
+                sweeper_thread.start()
+
+                for checkout_thread in checkout_threads:
+                    checkout_thread.start()
+
+                for checkout_thread in checkout_threads:
+                    checkout_thread.join()
+
+                benchmark_duration = time.perf_counter() - benchmark_started_at
+                stop_sweeping.set()
+                sweeper_thread.join()
+
+                self.check_no_oversell(product_detail_ids, options["stock"])
+
+        attempted_checkouts_counter = options["threads"] * options["checkouts_per_thread"]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{attempted_checkouts_counter} checkouts on {options['threads']} threads in "
+                f"{benchmark_duration:.2f}s ({attempted_checkouts_counter / benchmark_duration:.1f} "
+                f"checkouts/sec). No product detail was oversold."
+            )
+        )
+        self.stdout.write(
+            ", ".join(f"{outcome}: {outcome_counter}" for outcome, outcome_counter in outcome_counters.items())
+        )
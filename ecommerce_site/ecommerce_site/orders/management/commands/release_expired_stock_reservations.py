@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from orders.reservations import release_expired_stock_reservations
+
+
+class Command(BaseCommand):
+    help = (
+        "Gives the stock of expired, uncommitted checkout reservations back to their "
+        "product details. Meant to run every minute or so from cron."
+    )
+
+    def handle(self, *args, **options):
+        released_reservations_counter = release_expired_stock_reservations()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Released {released_reservations_counter} expired stock reservations.")
+        )
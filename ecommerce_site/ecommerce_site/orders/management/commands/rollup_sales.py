@@ -0,0 +1,45 @@
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+
+from orders.analytics import (
+    SALES_ROLLUP_BATCH_SIZE,
+    reset_sales_rollup,
+    run_sales_rollup
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Updates the daily product and category sales rollups with the orders "
+        "completed or canceled since the last run. Meant to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop the rollups and the watermark and recompute from the full order history.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SALES_ROLLUP_BATCH_SIZE,
+            help=f"Orders processed per transaction (default: {SALES_ROLLUP_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        if options["rebuild"]:
+            reset_sales_rollup()
+
+        added_orders_counter, removed_orders_counter = run_sales_rollup(options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rolled up {added_orders_counter} completed orders and took out "
+                f"{removed_orders_counter} canceled ones."
+            )
+        )
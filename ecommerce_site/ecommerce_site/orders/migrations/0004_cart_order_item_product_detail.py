@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_stock_reservation'),
+        ('products', '0010_listing_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='product_detail',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', to='products.productdetail'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_detail',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', to='products.productdetail'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_cart_summary'),
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created', '-id'], name='order_user_created_idx'),
+        ),
+    ]
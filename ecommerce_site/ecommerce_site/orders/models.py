@@ -3,7 +3,7 @@ from django.db import models
 from django_extensions.db.models import TimeStampedModel
 
 from .choices import (
-    OrderStatusChoices, PaymentStatusChoices
+    OrderStatusChoices, PaymentStatusChoices, StockReservationStatusChoices
 )
 
 
@@ -27,6 +27,19 @@ class Order(TimeStampedModel):
         related_name="orders",
     )
 
+    class Meta(TimeStampedModel.Meta):
+        indexes = [
+            models.Index(
+                fields=["user", "status", "-created"],
+                name="order_user_status_created_idx",
+            ),
+            models.Index(
+                fields=["user", "-created", "-id"],
+                name="order_user_created_idx",
+            ),
+            models.Index(fields=["modified"], name="order_modified_idx"),
+        ]
+
     def __str__(self):
         return f"Order {self.total_amount} by {self.user.username}"
 
@@ -47,13 +60,25 @@ class OrderItem(models.Model):
         related_name="order_items",
     )
 
+    product_detail = models.ForeignKey(
+        "products.ProductDetail",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="order_items",
+    )
+
     def __str__(self):
-        return f"{self.product.product_name} in Order {self.order.id}"
+        return f"{self.product.name} in Order {self.order_id}"
 
 
 class Cart(TimeStampedModel):
     user = models.OneToOneField("users.User", on_delete=models.CASCADE)
 
+    # Cached by orders.carts on every cart change so the header badge is one row read.
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
     def __str__(self):
         return f"Cart of {self.user.username}"
 
@@ -67,12 +92,28 @@ class CartItem(models.Model):
         related_name="cart_items"
     )
 
+    product_detail = models.ForeignKey(
+        "products.ProductDetail",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="cart_items",
+    )
+
     cart = models.ForeignKey(
         "orders.Cart",
         on_delete=models.CASCADE,
         related_name="cart_items",
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "product_detail"],
+                name="cartitem_cart_product_detail_unique",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.product.name} with quantity {self.quantity}"
 
@@ -89,3 +130,130 @@ class Payment(TimeStampedModel):
 
     def __str__(self):
         return f"Payment {self.amount} for Order {self.order.id}"
+
+
+class StockReservation(TimeStampedModel):
+    """
+    A checkout's hold on ProductDetail stock. Stock is taken when the hold is
+    created and given back by orders.reservations if it is released or expires
+    before being committed to an order.
+    """
+
+    status = models.CharField(
+        max_length=10,
+        choices=StockReservationStatusChoices.choices,
+        default=StockReservationStatusChoices.HELD,
+    )
+    expires_at = models.DateTimeField()
+
+    order = models.OneToOneField(
+        "orders.Order",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="stock_reservation",
+    )
+
+    class Meta(TimeStampedModel.Meta):
+        indexes = [
+            models.Index(
+                fields=["expires_at"],
+                name="reservation_held_expiry_idx",
+                condition=models.Q(status=StockReservationStatusChoices.HELD),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Stock reservation {self.id} ({self.status})"
+
+
+class StockReservationItem(models.Model):
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+
+    reservation = models.ForeignKey(
+        "orders.StockReservation",
+        on_delete=models.CASCADE,
+        related_name="reservation_items",
+    )
+
+    product_detail = models.ForeignKey(
+        "products.ProductDetail",
+        on_delete=models.CASCADE,
+        related_name="stock_reservation_items",
+    )
+
+    def __str__(self):
+        return f"{self.quantity} of {self.product_detail_id} in reservation {self.reservation_id}"
+
+
+class DailyProductSales(models.Model):
+    """
+    Completed-order totals per product and day, maintained by the rollup_sales
+    command so reports never scan Order and OrderItem.
+    """
+
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    order_count = models.PositiveIntegerField(default=0)
+
+    product = models.ForeignKey(
+        "products.Product",
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "product"], name="daily_product_sales_unique"),
+        ]
+
+    def __str__(self):
+        return f"Sales of {self.product_id} on {self.date}"
+
+
+class DailyCategorySales(models.Model):
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    order_count = models.PositiveIntegerField(default=0)
+
+    category = models.ForeignKey(
+        "products.Category",
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "category"], name="daily_category_sales_unique"),
+        ]
+
+    def __str__(self):
+        return f"Sales of category {self.category_id} on {self.date}"
+
+
+class RolledUpOrder(models.Model):
+    """
+    Ledger of the orders currently counted in the daily sales rollups, so a run
+    can tell a newly completed order from one that was canceled after counting.
+    """
+
+    order = models.OneToOneField(
+        "orders.Order",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="sales_rollup",
+    )
+    date = models.DateField()
+
+    def __str__(self):
+        return f"Order {self.order_id} rolled up on {self.date}"
+
+
+class SalesRollupWatermark(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    processed_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} processed until {self.processed_until}"
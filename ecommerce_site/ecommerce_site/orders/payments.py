@@ -0,0 +1,48 @@
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.utils import timezone
+
+from .choices import PaymentStatusChoices
+from .models import Payment
+
+PAYMENT_SIGNATURE_HEADER = "X-Payment-Signature"
+SETTLED_PAYMENT_STATUSES = (PaymentStatusChoices.DONE, PaymentStatusChoices.FAILED)
+
+
+class PaymentCallbackError(Exception):
+    pass
+
+
+def get_payment_signature(body):
+    return hmac.new(
+        settings.PAYMENT_CALLBACK_SECRET.encode("utf-8"), body, hashlib.sha256
+    ).hexdigest()
+
+
+def is_payment_signature_valid(body, signature):
+    # Without a configured secret every callback is refused.
+    if not settings.PAYMENT_CALLBACK_SECRET or not signature:
+        return False
+
+    return hmac.compare_digest(get_payment_signature(body), signature)
+
+
+async def asettle_payment(payment_id, status):
+    """
+    Moves a pending Payment to status, DONE or FAILED, with one conditional
+    UPDATE. A repeated callback carrying the same status is accepted, so provider
+    retries are harmless. A callback contradicting an already settled payment raises
+    PaymentCallbackError. Raises Payment.DoesNotExist for an unknown payment.
+    """
+    # update() skips the automatic modified timestamp, so it is set here.
+    if await Payment.objects.filter(pk=payment_id, status=PaymentStatusChoices.PENDING).aupdate(
+        status=status, modified=timezone.now()
+    ):
+        return
+
+    payment = await Payment.objects.only("status").aget(pk=payment_id)
+
+    if payment.status != status:
+        raise PaymentCallbackError(f"Payment {payment_id} is already {payment.status}.")
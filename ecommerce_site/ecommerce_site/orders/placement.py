@@ -0,0 +1,87 @@
+from django.db import transaction
+
+from products.models import ProductDetail
+
+from .models import (
+    Cart,
+    Order,
+    OrderItem,
+    Payment
+)
+from .reservations import (
+    commit_stock_reservation,
+    reserve_stock
+)
+
+
+class OrderPlacementError(Exception):
+    pass
+
+
+def place_order(cart, shipping_address):
+    """
+    Turns the cart into a pending Order with its OrderItems and Payment, takes the
+    ordered stock and empties the cart, all in one transaction.
+
+    Prices are read in one locking query and totals are computed in Python, so the
+    number of queries is the same for a one-item cart and a hundred-item cart.
+    Raises OrderPlacementError for an unusable cart and InsufficientStockError
+    when an item is out of stock; either way nothing is written.
+    """
+    with transaction.atomic():
+        cart_items = list(
+            cart.cart_items.order_by("id").values_list("product_detail_id", "quantity")
+        )
+
+        if not cart_items:
+            raise OrderPlacementError("The cart is empty.")
+
+        ordered_product_detail_ids = {product_detail_id for product_detail_id, _ in cart_items}
+
+        if None in ordered_product_detail_ids:
+            raise OrderPlacementError("Every cart item needs a product variant selected.")
+
+        # Locking in id order means two overlapping checkouts cannot deadlock.
+        # Lines of deactivated products are refused, as cart totals leave them out.
+        product_details_by_id = {
+            product_detail_id: (product_id, price)
+            for product_detail_id, product_id, price in ProductDetail.objects.select_for_update()
+            .filter(pk__in=ordered_product_detail_ids, product__is_active=True)
+            .order_by("id")
+            .values_list("id", "product_id", "price")
+        }
+
+        if len(product_details_by_id) != len(ordered_product_detail_ids):
+            raise OrderPlacementError("A product in the cart is no longer available.")
+
+        stock_reservation = reserve_stock(cart_items)
+
+        order_items = [
+            OrderItem(
+                product_id=product_details_by_id[product_detail_id][0],
+                product_detail_id=product_detail_id,
+                quantity=quantity,
+                price_at_purchase=product_details_by_id[product_detail_id][1],
+            )
+            for product_detail_id, quantity in cart_items
+        ]
+        total_amount = sum(
+            order_item.price_at_purchase * order_item.quantity for order_item in order_items
+        )
+
+        order = Order.objects.create(
+            user_id=cart.user_id,
+            shipping_address=shipping_address,
+            total_amount=total_amount,
+        )
+
+        for order_item in order_items:
+            order_item.order = order
+
+        OrderItem.objects.bulk_create(order_items)
+        Payment.objects.create(order=order, amount=total_amount)
+        commit_stock_reservation(stock_reservation, order=order)
+        cart.cart_items.all().delete()
+        Cart.objects.filter(pk=cart.pk).update(item_count=0, subtotal=0)
+
+    return order
@@ -0,0 +1,188 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import (
+    Case, F, PositiveIntegerField, Sum, Value, When
+)
+from django.utils import timezone
+
+from products.models import ProductDetail
+from products.refresh import mark_products_stale
+
+from .choices import StockReservationStatusChoices
+from .models import (
+    StockReservation,
+    StockReservationItem
+)
+
+STOCK_RESERVATION_TTL = timedelta(minutes=15)
+STOCK_RELEASE_BATCH_SIZE = 500
+
+
+class InsufficientStockError(Exception):
+    def __init__(self, product_detail_ids):
+        self.product_detail_ids = sorted(product_detail_ids)
+        super().__init__(f"Not enough stock for product details {self.product_detail_ids}.")
+
+
+class StockReservationExpiredError(Exception):
+    pass
+
+
+def get_quantity_case(quantities_by_product_detail_id):
+    return Case(
+        *[
+            When(pk=product_detail_id, then=Value(quantity))
+            for product_detail_id, quantity in quantities_by_product_detail_id.items()
+        ],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def get_quantities_by_product_detail_id(reserved_items):
+    quantities_by_product_detail_id = Counter()
+
+    for product_detail_id, quantity in reserved_items:
+        if quantity < 1:
+            raise ValueError("Reserved quantities must be positive integers.")
+
+        quantities_by_product_detail_id[product_detail_id] += quantity
+
+    if not quantities_by_product_detail_id:
+        raise ValueError("A stock reservation needs at least one item.")
+
+    return quantities_by_product_detail_id
+
+
+def mark_reserved_products_stale(product_detail_ids):
+    # Listing rows and cached payloads show stock, and queryset updates skip signals.
+    # Search and facets do not index stock.
+    mark_products_stale(
+        ProductDetail.objects.filter(pk__in=product_detail_ids).values_list("product_id", flat=True),
+        reindex=False,
+    )
+
+
+def reserve_stock(reserved_items, ttl=STOCK_RESERVATION_TTL):
+    """
+    Holds stock for (product_detail_id, quantity) pairs for ttl and returns the
+    StockReservation.
+
+    Every item is decremented by one conditional UPDATE ... WHERE stock >= quantity,
+    so concurrent checkouts never oversell and only lock the rows they touch. If any
+    item is short the whole reservation is rolled back with InsufficientStockError.
+    """
+    quantities_by_product_detail_id = get_quantities_by_product_detail_id(reserved_items)
+    quantity_case = get_quantity_case(quantities_by_product_detail_id)
+
+    with transaction.atomic():
+        reserved_rows_counter = ProductDetail.objects.filter(
+            pk__in=quantities_by_product_detail_id, stock__gte=quantity_case
+        ).update(stock=F("stock") - quantity_case)
+
+        if reserved_rows_counter == len(quantities_by_product_detail_id):
+            reservation = StockReservation.objects.create(expires_at=timezone.now() + ttl)
+            StockReservationItem.objects.bulk_create(
+                [
+                    StockReservationItem(
+                        reservation=reservation,
+                        product_detail_id=product_detail_id,
+                        quantity=quantity,
+                    )
+                    for product_detail_id, quantity in quantities_by_product_detail_id.items()
+                ]
+            )
+            mark_reserved_products_stale(quantities_by_product_detail_id)
+
+            return reservation
+
+        transaction.set_rollback(True)
+
+    # Read after the rollback so the error names the items that are short right now.
+    short_product_detail_ids = set(quantities_by_product_detail_id) - set(
+        ProductDetail.objects.filter(
+            pk__in=quantities_by_product_detail_id, stock__gte=quantity_case
+        ).values_list("id", flat=True)
+    )
+
+    raise InsufficientStockError(short_product_detail_ids)
+
+
+def commit_stock_reservation(reservation, order=None):
+    """
+    Turns a held reservation into a permanent stock decrement. Raises
+    StockReservationExpiredError if the hold has expired or was already released.
+    """
+    committed_reservations_counter = StockReservation.objects.filter(
+        pk=reservation.pk,
+        status=StockReservationStatusChoices.HELD,
+        expires_at__gt=timezone.now(),
+    ).update(status=StockReservationStatusChoices.COMMITTED, order=order)
+
+    if not committed_reservations_counter:
+        raise StockReservationExpiredError(f"Stock reservation {reservation.pk} is no longer held.")
+
+    reservation.status = StockReservationStatusChoices.COMMITTED
+    reservation.order = order
+
+
+def release_stock_reservations(reservations):
+    """
+    Gives back the stock of the held reservations in the queryset, at most
+    STOCK_RELEASE_BATCH_SIZE of them, and returns how many were released.
+    """
+    while True:
+        with transaction.atomic():
+            # skip_locked lets concurrent sweepers split the work instead of queueing.
+            released_reservation_ids = list(
+                reservations.filter(status=StockReservationStatusChoices.HELD)
+                .select_for_update(skip_locked=True)
+                .values_list("id", flat=True)[:STOCK_RELEASE_BATCH_SIZE]
+            )
+
+            if not released_reservation_ids:
+                return 0
+
+            released_reservations_counter = StockReservation.objects.filter(
+                pk__in=released_reservation_ids, status=StockReservationStatusChoices.HELD
+            ).update(status=StockReservationStatusChoices.RELEASED)
+
+            # Without row locks a checkout or another sweeper may have moved some of
+            # the selected reservations on. Stock is only given back for a batch that
+            # was still held as a whole; otherwise it is rolled back and selected again.
+            if released_reservations_counter != len(released_reservation_ids):
+                transaction.set_rollback(True)
+                continue
+
+            quantities_by_product_detail_id = dict(
+                StockReservationItem.objects.filter(reservation_id__in=released_reservation_ids)
+                .values("product_detail_id")
+                .annotate(released_quantity=Sum("quantity"))
+                .values_list("product_detail_id", "released_quantity")
+            )
+            ProductDetail.objects.filter(pk__in=quantities_by_product_detail_id).update(
+                stock=F("stock") + get_quantity_case(quantities_by_product_detail_id)
+            )
+            mark_reserved_products_stale(quantities_by_product_detail_id)
+
+        return released_reservations_counter
+
+
+def release_stock_reservation(reservation):
+    return release_stock_reservations(StockReservation.objects.filter(pk=reservation.pk))
+
+
+def release_expired_stock_reservations(now=None):
+    now = now or timezone.now()
+    released_reservations_counter = 0
+
+    while True:
+        released_batch_counter = release_stock_reservations(
+            StockReservation.objects.filter(expires_at__lte=now)
+        )
+
+        if not released_batch_counter:
+            return released_reservations_counter
+
+        released_reservations_counter += released_batch_counter
@@ -0,0 +1,194 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from products.models import ProductDetail
+
+from .carts import (
+    CartItemError,
+    refresh_cart_summaries
+)
+from .models import (
+    Cart,
+    CartItem
+)
+
+SESSION_CART_KEY = "cart"
+MAX_SESSION_CART_LINES = 50
+
+
+def get_available_product_details(product_detail_ids):
+    return {
+        product_detail["id"]: product_detail
+        for product_detail in ProductDetail.objects.filter(
+            pk__in=product_detail_ids, product__is_active=True
+        ).values(
+            "id",
+            "product_id",
+            "price",
+            "size",
+            "color",
+            product_name=F("product__name"),
+        )
+    }
+
+
+def get_session_cart_quantities(session):
+    # Session data is JSON, so product detail ids are stored as string keys.
+    return {
+        int(product_detail_id): quantity
+        for product_detail_id, quantity in session.get(SESSION_CART_KEY, {}).get("items", {}).items()
+    }
+
+
+def save_session_cart(session, quantities_by_product_detail_id):
+    """
+    Stores the anonymous cart in the session as {"items": {id: quantity}} plus the
+    badge totals, priced with one query. Nothing else is written to the database.
+    """
+    if not quantities_by_product_detail_id:
+        session.pop(SESSION_CART_KEY, None)
+        return
+
+    product_details_by_id = get_available_product_details(quantities_by_product_detail_id)
+    quantities_by_product_detail_id = {
+        product_detail_id: quantity
+        for product_detail_id, quantity in quantities_by_product_detail_id.items()
+        if product_detail_id in product_details_by_id
+    }
+
+    session[SESSION_CART_KEY] = {
+        "items": {
+            str(product_detail_id): quantity
+            for product_detail_id, quantity in quantities_by_product_detail_id.items()
+        },
+        "item_count": sum(quantities_by_product_detail_id.values()),
+        "subtotal": str(
+            sum(
+                (
+                    product_details_by_id[product_detail_id]["price"] * quantity
+                    for product_detail_id, quantity in quantities_by_product_detail_id.items()
+                ),
+                Decimal(0),
+            )
+        ),
+    }
+
+
+def get_session_cart_summary(session):
+    session_cart = session.get(SESSION_CART_KEY, {})
+
+    return {
+        "item_count": session_cart.get("item_count", 0),
+        "subtotal": Decimal(session_cart.get("subtotal", 0)),
+    }
+
+
+def get_session_cart_contents(session):
+    quantities_by_product_detail_id = get_session_cart_quantities(session)
+    product_details_by_id = get_available_product_details(quantities_by_product_detail_id)
+    cart_items = [
+        {
+            "quantity": quantity,
+            "line_total": product_details_by_id[product_detail_id]["price"] * quantity,
+            "product_id": product_details_by_id[product_detail_id]["product_id"],
+            "product_detail_id": product_detail_id,
+            "product_name": product_details_by_id[product_detail_id]["product_name"],
+            "size": product_details_by_id[product_detail_id]["size"],
+            "color": product_details_by_id[product_detail_id]["color"],
+            "price": product_details_by_id[product_detail_id]["price"],
+        }
+        for product_detail_id, quantity in quantities_by_product_detail_id.items()
+        if product_detail_id in product_details_by_id
+    ]
+
+    return {
+        "item_count": sum(cart_item["quantity"] for cart_item in cart_items),
+        "subtotal": sum((cart_item["line_total"] for cart_item in cart_items), Decimal(0)),
+        "items": cart_items,
+    }
+
+
+def add_session_cart_item(session, product_detail_id, quantity=1):
+    if quantity < 1:
+        raise CartItemError("quantity must be a positive integer.")
+
+    quantities_by_product_detail_id = get_session_cart_quantities(session)
+
+    if (
+        product_detail_id not in quantities_by_product_detail_id
+        and len(quantities_by_product_detail_id) >= MAX_SESSION_CART_LINES
+    ):
+        raise CartItemError(f"A cart holds at most {MAX_SESSION_CART_LINES} different items.")
+
+    if not get_available_product_details([product_detail_id]):
+        raise CartItemError(f"Product detail {product_detail_id} is not available.")
+
+    quantities_by_product_detail_id[product_detail_id] = (
+        quantities_by_product_detail_id.get(product_detail_id, 0) + quantity
+    )
+    save_session_cart(session, quantities_by_product_detail_id)
+
+
+def set_session_cart_item_quantity(session, product_detail_id, quantity):
+    if quantity < 0:
+        raise CartItemError("quantity must not be negative.")
+
+    quantities_by_product_detail_id = get_session_cart_quantities(session)
+
+    if product_detail_id not in quantities_by_product_detail_id:
+        raise CartItemError(f"Product detail {product_detail_id} is not in the cart.")
+
+    if quantity:
+        quantities_by_product_detail_id[product_detail_id] = quantity
+    else:
+        del quantities_by_product_detail_id[product_detail_id]
+
+    save_session_cart(session, quantities_by_product_detail_id)
+
+
+def remove_session_cart_item(session, product_detail_id):
+    quantities_by_product_detail_id = get_session_cart_quantities(session)
+    quantities_by_product_detail_id.pop(product_detail_id, None)
+    save_session_cart(session, quantities_by_product_detail_id)
+
+
+def merge_session_cart(session, user):
+    """
+    Moves the anonymous session cart into the user's Cart on login. Quantities of
+    items already in the Cart are added together, and every line is written by
+    one bulk upsert of CartItems.
+    """
+    quantities_by_product_detail_id = get_session_cart_quantities(session)
+
+    if not quantities_by_product_detail_id:
+        return
+
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(user=user)
+        product_details_by_id = get_available_product_details(quantities_by_product_detail_id)
+        existing_quantities_by_product_detail_id = dict(
+            CartItem.objects.select_for_update()
+            .filter(cart=cart, product_detail_id__in=product_details_by_id)
+            .values_list("product_detail_id", "quantity")
+        )
+
+        CartItem.objects.bulk_create(
+            [
+                CartItem(
+                    cart=cart,
+                    product_id=product_details_by_id[product_detail_id]["product_id"],
+                    product_detail_id=product_detail_id,
+                    quantity=quantity + existing_quantities_by_product_detail_id.get(product_detail_id, 0),
+                )
+                for product_detail_id, quantity in quantities_by_product_detail_id.items()
+                if product_detail_id in product_details_by_id
+            ],
+            update_conflicts=True,
+            unique_fields=["cart", "product_detail"],
+            update_fields=["quantity"],
+        )
+        refresh_cart_summaries(Cart.objects.filter(pk=cart.pk))
+
+    del session[SESSION_CART_KEY]
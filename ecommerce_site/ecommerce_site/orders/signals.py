@@ -0,0 +1,34 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from products.models import (
+    Product,
+    ProductDetail
+)
+
+from .carts import (
+    refresh_cart_summaries,
+    refresh_product_cart_summaries
+)
+from .models import Cart
+from .session_carts import merge_session_cart
+
+
+@receiver(post_save, sender=ProductDetail)
+def refresh_cart_summaries_of_repriced_product_detail(sender, instance, created, **kwargs):
+    if not created:
+        refresh_cart_summaries(Cart.objects.filter(cart_items__product_detail=instance))
+
+
+@receiver(post_save, sender=Product)
+def refresh_cart_summaries_of_saved_product(sender, instance, created, **kwargs):
+    # Deactivating a product drops its lines from the cached totals.
+    if not created:
+        refresh_product_cart_summaries([instance.pk])
+
+
+@receiver(user_logged_in)
+def merge_anonymous_cart_on_login(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, "session"):
+        merge_session_cart(request.session, user)
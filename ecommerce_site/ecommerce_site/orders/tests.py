@@ -0,0 +1,469 @@
+import threading
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import (
+    get_user_model, login
+)
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import (
+    OperationalError, connection
+)
+from django.db.models import Sum
+from django.test import (
+    RequestFactory, TestCase, TransactionTestCase
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from orders.choices import (
+    OrderStatusChoices,
+    StockReservationStatusChoices
+)
+from orders.analytics import run_sales_rollup
+from orders.carts import add_cart_item
+from orders.models import (
+    Cart,
+    CartItem,
+    DailyCategorySales,
+    DailyProductSales,
+    Order,
+    OrderItem,
+    Payment,
+    StockReservation,
+    StockReservationItem
+)
+from orders.placement import (
+    OrderPlacementError,
+    place_order
+)
+from orders.reservations import (
+    InsufficientStockError,
+    commit_stock_reservation,
+    release_expired_stock_reservations,
+    reserve_stock
+)
+from products.catalog_import.upsert import CatalogBulkUpserter
+from products.facets import get_facet_index_version
+from products.models import (
+    Category,
+    Product,
+    ProductDetail
+)
+from users.models import ShippingAddress
+
+
+def create_shopper(username):
+    user = get_user_model().objects.create_user(
+        username=username, email=f"{username}@example.com", password="password"
+    )
+    shipping_address = ShippingAddress.objects.create(
+        recipient_name=username,
+        recipient_phone_number="+92-345-2345678",
+        recipient_area_postal_code="54000",
+        recipient_address="1 Mall Road",
+        recipient_email=user.email,
+        user=user,
+    )
+
+    return user, shipping_address
+
+
+def create_product_detail(code, price="100.00", stock=10, category_name="Shirts"):
+    category = Category.objects.get_or_create(name=category_name)[0]
+    product = Product.objects.create(name=f"Shirt {code}", code=code, category=category)
+
+    return ProductDetail.objects.create(
+        size="M",
+        material="Cotton",
+        color="Red",
+        stock=stock,
+        price=Decimal(price),
+        description="",
+        product=product,
+    )
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "Reads SQLite's EXPLAIN QUERY PLAN output.")
+class HotQueryIndexTests(TestCase):
+    def test_orders_by_user_and_status_use_index_order(self):
+        query_plan = (
+            Order.objects.filter(user_id=1, status=OrderStatusChoices.PENDING)
+            .order_by("-created")
+            .explain()
+        )
+
+        self.assertIn("INDEX order_user_status_created_idx", query_plan)
+        self.assertNotIn("USE TEMP B-TREE", query_plan)
+
+
+class OrderHistoryQueryCountTests(TestCase):
+    # User, the orders page with its payments, then the order items. Signed cookie
+    # sessions need no query.
+    QUERIES_PER_PAGE = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Shirts")
+        cls.products = [
+            Product.objects.create(
+                name=f"Shirt {product_number}", code=f"S-{product_number}", category=category
+            )
+            for product_number in range(5)
+        ]
+        cls.light_user = cls.create_user_with_orders("light", order_count=1, items_per_order=1)
+        cls.heavy_user = cls.create_user_with_orders("heavy", order_count=12, items_per_order=5)
+
+    @classmethod
+    def create_user_with_orders(cls, username, order_count, items_per_order):
+        user, shipping_address = create_shopper(username)
+
+        for _ in range(order_count):
+            order = Order.objects.create(
+                total_amount=Decimal(100), user=user, shipping_address=shipping_address
+            )
+            Payment.objects.create(amount=order.total_amount, order=order)
+
+            for product in cls.products[:items_per_order]:
+                OrderItem.objects.create(
+                    quantity=2, price_at_purchase=Decimal(50), order=order, product=product
+                )
+
+        return user
+
+    def test_queries_do_not_depend_on_orders_or_items(self):
+        for user, query_params, expected_orders_counter in (
+            (self.light_user, {}, 1),
+            (self.heavy_user, {}, 12),
+            (self.heavy_user, {"page_size": 5}, 5),
+            (self.heavy_user, {"status": OrderStatusChoices.PENDING}, 12),
+        ):
+            with self.subTest(username=user.username, query_params=query_params):
+                self.client.force_login(user)
+
+                with self.assertNumQueries(self.QUERIES_PER_PAGE):
+                    response = self.client.get(reverse("orders:order-history"), query_params)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()["results"]), expected_orders_counter)
+
+
+class CartSummaryCatalogImportTests(TestCase):
+    def get_product_record(self, code, price):
+        return {
+            "code": code,
+            "name": f"Shirt {code}",
+            "category_name": "Shirts",
+            "size": "M",
+            "material": "Cotton",
+            "color": "Red",
+            "stock": 10,
+            "price": Decimal(price),
+            "description": "",
+            "images": [],
+            "content_hash": f"{code}-{price}",
+        }
+
+    def setUp(self):
+        self.catalog_upserter = CatalogBulkUpserter(batch_size=100)
+        self.catalog_upserter.write_chunk(
+            [self.get_product_record("A", "100.00"), self.get_product_record("B", "50.00")]
+        )
+        self.cart = Cart.objects.create(
+            user=get_user_model().objects.create_user(
+                username="shopper", email="shopper@example.com", password="password"
+            )
+        )
+
+        for product_detail in ProductDetail.objects.all():
+            add_cart_item(self.cart, product_detail.id, quantity=2)
+
+    def assertCartSummary(self, item_count, subtotal):
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.item_count, self.cart.subtotal), (item_count, Decimal(subtotal)))
+
+    def test_bulk_repricing_refreshes_cart_summaries(self):
+        self.assertCartSummary(4, "300.00")
+
+        self.catalog_upserter.write_chunk([self.get_product_record("A", "120.00")])
+
+        self.assertCartSummary(4, "340.00")
+
+    def test_deactivated_products_leave_cart_summaries(self):
+        self.catalog_upserter.deactivate_products_missing_from({"A"})
+
+        self.assertCartSummary(2, "200.00")
+
+
+class CartViewTests(TestCase):
+    def setUp(self):
+        self.user = create_shopper("shopper")[0]
+        self.product_detail = create_product_detail("A", price="25.00")
+        self.client.force_login(self.user)
+
+    def test_mutations_keep_summary_in_step_with_lines(self):
+        item_url = reverse("orders:cart-item-detail", args=[self.product_detail.id])
+
+        for method, url, data, expected_summary in (
+            (
+                "post",
+                reverse("orders:cart-item-add"),
+                {"product_detail_id": self.product_detail.id, "quantity": 2},
+                (2, "50.00"),
+            ),
+            ("post", item_url, {"quantity": 3}, (3, "75.00")),
+            ("delete", item_url, None, (0, "0")),
+        ):
+            with self.subTest(method=method, url=url):
+                response = getattr(self.client, method)(url, data)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    (response.json()["item_count"], Decimal(response.json()["subtotal"])),
+                    (expected_summary[0], Decimal(expected_summary[1])),
+                )
+
+        self.assertFalse(CartItem.objects.exists())
+
+
+class SessionCartTests(TestCase):
+    def setUp(self):
+        self.product_details = [create_product_detail("A"), create_product_detail("B")]
+
+        for product_detail, quantity in zip(self.product_details, (2, 1)):
+            self.client.post(
+                reverse("orders:cart-item-add"),
+                {"product_detail_id": product_detail.id, "quantity": quantity},
+            )
+
+    def test_anonymous_cart_writes_no_session_rows(self):
+        self.assertEqual(
+            self.client.get(reverse("orders:cart-summary")).json()["item_count"], 3
+        )
+        self.assertFalse(Session.objects.exists())
+
+    def test_login_merges_session_cart_in_one_upsert(self):
+        user = create_shopper("shopper")[0]
+        cart = Cart.objects.create(user=user)
+        add_cart_item(cart, self.product_details[0].id, quantity=3)
+        request = RequestFactory().get("/")
+        request.session = self.client.session
+
+        with CaptureQueriesContext(connection) as captured_queries:
+            login(request, user)
+
+        cart_item_writes = [
+            query["sql"]
+            for query in captured_queries
+            if query["sql"].startswith(
+                (
+                    'INSERT INTO "orders_cartitem"',
+                    'UPDATE "orders_cartitem"',
+                    'DELETE FROM "orders_cartitem"',
+                )
+            )
+        ]
+        self.assertEqual(len(cart_item_writes), 1)
+        self.assertIn("ON CONFLICT", cart_item_writes[0])
+        self.assertEqual(
+            dict(CartItem.objects.values_list("product_detail_id", "quantity")),
+            {self.product_details[0].id: 5, self.product_details[1].id: 1},
+        )
+        cart.refresh_from_db()
+        self.assertEqual((cart.item_count, cart.subtotal), (6, Decimal("600.00")))
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        user, shipping_address = create_shopper("shopper")
+        self.product_details = [
+            create_product_detail("A", price="50.00"),
+            create_product_detail("B", price="30.00"),
+        ]
+        self.order = Order.objects.create(
+            total_amount=Decimal("130.00"),
+            status=OrderStatusChoices.COMPLETED,
+            user=user,
+            shipping_address=shipping_address,
+        )
+
+        for product_detail, quantity in zip(self.product_details, (2, 1)):
+            OrderItem.objects.create(
+                quantity=quantity,
+                price_at_purchase=product_detail.price,
+                order=self.order,
+                product_id=product_detail.product_id,
+                product_detail=product_detail,
+            )
+
+    def get_rollup_totals(self):
+        return (
+            sorted(
+                DailyProductSales.objects.values_list("product_id", "revenue", "units", "order_count")
+            ),
+            list(DailyCategorySales.objects.values_list("revenue", "units", "order_count")),
+        )
+
+    def test_completed_order_is_rolled_up_once(self):
+        call_command("rollup_sales", stdout=StringIO())
+        expected_rollup_totals = (
+            [
+                (self.product_details[0].product_id, Decimal("100.00"), 2, 1),
+                (self.product_details[1].product_id, Decimal("30.00"), 1, 1),
+            ],
+            [(Decimal("130.00"), 3, 1)],
+        )
+
+        self.assertEqual(self.get_rollup_totals(), expected_rollup_totals)
+        self.assertEqual(run_sales_rollup(), (0, 0))
+        self.assertEqual(self.get_rollup_totals(), expected_rollup_totals)
+
+    def test_canceled_order_is_backed_out(self):
+        self.assertEqual(run_sales_rollup(), (1, 0))
+
+        self.order.status = OrderStatusChoices.CANCELED
+        self.order.save()
+
+        self.assertEqual(run_sales_rollup(), (0, 1))
+        self.assertEqual(
+            self.get_rollup_totals(),
+            (
+                [
+                    (self.product_details[0].product_id, Decimal("0.00"), 0, 0),
+                    (self.product_details[1].product_id, Decimal("0.00"), 0, 0),
+                ],
+                [(Decimal("0.00"), 0, 0)],
+            ),
+        )
+        self.assertEqual(run_sales_rollup(), (0, 0))
+
+
+class OrderPlacementTests(TestCase):
+    def setUp(self):
+        user, self.shipping_address = create_shopper("shopper")
+        self.cart = Cart.objects.create(user=user)
+
+        # Flush the refresh queued by the catalog saves, so checkout queues its own.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product_details = [create_product_detail("A"), create_product_detail("B")]
+
+        for product_detail in self.product_details:
+            add_cart_item(self.cart, product_detail.id, quantity=2)
+
+    def test_checkout_places_order_and_takes_stock(self):
+        order = place_order(self.cart, self.shipping_address)
+
+        self.assertEqual(order.total_amount, Decimal("400.00"))
+        self.assertEqual(order.order_items.count(), 2)
+        self.assertEqual(
+            list(ProductDetail.objects.order_by("id").values_list("stock", flat=True)), [8, 8]
+        )
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_checkout_refuses_inactive_product(self):
+        Product.objects.filter(pk=self.product_details[1].product_id).update(is_active=False)
+
+        with self.assertRaises(OrderPlacementError):
+            place_order(self.cart, self.shipping_address)
+
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(CartItem.objects.count(), 2)
+        self.assertEqual(
+            list(ProductDetail.objects.order_by("id").values_list("stock", flat=True)), [10, 10]
+        )
+
+    def test_checkout_keeps_facet_index(self):
+        facet_index_version = get_facet_index_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(self.cart, self.shipping_address)
+
+        self.assertEqual(get_facet_index_version(), facet_index_version)
+
+
+class StockReservationTransactionTests(TransactionTestCase):
+    # Real commits, so threads see each other's writes as concurrent checkouts would.
+
+    def run_in_threads(self, thread_target, threads_counter):
+        def run_and_close_connection():
+            try:
+                thread_target()
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run_and_close_connection) for _ in range(threads_counter)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    def get_stocks(self, product_details):
+        return [
+            ProductDetail.objects.get(pk=product_detail.pk).stock for product_detail in product_details
+        ]
+
+    def test_short_item_rolls_back_whole_reservation(self):
+        product_details = [create_product_detail("A", stock=5), create_product_detail("B", stock=1)]
+
+        with self.assertRaises(InsufficientStockError) as error_context:
+            reserve_stock([(product_details[0].id, 2), (product_details[1].id, 2)])
+
+        self.assertEqual(error_context.exception.product_detail_ids, [product_details[1].id])
+        self.assertEqual(self.get_stocks(product_details), [5, 1])
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_concurrent_reservations_never_oversell(self):
+        product_detail = create_product_detail("A", stock=10)
+
+        def reserve_until_sold_out():
+            while True:
+                try:
+                    reserve_stock([(product_detail.id, 1)])
+                except InsufficientStockError:
+                    return
+                except OperationalError:
+                    # SQLite refuses a write while another thread holds the lock.
+                    continue
+
+        self.run_in_threads(reserve_until_sold_out, threads_counter=8)
+
+        self.assertEqual(self.get_stocks([product_detail]), [0])
+        self.assertEqual(
+            StockReservationItem.objects.filter(product_detail=product_detail).aggregate(
+                reserved_quantity=Sum("quantity")
+            )["reserved_quantity"],
+            10,
+        )
+
+    def test_sweepers_release_expired_holds_once(self):
+        product_detail = create_product_detail("A", stock=10)
+
+        for _ in range(3):
+            reserve_stock([(product_detail.id, 2)], ttl=timedelta(0))
+
+        committed_reservation = reserve_stock([(product_detail.id, 1)])
+        commit_stock_reservation(committed_reservation)
+
+        def sweep_until_done():
+            while True:
+                try:
+                    if not release_expired_stock_reservations():
+                        return
+                except OperationalError:
+                    continue
+
+        self.run_in_threads(sweep_until_done, threads_counter=4)
+
+        self.assertEqual(self.get_stocks([product_detail]), [9])
+        self.assertEqual(
+            StockReservation.objects.filter(status=StockReservationStatusChoices.RELEASED).count(), 3
+        )
+        self.assertEqual(
+            StockReservation.objects.get(pk=committed_reservation.pk).status,
+            StockReservationStatusChoices.COMMITTED,
+        )
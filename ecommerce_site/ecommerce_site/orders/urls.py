@@ -0,0 +1,18 @@
+from django.urls import path
+
+from . import views
+
+app_name = "orders"
+
+urlpatterns = [
+    path("cart/", views.cart_detail, name="cart-detail"),
+    path("cart/summary/", views.cart_summary, name="cart-summary"),
+    path("cart/items/", views.cart_item_add, name="cart-item-add"),
+    path("cart/items/<int:product_detail_id>/", views.cart_item_detail, name="cart-item-detail"),
+    path("orders/", views.order_history, name="order-history"),
+    path(
+        "payments/<int:payment_id>/callback/",
+        views.payment_status_callback,
+        name="payment-status-callback",
+    ),
+]
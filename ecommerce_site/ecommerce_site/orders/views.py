@@ -0,0 +1,193 @@
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import (
+    require_GET, require_http_methods, require_POST
+)
+
+from products.pagination import (
+    InvalidPageRequest,
+    paginate_by_created
+)
+
+from .carts import (
+    CartItemError,
+    add_cart_item,
+    aget_cart_summary,
+    get_cart_contents,
+    remove_cart_item,
+    set_cart_item_quantity
+)
+from .choices import OrderStatusChoices
+from .history import (
+    get_order_history_queryset,
+    serialize_order
+)
+from .models import (
+    Cart,
+    Payment
+)
+from .payments import (
+    PAYMENT_SIGNATURE_HEADER,
+    SETTLED_PAYMENT_STATUSES,
+    PaymentCallbackError,
+    asettle_payment,
+    is_payment_signature_valid
+)
+from .session_carts import (
+    add_session_cart_item,
+    get_session_cart_contents,
+    get_session_cart_summary,
+    remove_session_cart_item,
+    set_session_cart_item_quantity
+)
+
+
+def login_required_json(view):
+    @wraps(view)
+    def wrapped_view(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+
+        return view(request, *args, **kwargs)
+
+    return wrapped_view
+
+
+def get_integer_field(form_data, field_name, default=None):
+    try:
+        return int(form_data.get(field_name, default))
+    except (TypeError, ValueError):
+        raise CartItemError(f"{field_name} must be an integer.")
+
+
+async def aget_request_cart_summary(request, user):
+    if not user.is_authenticated:
+        return await sync_to_async(get_session_cart_summary)(request.session)
+
+    return await aget_cart_summary(user)
+
+
+# Anonymous visitors get a session cart, so browsing never writes Cart rows.
+@require_GET
+def cart_detail(request):
+    if not request.user.is_authenticated:
+        return JsonResponse(get_session_cart_contents(request.session))
+
+    cart = Cart.objects.filter(user=request.user).first()
+
+    if cart is None:
+        return JsonResponse({"item_count": 0, "subtotal": "0", "items": []})
+
+    return JsonResponse(get_cart_contents(cart))
+
+
+# The cart summary and mutations are async views. Mutations go through
+# sync_to_async: the session is loaded and saved synchronously, and a cart line
+# change and its summary refresh must share one transaction, which the async ORM
+# cannot open.
+@require_GET
+async def cart_summary(request):
+    return JsonResponse(await aget_request_cart_summary(request, await request.auser()))
+
+
+@require_POST
+async def cart_item_add(request):
+    user = await request.auser()
+
+    try:
+        product_detail_id = get_integer_field(request.POST, "product_detail_id")
+        quantity = get_integer_field(request.POST, "quantity", default=1)
+
+        if user.is_authenticated:
+            cart, _ = await Cart.objects.aget_or_create(user=user)
+            await sync_to_async(add_cart_item)(cart, product_detail_id, quantity)
+        else:
+            await sync_to_async(add_session_cart_item)(request.session, product_detail_id, quantity)
+    except CartItemError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    return JsonResponse(await aget_request_cart_summary(request, user))
+
+
+@require_http_methods(["POST", "DELETE"])
+async def cart_item_detail(request, product_detail_id):
+    user = await request.auser()
+
+    try:
+        if request.method == "DELETE":
+            quantity = 0
+        else:
+            quantity = get_integer_field(request.POST, "quantity")
+
+        if not user.is_authenticated:
+            if quantity:
+                await sync_to_async(set_session_cart_item_quantity)(
+                    request.session, product_detail_id, quantity
+                )
+            else:
+                await sync_to_async(remove_session_cart_item)(request.session, product_detail_id)
+        else:
+            cart, _ = await Cart.objects.aget_or_create(user=user)
+
+            if quantity:
+                await sync_to_async(set_cart_item_quantity)(cart, product_detail_id, quantity)
+            else:
+                await sync_to_async(remove_cart_item)(cart, product_detail_id)
+    except CartItemError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    return JsonResponse(await aget_request_cart_summary(request, user))
+
+
+@require_GET
+@login_required_json
+def order_history(request):
+    orders = get_order_history_queryset(request.user)
+
+    if request.GET.get("status"):
+        if request.GET["status"] not in OrderStatusChoices.values:
+            return JsonResponse({"error": "Unknown order status."}, status=400)
+
+        orders = orders.filter(status=request.GET["status"])
+
+    try:
+        orders, next_cursor = paginate_by_created(orders, request.GET)
+    except InvalidPageRequest as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    return JsonResponse({
+        "results": [serialize_order(order) for order in orders],
+        "next_cursor": next_cursor,
+    })
+
+
+# The payment provider authenticates with a body signature rather than a session,
+# so the callback is exempt from CSRF checks.
+@csrf_exempt
+@require_POST
+async def payment_status_callback(request, payment_id):
+    if not is_payment_signature_valid(request.body, request.headers.get(PAYMENT_SIGNATURE_HEADER)):
+        return JsonResponse({"error": "Invalid payment signature."}, status=403)
+
+    try:
+        payment_status = json.loads(request.body)["status"]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({"error": "Expected a JSON body with a status."}, status=400)
+
+    if payment_status not in SETTLED_PAYMENT_STATUSES:
+        return JsonResponse(
+            {"error": f"status must be one of {', '.join(SETTLED_PAYMENT_STATUSES)}."}, status=400
+        )
+
+    try:
+        await asettle_payment(payment_id, payment_status)
+    except Payment.DoesNotExist:
+        return JsonResponse({"error": f"Payment {payment_id} does not exist."}, status=404)
+    except PaymentCallbackError as error:
+        return JsonResponse({"error": str(error)}, status=409)
+
+    return JsonResponse({"id": payment_id, "status": payment_status})
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import (
+    connection, connections
+)
+
+
+@contextmanager
+def throwaway_sqlite_database(database_path):
+    """
+    Points the default connection at a freshly migrated SQLite file at
+    database_path for the duration of a benchmark, then deletes it.
+
+    The file is created as Django's test database, so the configured database is
+    never written to. Anything but SQLite is refused, as is a connection that does
+    not end up on database_path. DEBUG is turned off because with it every query
+    is kept in connection.queries.
+    """
+    if connection.vendor != "sqlite":
+        raise CommandError("Benchmarks run on a throwaway SQLite file and need the SQLite backend.")
+
+    settings.DEBUG = False
+    original_database_name = connection.settings_dict["NAME"]
+    connection.settings_dict["TEST"]["NAME"] = str(database_path)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    try:
+        if connection.settings_dict["NAME"] != str(database_path):
+            raise CommandError(
+                f"Refusing to benchmark against {connection.settings_dict['NAME']!r}, "
+                f"which is not the throwaway database {str(database_path)!r}."
+            )
+
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(original_database_name, verbosity=0)
@@ -0,0 +1,95 @@
+import threading
+import uuid
+
+from django.core.cache import caches
+
+CATALOG_CACHE_ALIAS = "catalog"
+CATALOG_CACHE_PREFIX = "products:catalog"
+
+_cache_statistics_lock = threading.Lock()
+_cache_statistics = {"hits": 0, "misses": 0}
+
+
+def get_catalog_cache():
+    return caches[CATALOG_CACHE_ALIAS]
+
+
+def get_version_key(scope, object_id):
+    return f"{CATALOG_CACHE_PREFIX}:version:{scope}:{object_id}"
+
+
+def get_version(scope, object_id):
+    catalog_cache = get_catalog_cache()
+    version_key = get_version_key(scope, object_id)
+    version = catalog_cache.get(version_key)
+
+    # add() keeps the first version when two processes initialise the key at once.
+    if version is None:
+        catalog_cache.add(version_key, uuid.uuid4().hex, timeout=None)
+        version = catalog_cache.get(version_key)
+
+    return version
+
+
+async def aget_version(scope, object_id):
+    catalog_cache = get_catalog_cache()
+    version_key = get_version_key(scope, object_id)
+    version = await catalog_cache.aget(version_key)
+
+    if version is None:
+        await catalog_cache.aadd(version_key, uuid.uuid4().hex, timeout=None)
+        version = await catalog_cache.aget(version_key)
+
+    return version
+
+
+def bump_versions(scope, object_ids):
+    """
+    Gives each object a fresh random version in one set_many call. Entries cached
+    under the old version are never read again and simply expire.
+    """
+    get_catalog_cache().set_many(
+        {get_version_key(scope, object_id): uuid.uuid4().hex for object_id in object_ids},
+        timeout=None,
+    )
+
+
+def record_cache_lookup(statistic_name):
+    with _cache_statistics_lock:
+        _cache_statistics[statistic_name] += 1
+
+
+def get_cache_statistics():
+    with _cache_statistics_lock:
+        return dict(_cache_statistics)
+
+
+def get_payload_key(scope, object_id, version, payload_name):
+    return f"{CATALOG_CACHE_PREFIX}:{scope}:{object_id}:{version}:{payload_name}"
+
+
+async def aget_or_build(scope, object_id, payload_name, abuild_payload, timeout=None):
+    """
+    Returns the cached payload for an object under its current version, awaiting
+    abuild_payload and caching its result on a miss. scope is "product" or
+    "category".
+    """
+    catalog_cache = get_catalog_cache()
+    payload_key = get_payload_key(
+        scope, object_id, await aget_version(scope, object_id), payload_name
+    )
+    cached_payload = await catalog_cache.aget(payload_key)
+
+    if cached_payload is not None:
+        record_cache_lookup("hits")
+        return cached_payload
+
+    record_cache_lookup("misses")
+    payload = await abuild_payload()
+
+    if timeout is None:
+        await catalog_cache.aset(payload_key, payload)
+    else:
+        await catalog_cache.aset(payload_key, payload, timeout=timeout)
+
+    return payload
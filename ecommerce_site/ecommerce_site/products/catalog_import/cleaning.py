@@ -0,0 +1,222 @@
+import hashlib
+import json
+import re
+from decimal import Decimal, InvalidOperation
+
+from .mappings import (
+    CATEGORY_MAPPING,
+    DEFAULT_SIZE,
+    DEFAULT_STOCK,
+    PRODUCT_MATERIALS
+)
+
+
+class InvalidPriceError(ValueError):
+    pass
+
+
+class KeywordClassifier:
+    """
+    Finds the highest-priority keyword contained in the upper-cased text, with the
+    same result as scanning the keywords in order and returning the first substring
+    hit. Keywords are expected in upper case.
+
+    The keywords are compiled once into a trie-shaped regex, so each text position
+    costs one trie walk rather than one substring test per keyword.
+    Because a trie walk is deterministic, the regex yields the longest keyword
+    starting at each position; the best priority among that keyword and its
+    keyword prefixes is precomputed, which keeps first-match semantics exact.
+    """
+
+    LINEAR_SCAN_MAX_KEYWORDS = 16
+
+    def __init__(self, keyword_values, default_value):
+        self.default_value = default_value
+        self.keyword_priorities = {}
+        self.values_by_priority = []
+
+        for keyword, keyword_value in keyword_values:
+            if keyword not in self.keyword_priorities:
+                self.keyword_priorities[keyword] = len(self.values_by_priority)
+                self.values_by_priority.append(keyword_value)
+
+        self.best_priority_by_match = {
+            keyword: min(
+                priority
+                for prefix_keyword, priority in self.keyword_priorities.items()
+                if keyword.startswith(prefix_keyword)
+            )
+            for keyword in self.keyword_priorities
+        }
+
+        self.keyword_pattern = re.compile(self.build_trie_pattern(self.keyword_priorities))
+
+    @classmethod
+    def build_trie_pattern(cls, keywords):
+        keyword_trie = {}
+
+        for keyword in keywords:
+            trie_node = keyword_trie
+
+            for character in keyword:
+                trie_node = trie_node.setdefault(character, {})
+
+            trie_node[None] = True
+
+        return cls.build_trie_node_pattern(keyword_trie)
+
+    @classmethod
+    def build_trie_node_pattern(cls, trie_node):
+        branch_patterns = [
+            re.escape(character) + cls.build_trie_node_pattern(child_node)
+            for character, child_node in sorted(
+                (character, child_node)
+                for character, child_node in trie_node.items()
+                if character is not None
+            )
+        ]
+
+        if not branch_patterns:
+            return ""
+
+        node_pattern = (
+            branch_patterns[0] if len(branch_patterns) == 1
+            else f"(?:{'|'.join(branch_patterns)})"
+        )
+
+        # Greedy optional suffix: prefer the longer keyword, fall back to this one.
+        if None in trie_node:
+            node_pattern = f"(?:{node_pattern})?"
+
+        return node_pattern
+
+    def classify(self, text):
+        text = text.upper()
+
+        # For a handful of keywords, plain substring checks beat the regex machinery.
+        if len(self.keyword_priorities) <= self.LINEAR_SCAN_MAX_KEYWORDS:
+            return next(
+                (
+                    self.values_by_priority[priority]
+                    for keyword, priority in self.keyword_priorities.items()
+                    if keyword in text
+                ),
+                self.default_value
+            )
+
+        best_priority = None
+
+        keyword_match = self.keyword_pattern.search(text)
+
+        while keyword_match is not None:
+            match_priority = self.best_priority_by_match[keyword_match.group()]
+
+            if best_priority is None or match_priority < best_priority:
+                best_priority = match_priority
+
+                if best_priority == 0:
+                    break
+
+            # Keywords may overlap, so resume from the next position, not the match end.
+            keyword_match = self.keyword_pattern.search(text, keyword_match.start() + 1)
+
+        if best_priority is None:
+            return self.default_value
+
+        return self.values_by_priority[best_priority]
+
+
+CATEGORY_CLASSIFIER = KeywordClassifier(
+    (
+        (category_identifier, category_name)
+        for category_identifier, category_name in CATEGORY_MAPPING.items()
+        if category_identifier != "OTHERS"
+    ),
+    CATEGORY_MAPPING["OTHERS"]
+)
+
+MATERIAL_CLASSIFIER = KeywordClassifier(
+    ((product_material.upper(), product_material) for product_material in PRODUCT_MATERIALS),
+    "N/A"
+)
+
+
+def get_category_from_product_name(product_name):
+    return CATEGORY_CLASSIFIER.classify(product_name)
+
+
+def get_product_material(product_details):
+    return MATERIAL_CLASSIFIER.classify(" ".join(product_details))
+
+
+def get_product_content_hash(product_record):
+    serialised_product_record = json.dumps(
+        product_record, sort_keys=True, separators=(",", ":"), default=str
+    )
+
+    return hashlib.sha256(serialised_product_record.encode("utf-8")).hexdigest()
+
+
+def clean_product_record(product_json_record):
+    price_string = (
+        product_json_record.get("product_price", "0.00")
+        .replace("PKR\xa0", "")
+        .replace("PKR ", "")
+        .replace(",", "")
+        .strip()
+    )
+
+    try:
+        product_price = Decimal(price_string)
+    except InvalidOperation:
+        raise InvalidPriceError(
+            f"Skipping '{product_json_record.get('product_name')}': "
+            f"Invalid price format '{price_string}'"
+        )
+
+    product_name = product_json_record.get("product_name").strip()
+    product_info_list = product_json_record.get("product_info", [])
+
+    product_record = {
+        "code": product_json_record.get("product_code", product_name),
+        "name": product_name,
+        "category_name": get_category_from_product_name(product_name),
+        "size": DEFAULT_SIZE,
+        "material": get_product_material(product_info_list),
+        "color": product_info_list[0] if product_info_list else "N/A",
+        "stock": DEFAULT_STOCK,
+        "price": product_price,
+        "description": "\n".join(product_info_list),
+        "images": [
+            (image_source_url, f"{product_name} - Image {image_index + 1}")
+            for image_index, image_source_url in enumerate(
+                product_json_record.get("product_images", [])
+            )
+        ],
+    }
+    product_record["content_hash"] = get_product_content_hash(product_record)
+
+    return product_record
+
+
+def clean_product_chunk(product_json_records):
+    """
+    Cleans a shard of raw feed records. Runs inside worker processes, so failures are
+    returned as (style, message) pairs for the parent to print instead of being raised.
+    """
+    product_records, cleaning_failures = [], []
+
+    for product_json_record in product_json_records:
+        try:
+            product_records.append(clean_product_record(product_json_record))
+        except InvalidPriceError as error:
+            cleaning_failures.append(("WARNING", str(error)))
+        except Exception as error:
+            cleaning_failures.append((
+                "ERROR",
+                f"Failed to process product: "
+                f"{product_json_record.get('product_name', 'N/A')}. "
+                f"Error: {error}"
+            ))
+
+    return product_records, cleaning_failures
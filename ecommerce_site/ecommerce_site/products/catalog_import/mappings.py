@@ -12,3 +12,5 @@ CATEGORY_MAPPING = {
 DEFAULT_SIZE = "N/A"
 DEFAULT_STOCK = 0
 PRODUCT_MATERIALS = ["Cotton", "Blended"]
+DEFAULT_BATCH_SIZE = 500
+STREAM_READ_SIZE = 64 * 1024
@@ -0,0 +1,143 @@
+import itertools
+import json
+
+JSON_WHITESPACE = " \t\n\r"
+NUMBER_START_CHARACTERS = "-0123456789"
+# Characters that can continue a number that raw_decode has already accepted.
+NUMBER_CONTINUATION_CHARACTERS = "0123456789.eE+-"
+
+
+class JSONArrayStreamReader:
+    """
+    Yields the items of a top-level JSON array one at a time, reading the file in
+    fixed-size pieces so memory stays flat no matter how large the array is.
+    """
+
+    def __init__(self, json_file, read_size):
+        self.json_file = json_file
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.at_eof = False
+
+    def read_more(self):
+        if self.at_eof:
+            return False
+
+        next_piece = self.json_file.read(self.read_size)
+
+        if not next_piece:
+            self.at_eof = True
+            return False
+
+        self.buffer = self.buffer[self.position:] + next_piece
+        self.position = 0
+
+        return True
+
+    def next_significant_character(self):
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in JSON_WHITESPACE
+            ):
+                self.position += 1
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self.read_more():
+                raise json.JSONDecodeError(
+                    "Unexpected end of file", self.buffer, self.position
+                )
+
+    def expect_character(self, expected_characters):
+        character = self.next_significant_character()
+
+        if character not in expected_characters:
+            raise json.JSONDecodeError(
+                f"Expected one of {expected_characters!r}", self.buffer, self.position
+            )
+
+        self.position += 1
+
+        return character
+
+    def decode_item(self):
+        self.next_significant_character()
+
+        while True:
+            try:
+                item, item_end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.read_more():
+                    continue
+                raise
+
+            # A number cut by the buffer edge decodes as a shorter number ("1." as 1),
+            # so it only counts once a character that cannot continue it, or EOF,
+            # follows it.
+            if (
+                self.buffer[self.position] in NUMBER_START_CHARACTERS
+                and (
+                    item_end == len(self.buffer)
+                    or self.buffer[item_end] in NUMBER_CONTINUATION_CHARACTERS
+                )
+                and self.read_more()
+            ):
+                continue
+
+            self.position = item_end
+
+            return item
+
+    def __iter__(self):
+        self.expect_character("[")
+
+        if self.next_significant_character() == "]":
+            self.position += 1
+            return
+
+        while True:
+            yield self.decode_item()
+
+            if self.expect_character(",]") == "]":
+                return
+
+
+def iter_json_lines(json_file):
+    for line_number, line in enumerate(json_file, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            raise json.JSONDecodeError(
+                f"Line {line_number}: {error.msg}", error.doc, error.pos
+            )
+
+
+def iter_product_records(json_file, read_size):
+    """
+    Streams product records from either a JSON array or a JSON Lines file, choosing
+    the format from the first non-whitespace character.
+    """
+    first_character = json_file.read(1)
+
+    while first_character and first_character in JSON_WHITESPACE:
+        first_character = json_file.read(1)
+
+    if not first_character:
+        raise json.JSONDecodeError("Expecting value", "", 0)
+
+    if first_character == "[":
+        array_reader = JSONArrayStreamReader(json_file, read_size)
+        array_reader.buffer = first_character
+
+        yield from array_reader
+    else:
+        yield from iter_json_lines(
+            itertools.chain([first_character + json_file.readline()], json_file)
+        )
@@ -0,0 +1,84 @@
+import json
+import random
+
+from .mappings import CATEGORY_MAPPING
+
+SYNTHETIC_COLORS = [
+    "Black", "White", "Brown", "Fawn", "Grey", "Navy Blue", "Green-White", "Pink", "Maroon", "Beige",
+]
+SYNTHETIC_MATERIALS = ["Cotton", "Blended", "Lawn", "Wash & Wear", "Khaddar", "Leather"]
+SYNTHETIC_GARMENTS = [
+    category_identifier
+    for category_identifier in CATEGORY_MAPPING
+    if category_identifier != "OTHERS"
+] + ["TROUSER", "SHAWL", "MODAL TRUNK"]
+SYNTHETIC_STYLES = ["Formal", "Semi-Formal", "Casual", "Plain", "Online Edition"]
+SYNTHETIC_COLLECTIONS = [
+    "Festive Collection '23", "Festive Collection-II '23", "Spring Summer Collection '23",
+    "Special Edition Collection",
+]
+SYNTHETIC_FITS = ["Regular Fit", "Smart Fit", "Slim Fit"]
+SYNTHETIC_DISCLAIMER = (
+    "Due to the photographic lighting & different screen calibrations, the colors of the "
+    "original product may slightly vary from the picture"
+)
+SYNTHETIC_IMAGE_URL = (
+    "https://www.junaidjamshed.com/media/catalog/product/{0}/{1}/{2}_{3}_.jpg"
+    "?quality=80&bg-color=255,255,255&fit=bounds&height=110&width=86"
+)
+
+
+def generate_synthetic_product(record_number, random_generator):
+    product_color = random_generator.choice(SYNTHETIC_COLORS)
+    product_material = random_generator.choice(SYNTHETIC_MATERIALS)
+    product_garment = random_generator.choice(SYNTHETIC_GARMENTS)
+    article_number = f"{record_number:06d}"
+
+    product_info = [
+        product_color,
+        random_generator.choice(SYNTHETIC_STYLES),
+        f"{random_generator.choice(SYNTHETIC_STYLES)} {product_garment.title()}",
+        random_generator.choice(SYNTHETIC_COLLECTIONS),
+        product_material,
+        random_generator.choice(SYNTHETIC_FITS),
+        SYNTHETIC_DISCLAIMER,
+    ][:random_generator.randint(3, 7)]
+
+    return {
+        "product_name": (
+            f"{product_color.upper()} {product_material.upper()} {product_garment} "
+            f"| JJK-S-{article_number}"
+        ),
+        "product_price": f"PKR\xa0{random_generator.randint(990, 24990):,}.00",
+        "product_images": [
+            SYNTHETIC_IMAGE_URL.format(article_number[0], article_number[1], article_number, image_number)
+            for image_number in range(1, random_generator.randint(1, 7) + 1)
+        ],
+        "product_info": product_info,
+        "product_code": f"J-SYN{article_number}",
+    }
+
+
+def write_synthetic_catalog(output_file, record_count, seed=0, json_lines=False):
+    """
+    Writes a clothes.json-shaped feed one record at a time, so even million-record
+    feeds are generated with flat memory.
+    """
+    random_generator = random.Random(seed)
+
+    if not json_lines:
+        output_file.write("[\n")
+
+    for record_number in range(record_count):
+        serialised_product = json.dumps(
+            generate_synthetic_product(record_number, random_generator), ensure_ascii=False
+        )
+
+        if json_lines:
+            output_file.write(f"{serialised_product}\n")
+        else:
+            separator = ",\n" if record_number < record_count - 1 else "\n"
+            output_file.write(f"{serialised_product}{separator}")
+
+    if not json_lines:
+        output_file.write("]\n")
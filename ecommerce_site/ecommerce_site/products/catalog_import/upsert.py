@@ -0,0 +1,226 @@
+from django.db import transaction
+from django.utils import timezone
+
+from orders.carts import refresh_product_cart_summaries
+from products.models import (
+    Category,
+    Product,
+    ProductDetail,
+    ProductImage
+)
+from products.refresh import refresh_product_projections
+
+
+class CatalogBulkUpserter:
+    """
+    Writes cleaned product records in chunks, using a fixed number of queries per
+    chunk instead of several queries per product.
+    """
+
+    PRODUCT_UPDATE_FIELDS = ["name", "category", "content_hash", "is_active", "modified"]
+    DETAIL_UPDATE_FIELDS = ["size", "material", "color", "stock", "price", "description"]
+    IMAGE_UPDATE_FIELDS = ["product", "alt_text", "modified"]
+
+    def __init__(self, batch_size, delta=False):
+        self.batch_size = batch_size
+        self.delta = delta
+        self.categories_by_name = {}
+        self.created_category_names = []
+        self.unchanged_products_counter = 0
+
+    def load_categories(self):
+        for category in Category.objects.order_by("-id"):
+            self.categories_by_name[category.name] = category
+
+    def get_or_create_categories(self, category_names):
+        missing_category_names = [
+            category_name
+            for category_name in dict.fromkeys(category_names)
+            if category_name not in self.categories_by_name
+        ]
+
+        if missing_category_names:
+            Category.objects.bulk_create(
+                [Category(name=category_name) for category_name in missing_category_names]
+            )
+
+            for category in Category.objects.filter(name__in=missing_category_names):
+                self.categories_by_name.setdefault(category.name, category)
+
+            self.created_category_names.extend(missing_category_names)
+
+    def upsert_products(self, product_records):
+        Product.objects.bulk_create(
+            [
+                Product(
+                    code=product_record["code"],
+                    name=product_record["name"],
+                    category=self.categories_by_name[product_record["category_name"]],
+                    content_hash=product_record["content_hash"],
+                    is_active=True,
+                )
+                for product_record in product_records
+            ],
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=["code"],
+            update_fields=self.PRODUCT_UPDATE_FIELDS,
+        )
+
+        return dict(
+            Product.objects.filter(
+                code__in=[product_record["code"] for product_record in product_records]
+            ).values_list("code", "id")
+        )
+
+    def upsert_product_details(self, product_records, product_ids_by_code):
+        existing_details_by_product_id = {}
+
+        for product_detail in ProductDetail.objects.filter(
+            product_id__in=product_ids_by_code.values()
+        ).order_by("-id"):
+            existing_details_by_product_id[product_detail.product_id] = product_detail
+
+        details_to_create, details_to_update = [], []
+
+        for product_record in product_records:
+            product_id = product_ids_by_code[product_record["code"]]
+            product_detail = existing_details_by_product_id.get(product_id)
+
+            if product_detail is None:
+                details_to_create.append(
+                    ProductDetail(
+                        product_id=product_id,
+                        **{
+                            field_name: product_record[field_name]
+                            for field_name in self.DETAIL_UPDATE_FIELDS
+                        }
+                    )
+                )
+                continue
+
+            # bulk_update is costly per row, so rows that already match are left alone.
+            if any(
+                getattr(product_detail, field_name) != product_record[field_name]
+                for field_name in self.DETAIL_UPDATE_FIELDS
+            ):
+                for field_name in self.DETAIL_UPDATE_FIELDS:
+                    setattr(product_detail, field_name, product_record[field_name])
+
+                details_to_update.append(product_detail)
+
+        ProductDetail.objects.bulk_create(details_to_create, batch_size=self.batch_size)
+        ProductDetail.objects.bulk_update(
+            details_to_update, self.DETAIL_UPDATE_FIELDS, batch_size=self.batch_size
+        )
+
+    def upsert_product_images(self, product_records, product_ids_by_code):
+        image_values_by_url_hash = {}
+
+        for product_record in product_records:
+            for image_url, image_alt_text in product_record["images"]:
+                image_values_by_url_hash[ProductImage.get_url_hash(image_url)] = (
+                    image_url,
+                    product_ids_by_code[product_record["code"]],
+                    image_alt_text,
+                )
+
+        existing_images_by_url_hash = ProductImage.objects.in_bulk(
+            image_values_by_url_hash.keys(), field_name="url_hash"
+        )
+
+        images_to_create, images_to_update = [], []
+        modified_at = timezone.now()
+
+        for image_url_hash, (image_url, product_id, image_alt_text) in image_values_by_url_hash.items():
+            product_image = existing_images_by_url_hash.get(image_url_hash)
+
+            if product_image is None:
+                images_to_create.append(
+                    ProductImage(
+                        url=image_url,
+                        url_hash=image_url_hash,
+                        product_id=product_id,
+                        alt_text=image_alt_text,
+                    )
+                )
+            elif (product_image.product_id, product_image.alt_text) != (product_id, image_alt_text):
+                product_image.product_id = product_id
+                product_image.alt_text = image_alt_text
+                product_image.modified = modified_at
+                images_to_update.append(product_image)
+
+        ProductImage.objects.bulk_create(images_to_create, batch_size=self.batch_size)
+        ProductImage.objects.bulk_update(
+            images_to_update, self.IMAGE_UPDATE_FIELDS, batch_size=self.batch_size
+        )
+
+    def exclude_unchanged_products(self, product_records):
+        stored_product_hashes = set(
+            Product.objects.filter(
+                code__in=[product_record["code"] for product_record in product_records],
+                is_active=True,
+            ).values_list("code", "content_hash")
+        )
+
+        changed_product_records = [
+            product_record
+            for product_record in product_records
+            if (product_record["code"], product_record["content_hash"])
+               not in stored_product_hashes
+        ]
+        self.unchanged_products_counter += len(product_records) - len(changed_product_records)
+
+        return changed_product_records
+
+    def deactivate_products_missing_from(self, seen_product_codes):
+        missing_product_ids = [
+            product_id
+            for product_id, product_code in Product.objects.filter(
+                is_active=True
+            ).values_list("id", "code").iterator(chunk_size=self.batch_size)
+            if product_code not in seen_product_codes
+        ]
+
+        for batch_start in range(0, len(missing_product_ids), self.batch_size):
+            missing_product_ids_batch = missing_product_ids[batch_start:batch_start + self.batch_size]
+
+            with transaction.atomic():
+                Product.objects.filter(
+                    id__in=missing_product_ids_batch
+                ).update(is_active=False, modified=timezone.now())
+                refresh_product_projections(missing_product_ids_batch)
+                refresh_product_cart_summaries(missing_product_ids_batch)
+
+        return len(missing_product_ids)
+
+    def write_chunk(self, product_records):
+        """
+        Writes a chunk of cleaned records and returns how many products it wrote.
+        Unchanged products skipped in delta mode are not written; they are counted
+        in unchanged_products_counter instead.
+        """
+        # Later records win, exactly as they would with row-by-row update_or_create.
+        unique_product_records = list(
+            {product_record["code"]: product_record for product_record in product_records}.values()
+        )
+
+        if self.delta:
+            unique_product_records = self.exclude_unchanged_products(unique_product_records)
+
+            if not unique_product_records:
+                return 0
+
+        with transaction.atomic():
+            self.get_or_create_categories(
+                product_record["category_name"] for product_record in unique_product_records
+            )
+            product_ids_by_code = self.upsert_products(unique_product_records)
+            self.upsert_product_details(unique_product_records, product_ids_by_code)
+            self.upsert_product_images(unique_product_records, product_ids_by_code)
+            # Bulk writes bypass model signals, so listings and search are refreshed here.
+            refresh_product_projections(product_ids_by_code.values())
+            # Cached cart totals too, since details may have been repriced.
+            refresh_product_cart_summaries(product_ids_by_code.values())
+
+        return len(unique_product_records)
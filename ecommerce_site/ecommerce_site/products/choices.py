@@ -15,3 +15,9 @@ class RatingChoices(models.IntegerChoices):
     THREE = 3, "3 Stars"
     FOUR = 4, "4 Stars"
     FIVE = 5, "5 Stars"
+
+
+class ImageProcessingStatusChoices(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    READY = "READY", "Ready"
+    FAILED = "FAILED", "Failed"
@@ -0,0 +1,106 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import (
+    Count, Max
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import ProductListing
+
+
+def get_etag(*validator_parts):
+    return f'"{hashlib.sha256("|".join(map(str, validator_parts)).encode("utf-8")).hexdigest()[:32]}"'
+
+
+async def aget_product_validators(request, product_id):
+    """
+    Returns (etag, last_modified) of a product's catalog payloads, or None when
+    the product has no listing row.
+
+    ProductDetail and Review carry no timestamps of their own, but every change to
+    a product's details, stock, images or reviews refreshes its listing row, so
+    the listing's refreshed time together with Product.modified covers all of
+    them. Both come from one primary key lookup.
+    """
+    product_timestamps = await (
+        ProductListing.objects.filter(product_id=product_id)
+        .values_list("refreshed", "product__modified")
+        .afirst()
+    )
+
+    if product_timestamps is None:
+        return None
+
+    last_modified = max(product_timestamps)
+
+    return get_etag(request.path, last_modified.isoformat()), last_modified
+
+
+async def aget_category_listing_validators(request, category_id):
+    """
+    Returns (etag, None) for one page of a category listing.
+
+    The tag is built from the newest listing refresh and the number of listing
+    rows in the category, both read from the (category, refreshed) index, plus
+    the path and page parameters. Deleting a product lowers the count but cannot move the
+    newest timestamp forward, so no Last-Modified is sent; an If-Modified-Since
+    check would miss deletions.
+    """
+    category_state = await ProductListing.objects.filter(category_id=category_id).aaggregate(
+        last_refreshed=Max("refreshed"), listing_count=Count("pk")
+    )
+
+    if category_state["last_refreshed"] is None:
+        return None
+
+    return (
+        get_etag(
+            request.path,
+            category_state["last_refreshed"].isoformat(),
+            category_state["listing_count"],
+            request.GET.get("page_size", ""),
+            request.GET.get("cursor", ""),
+        ),
+        None,
+    )
+
+
+def conditional_get(aget_validators):
+    """
+    Async counterpart of django.views.decorators.http.condition(): awaits
+    aget_validators(request, *args, **kwargs) for (etag, last_modified) and
+    answers a matching conditional GET with 304 before the view builds its
+    payload. Successful responses carry the validators as ETag and Last-Modified.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapped_view(request, *args, **kwargs):
+            validators = await aget_validators(request, *args, **kwargs)
+
+            if validators is None:
+                return await view(request, *args, **kwargs)
+
+            etag, last_modified = validators
+            last_modified_timestamp = int(last_modified.timestamp()) if last_modified else None
+            not_modified_response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified_timestamp
+            )
+
+            if not_modified_response is not None:
+                return not_modified_response
+
+            response = await view(request, *args, **kwargs)
+
+            if response.status_code == 200:
+                response.headers.setdefault("ETag", etag)
+
+                if last_modified_timestamp is not None:
+                    response.headers.setdefault("Last-Modified", http_date(last_modified_timestamp))
+
+            return response
+
+        return wrapped_view
+
+    return decorator
@@ -0,0 +1,193 @@
+from bisect import (
+    bisect_left, bisect_right
+)
+from collections import defaultdict
+from decimal import Decimal
+
+from .catalog_cache import (
+    bump_versions,
+    get_version
+)
+from .models import ProductDetail
+
+# The facet index is versioned like catalog payloads, under its own scope in the
+# shared catalog cache, so a write in any process reaches every worker.
+FACET_INDEX_VERSION_SCOPE = "facets"
+FACET_INDEX_VERSION_ID = "index"
+FACET_INDEX_BUILD_CHUNK_SIZE = 2000
+PRICE_BUCKET_EDGES = [Decimal(price_edge) for price_edge in (2000, 4000, 6000, 10000)]
+
+_facet_index = None
+
+
+def get_price_bucket(price):
+    lower_edge = Decimal(0)
+
+    for upper_edge in PRICE_BUCKET_EDGES:
+        if price < upper_edge:
+            return f"{lower_edge}-{upper_edge}"
+
+        lower_edge = upper_edge
+
+    return f"{lower_edge}+"
+
+
+def get_bitmap(bit_positions, bitmap_length):
+    """
+    Builds an int with the given bits set. Setting bits in a bytearray and converting
+    once is linear, where OR-ing one bit at a time copies the growing int each time.
+    """
+    bitmap_bytes = bytearray(bitmap_length // 8 + 1)
+
+    for bit_position in bit_positions:
+        bitmap_bytes[bit_position >> 3] |= 1 << (bit_position & 7)
+
+    return int.from_bytes(bitmap_bytes, "little")
+
+
+class FacetIndex:
+    """
+    One bitmap of product details per facet value, held as Python ints. Filters are
+    ANDed per detail, so like the catalog list a product matches only when one of
+    its details matches every filter; counts are projected to products at the end.
+
+    Bit positions are assigned product by product, so a product's details occupy
+    consecutive bits. A product is present in a detail bitmap when any of its bits
+    is set, which for every product at once is a handful of shifts and ANDs (one
+    per detail of the largest product) followed by a popcount.
+
+    Filters use the catalog list's parameters: category, color and material match
+    case-insensitively, size exactly, and min_price/max_price bound the price.
+    """
+
+    FILTER_FACETS = ("category", "size", "color", "material")
+    FACETS = FILTER_FACETS + ("price_bucket",)
+    CASE_INSENSITIVE_FACETS = frozenset(("category", "color", "material"))
+
+    def __init__(self, version, product_detail_rows):
+        self.version = version
+        self.display_values = {facet: {} for facet in self.FACETS}
+        positions_by_value = {facet: defaultdict(list) for facet in self.FACETS}
+        # first_positions_by_offset[n] lists the first bit of every product with more
+        # than n details.
+        first_positions_by_offset = defaultdict(list)
+        priced_positions = []
+        product_id = first_position = None
+        position = -1
+
+        for position, (row_product_id, category_name, size, color, material, price) in enumerate(
+            product_detail_rows
+        ):
+            if row_product_id != product_id:
+                product_id, first_position = row_product_id, position
+
+            first_positions_by_offset[position - first_position].append(first_position)
+            priced_positions.append((price, position))
+
+            for facet, facet_value in zip(
+                self.FACETS, (category_name, size, color, material, get_price_bucket(price))
+            ):
+                facet_key = self.get_facet_key(facet, facet_value)
+                self.display_values[facet].setdefault(facet_key, facet_value)
+                positions_by_value[facet][facet_key].append(position)
+
+        self.bitmap_length = position + 1
+        self.all_details_bitmap = (1 << self.bitmap_length) - 1
+        self.value_bitmaps = {
+            facet: {
+                facet_key: get_bitmap(positions, self.bitmap_length)
+                for facet_key, positions in positions_by_value[facet].items()
+            }
+            for facet in self.FACETS
+        }
+        self.first_position_bitmaps = [
+            get_bitmap(first_positions_by_offset[offset], self.bitmap_length)
+            for offset in range(len(first_positions_by_offset))
+        ]
+
+        priced_positions.sort()
+        self.sorted_prices = [price for price, _ in priced_positions]
+        self.price_sorted_positions = [position for _, position in priced_positions]
+
+    def get_facet_key(self, facet, facet_value):
+        return facet_value.lower() if facet in self.CASE_INSENSITIVE_FACETS else facet_value
+
+    def get_price_range_bitmap(self, min_price=None, max_price=None):
+        range_start = 0 if min_price is None else bisect_left(self.sorted_prices, min_price)
+        range_end = (
+            len(self.sorted_prices) if max_price is None else bisect_right(self.sorted_prices, max_price)
+        )
+
+        return get_bitmap(self.price_sorted_positions[range_start:range_end], self.bitmap_length)
+
+    def filter_details(self, facet_filters):
+        filtered_bitmap = self.all_details_bitmap
+
+        for facet in self.FILTER_FACETS:
+            if facet in facet_filters:
+                filtered_bitmap &= self.value_bitmaps[facet].get(
+                    self.get_facet_key(facet, facet_filters[facet]), 0
+                )
+
+        if "min_price" in facet_filters or "max_price" in facet_filters:
+            filtered_bitmap &= self.get_price_range_bitmap(
+                facet_filters.get("min_price"), facet_filters.get("max_price")
+            )
+
+        return filtered_bitmap
+
+    def count_products(self, detail_bitmap):
+        present_products_bitmap = 0
+
+        for offset, first_position_bitmap in enumerate(self.first_position_bitmaps):
+            present_products_bitmap |= (detail_bitmap >> offset) & first_position_bitmap
+
+        return present_products_bitmap.bit_count()
+
+    def count(self, facet_filters):
+        """
+        Returns the number of products matching facet_filters and, per facet value,
+        how many of them also have a matching detail with that value.
+        """
+        filtered_bitmap = self.filter_details(facet_filters)
+        facet_counts = {}
+
+        for facet in self.FACETS:
+            facet_counts[facet] = {}
+
+            for facet_key, value_bitmap in sorted(self.value_bitmaps[facet].items()):
+                value_count = self.count_products(value_bitmap & filtered_bitmap)
+
+                if value_count:
+                    facet_counts[facet][self.display_values[facet][facet_key]] = value_count
+
+        return self.count_products(filtered_bitmap), facet_counts
+
+
+def get_facet_index_version():
+    return get_version(FACET_INDEX_VERSION_SCOPE, FACET_INDEX_VERSION_ID)
+
+
+def invalidate_facet_index():
+    bump_versions(FACET_INDEX_VERSION_SCOPE, [FACET_INDEX_VERSION_ID])
+
+
+def get_facet_index():
+    """
+    Returns this process's facet index, rebuilding it in one streamed query when the
+    shared version key shows that product details changed since it was built.
+    """
+    global _facet_index
+
+    facet_index_version = get_facet_index_version()
+
+    if _facet_index is None or _facet_index.version != facet_index_version:
+        _facet_index = FacetIndex(
+            facet_index_version,
+            ProductDetail.objects.filter(product__is_active=True)
+            .order_by("product_id", "id")
+            .values_list("product_id", "product__category__name", "size", "color", "material", "price")
+            .iterator(chunk_size=FACET_INDEX_BUILD_CHUNK_SIZE),
+        )
+
+    return _facet_index
@@ -0,0 +1,274 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .choices import ImageProcessingStatusChoices
+from .models import ProductImage
+from .refresh import mark_products_stale
+
+logger = logging.getLogger(__name__)
+
+# Variant name: maximum width in pixels. Originals are never scaled up.
+IMAGE_VARIANT_WIDTHS = {
+    "thumbnail": 160,
+    ProductImage.LISTING_VARIANT: 480,
+}
+IMAGE_VARIANT_FORMAT = "WEBP"
+IMAGE_VARIANT_QUALITY = 80
+
+IMAGE_PROCESSING_BATCH_SIZE = 100
+IMAGE_PROCESSING_WORKERS = 8
+
+IMAGE_RESULT_FIELDS = [
+    "processing_status", "content_hash", "width", "height", "variant_paths", "modified",
+]
+
+
+class ImageFetchError(Exception):
+    pass
+
+
+class HTTPOnlyRedirectHandler(urllib.request.HTTPRedirectHandler):
+    # urllib follows redirects to ftp urls as well; only http(s) may be followed.
+    def redirect_request(self, request, response_file, code, message, headers, new_url):
+        if urlsplit(new_url).scheme.lower() not in HTTPImageSource.ALLOWED_SCHEMES:
+            raise urllib.error.URLError(f"refusing redirect to {new_url}")
+
+        return super().redirect_request(request, response_file, code, message, headers, new_url)
+
+
+class HTTPImageSource:
+    """
+    Downloads originals over HTTP(S), refusing bodies over max_bytes. Image urls
+    come from the feed, so any other scheme urlopen understands (file, ftp,
+    data) is rejected before anything is opened.
+    """
+
+    ALLOWED_SCHEMES = ("http", "https")
+
+    def __init__(self, timeout=10, max_bytes=20 * 1024 * 1024):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.opener = urllib.request.build_opener(HTTPOnlyRedirectHandler)
+
+    def fetch(self, url):
+        if urlsplit(url).scheme.lower() not in self.ALLOWED_SCHEMES:
+            raise ImageFetchError(f"{url} is not an http or https url.")
+
+        try:
+            with self.opener.open(url, timeout=self.timeout) as response:
+                image_bytes = response.read(self.max_bytes + 1)
+        except (urllib.error.URLError, OSError, ValueError) as error:
+            raise ImageFetchError(f"Could not download {url}: {error}")
+
+        if len(image_bytes) > self.max_bytes:
+            raise ImageFetchError(f"{url} is larger than {self.max_bytes} bytes.")
+
+        return image_bytes
+
+
+class LocalFileImageSource:
+    """
+    Reads originals from a directory laid out as <root>/<host>/<path>, standing
+    in for the remote store in development and benchmarks. Query strings are
+    ignored.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root).resolve()
+
+    def fetch(self, url):
+        split_url = urlsplit(url)
+        image_path = (self.root / split_url.netloc / split_url.path.lstrip("/")).resolve()
+
+        if not image_path.is_relative_to(self.root):
+            raise ImageFetchError(f"{url} points outside the image source directory.")
+
+        try:
+            return image_path.read_bytes()
+        except OSError as error:
+            raise ImageFetchError(f"Could not read {url}: {error}")
+
+
+@lru_cache(maxsize=None)
+def get_image_source():
+    image_source_settings = settings.PRODUCT_IMAGE_SOURCE
+
+    return import_string(image_source_settings["BACKEND"])(**image_source_settings.get("OPTIONS", {}))
+
+
+def get_image_variant_path(content_hash, variant_name):
+    return f"{content_hash[:2]}/{content_hash}/{variant_name}.{IMAGE_VARIANT_FORMAT.lower()}"
+
+
+def write_file_atomically(file_path, file_bytes):
+    # Workers rendering the same content at once each write a temporary file and
+    # rename it into place, so a reader never sees a partial variant.
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=file_path.parent, suffix=".tmp")
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as temporary_file:
+            temporary_file.write(file_bytes)
+
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def render_image_variants(image_bytes, cache_root):
+    """
+    Writes the resized variants of one original into the content-addressed cache
+    and returns (content_hash, width, height, variant_paths). Variants already on
+    disk are reused, so the same picture behind several urls is decoded once.
+    """
+    try:
+        from PIL import (
+            ExifTags, Image, ImageOps, UnidentifiedImageError
+        )
+    except ImportError:
+        raise ImproperlyConfigured("The product image pipeline requires Pillow.")
+
+    content_hash = hashlib.sha256(image_bytes).hexdigest()
+    variant_paths = {
+        variant_name: get_image_variant_path(content_hash, variant_name)
+        for variant_name in IMAGE_VARIANT_WIDTHS
+    }
+    missing_variant_names = [
+        variant_name
+        for variant_name, variant_path in variant_paths.items()
+        if not (cache_root / variant_path).exists()
+    ]
+
+    try:
+        # open() only reads the header, which is enough for the size.
+        with Image.open(io.BytesIO(image_bytes)) as original_image:
+            width, height = original_image.size
+
+            # Orientations 5-8 are stored rotated by 90 degrees.
+            if original_image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+                width, height = height, width
+
+            if missing_variant_names:
+                # JPEGs are decoded straight at the smallest scale still larger
+                # than every variant.
+                largest_variant_width = max(IMAGE_VARIANT_WIDTHS.values())
+                original_image.draft("RGB", (largest_variant_width, largest_variant_width))
+                decoded_image = ImageOps.exif_transpose(original_image).convert("RGB")
+
+            for variant_name in missing_variant_names:
+                variant_image = decoded_image.copy()
+                variant_image.thumbnail((IMAGE_VARIANT_WIDTHS[variant_name], decoded_image.height))
+                variant_file = io.BytesIO()
+                variant_image.save(variant_file, IMAGE_VARIANT_FORMAT, quality=IMAGE_VARIANT_QUALITY)
+                write_file_atomically(cache_root / variant_paths[variant_name], variant_file.getvalue())
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as error:
+        raise ImageFetchError(f"Could not decode image: {error}")
+
+    return content_hash, width, height, variant_paths
+
+
+def process_image(image_source, image_url, cache_root):
+    """
+    Fetches and resizes one image. Runs on the worker threads, so it only touches
+    the image source and the cache directory, never the database.
+    """
+    try:
+        return render_image_variants(image_source.fetch(image_url), cache_root)
+    except ImageFetchError as error:
+        logger.warning("Product image %s failed: %s", image_url, error)
+        return None
+
+
+def process_product_images(
+    image_source=None,
+    max_workers=IMAGE_PROCESSING_WORKERS,
+    batch_size=IMAGE_PROCESSING_BATCH_SIZE,
+    retry_failed=False,
+):
+    """
+    Processes every pending image (and failed ones with retry_failed) in id
+    order. Fetching and resizing run on a pool of max_workers threads; each batch
+    of results is saved with one bulk_update, and the products' listings are
+    refreshed so listing pages switch to the resized variants.
+
+    Returns (ready, failed) image counts.
+    """
+    image_source = image_source or get_image_source()
+    cache_root = Path(settings.PRODUCT_IMAGE_CACHE_ROOT)
+    # Equality on PENDING lets the scan use the partial pending index.
+    unprocessed_images = ProductImage.objects.filter(
+        processing_status=ImageProcessingStatusChoices.PENDING
+    )
+
+    if retry_failed:
+        unprocessed_images = ProductImage.objects.filter(
+            processing_status__in=[ImageProcessingStatusChoices.PENDING, ImageProcessingStatusChoices.FAILED]
+        )
+    ready_images_counter = failed_images_counter = 0
+    last_image_id = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            # Only one batch is queued on the pool at a time, which bounds the
+            # memory held by images waiting to be saved.
+            image_batch = list(
+                unprocessed_images.filter(id__gt=last_image_id)
+                .order_by("id")
+                .only("id", "url", "product_id")[:batch_size]
+            )
+
+            if not image_batch:
+                break
+
+            processed_at = timezone.now()
+
+            for product_image, image_result in zip(
+                image_batch,
+                executor.map(
+                    lambda product_image: process_image(image_source, product_image.url, cache_root),
+                    image_batch,
+                ),
+            ):
+                if image_result is None:
+                    product_image.processing_status = ImageProcessingStatusChoices.FAILED
+                    product_image.content_hash = ""
+                    product_image.width = product_image.height = None
+                    product_image.variant_paths = {}
+                    failed_images_counter += 1
+                else:
+                    product_image.processing_status = ImageProcessingStatusChoices.READY
+                    (
+                        product_image.content_hash,
+                        product_image.width,
+                        product_image.height,
+                        product_image.variant_paths,
+                    ) = image_result
+                    ready_images_counter += 1
+
+                product_image.modified = processed_at
+
+            with transaction.atomic():
+                ProductImage.objects.bulk_update(image_batch, IMAGE_RESULT_FIELDS)
+                mark_products_stale(
+                    {product_image.product_id for product_image in image_batch}, reindex=False
+                )
+
+            last_image_id = image_batch[-1].id
+
+    return ready_images_counter, failed_images_counter
@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+from django.db.models import (
+    F, Max, Min, OuterRef, Subquery, Sum
+)
+from django.db.models.fields.json import KT
+from django.db.models.functions import Coalesce
+
+from .models import (
+    Product,
+    ProductImage,
+    ProductListing
+)
+
+LISTING_REFRESH_BATCH_SIZE = 500
+LISTING_UPDATE_FIELDS = [
+    "name", "code", "category", "category_name", "image_url", "min_price", "max_price",
+    "total_stock", "review_count", "average_rating", "is_active", "product_created", "refreshed",
+]
+
+
+def get_listing_source_queryset(product_ids):
+    first_images = ProductImage.objects.filter(product=OuterRef("pk")).order_by("id")
+
+    return Product.objects.filter(id__in=product_ids).select_related("category").annotate(
+        listing_min_price=Min("product_details__price"),
+        listing_max_price=Max("product_details__price"),
+        listing_total_stock=Coalesce(Sum("product_details__stock"), 0),
+        listing_image_url=Subquery(first_images.values("url")[:1]),
+        listing_image_variant_path=Subquery(
+            first_images.annotate(
+                variant_path=KT(f"variant_paths__{ProductImage.LISTING_VARIANT}")
+            ).values("variant_path")[:1]
+        ),
+        listing_review_count=Coalesce(F("rating_summary__rating_count"), 0),
+        listing_rating_sum=Coalesce(F("rating_summary__rating_sum"), 0),
+    )
+
+
+def refresh_product_listings(product_ids):
+    """
+    Recomputes the listing rows of the given products with one aggregate query and
+    one upsert per batch. Ids of deleted products are ignored; their listings are
+    removed by the cascade.
+
+    Returns the ids of the categories the products were listed under before and
+    after the refresh.
+    """
+    product_ids = sorted(set(product_ids))
+    affected_category_ids = set()
+
+    for batch_start in range(0, len(product_ids), LISTING_REFRESH_BATCH_SIZE):
+        product_ids_batch = product_ids[batch_start:batch_start + LISTING_REFRESH_BATCH_SIZE]
+        affected_category_ids.update(
+            ProductListing.objects.filter(product_id__in=product_ids_batch).values_list(
+                "category_id", flat=True
+            )
+        )
+        refreshed_listings = ProductListing.objects.bulk_create(
+            [
+                ProductListing(
+                    product=product,
+                    name=product.name,
+                    code=product.code,
+                    category=product.category,
+                    category_name=product.category.name,
+                    # The resized listing variant once the image pipeline has made it.
+                    image_url=(
+                        ProductImage.get_variant_url(product.listing_image_variant_path)
+                        if product.listing_image_variant_path
+                        else product.listing_image_url or ""
+                    ),
+                    min_price=product.listing_min_price,
+                    max_price=product.listing_max_price,
+                    total_stock=product.listing_total_stock,
+                    review_count=product.listing_review_count,
+                    average_rating=(
+                        round(Decimal(product.listing_rating_sum) / product.listing_review_count, 2)
+                        if product.listing_review_count else None
+                    ),
+                    is_active=product.is_active,
+                    product_created=product.created,
+                )
+                for product in get_listing_source_queryset(product_ids_batch)
+            ],
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=LISTING_UPDATE_FIELDS,
+        )
+        affected_category_ids.update(
+            refreshed_listing.category_id for refreshed_listing in refreshed_listings
+        )
+
+    return affected_category_ids
@@ -0,0 +1,172 @@
+import json
+import os
+import random
+import string
+import timeit
+from pathlib import Path
+
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+
+from products.catalog_import.cleaning import KeywordClassifier
+from products.catalog_import.mappings import (
+    CATEGORY_MAPPING,
+    PRODUCT_MATERIALS
+)
+
+
+def get_category_by_linear_scan(product_name, category_mapping):
+    return next(
+        (
+            category_name
+            for category_identifier, category_name in category_mapping.items()
+            if category_identifier != "OTHERS"
+               and category_identifier in product_name.upper()
+        ),
+        category_mapping["OTHERS"]
+    )
+
+
+def get_material_by_linear_scan(product_details, product_materials):
+    product_material_details = " ".join(product_details).upper()
+
+    return next(
+        (
+            product_material
+            for product_material in product_materials
+            if product_material.upper() in product_material_details
+        ),
+        "N/A"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the compiled keyword classifier used by the catalog import against "
+        "the original linear keyword scans, on the names and product info in "
+        "'clothes.json', optionally padded with synthetic category keywords."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--extra-keywords",
+            type=int,
+            default=300,
+            help="Synthetic category keywords appended to CATEGORY_MAPPING (default: 300).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timing rounds per implementation; the best round is reported (default: 5).",
+        )
+
+    def build_category_mapping(self, extra_keywords):
+        keyword_generator = random.Random(extra_keywords)
+        category_mapping = {
+            category_identifier: category_name
+            for category_identifier, category_name in CATEGORY_MAPPING.items()
+            if category_identifier != "OTHERS"
+        }
+
+        while len(category_mapping) < len(CATEGORY_MAPPING) - 1 + extra_keywords:
+            synthetic_keyword = "".join(
+                keyword_generator.choices(string.ascii_uppercase, k=keyword_generator.randint(4, 12))
+            )
+            category_mapping.setdefault(synthetic_keyword, synthetic_keyword.title())
+
+        category_mapping["OTHERS"] = CATEGORY_MAPPING["OTHERS"]
+
+        return category_mapping
+
+    def time_best_round(self, benchmark_function, repeat):
+        return min(timeit.repeat(benchmark_function, number=1, repeat=repeat))
+
+    def report(self, label, linear_seconds, compiled_seconds, record_count):
+        self.stdout.write(
+            f"{label}: linear {linear_seconds * 1e6 / record_count:.2f} us/record, "
+            f"compiled {compiled_seconds * 1e6 / record_count:.2f} us/record "
+            f"({linear_seconds / compiled_seconds:.1f}x)"
+        )
+
+    def handle(self, *args, **options):
+        if options["extra_keywords"] < 0 or options["repeat"] < 1:
+            raise CommandError("--extra-keywords must be >= 0 and --repeat must be >= 1.")
+
+        with open(
+                Path(os.path.abspath(__file__)).parent.parent / "data" / "clothes.json",
+                "r",
+                encoding="utf-8"
+        ) as json_file:
+            product_data_list = json.load(json_file)
+
+        product_names = [
+            product_json_record.get("product_name", "") for product_json_record in product_data_list
+        ]
+        product_info_lists = [
+            product_json_record.get("product_info", []) for product_json_record in product_data_list
+        ]
+
+        category_mapping = self.build_category_mapping(options["extra_keywords"])
+        category_classifier = KeywordClassifier(
+            (
+                (category_identifier, category_name)
+                for category_identifier, category_name in category_mapping.items()
+                if category_identifier != "OTHERS"
+            ),
+            category_mapping["OTHERS"]
+        )
+        material_classifier = KeywordClassifier(
+            ((product_material.upper(), product_material) for product_material in PRODUCT_MATERIALS),
+            "N/A"
+        )
+
+        if [
+            get_category_by_linear_scan(product_name, category_mapping)
+            for product_name in product_names
+        ] != [category_classifier.classify(product_name) for product_name in product_names]:
+            raise CommandError("Compiled category classifier disagrees with the linear scan.")
+
+        if [
+            get_material_by_linear_scan(product_info_list, PRODUCT_MATERIALS)
+            for product_info_list in product_info_lists
+        ] != [
+            material_classifier.classify(" ".join(product_info_list))
+            for product_info_list in product_info_lists
+        ]:
+            raise CommandError("Compiled material classifier disagrees with the linear scan.")
+
+        self.report(
+            f"Category ({len(category_mapping) - 1} keywords)",
+            self.time_best_round(
+                lambda: [
+                    get_category_by_linear_scan(product_name, category_mapping)
+                    for product_name in product_names
+                ],
+                options["repeat"],
+            ),
+            self.time_best_round(
+                lambda: [category_classifier.classify(product_name) for product_name in product_names],
+                options["repeat"],
+            ),
+            len(product_names),
+        )
+        self.report(
+            f"Material ({len(PRODUCT_MATERIALS)} keywords)",
+            self.time_best_round(
+                lambda: [
+                    get_material_by_linear_scan(product_info_list, PRODUCT_MATERIALS)
+                    for product_info_list in product_info_lists
+                ],
+                options["repeat"],
+            ),
+            self.time_best_round(
+                lambda: [
+                    material_classifier.classify(" ".join(product_info_list))
+                    for product_info_list in product_info_lists
+                ],
+                options["repeat"],
+            ),
+            len(product_info_lists),
+        )
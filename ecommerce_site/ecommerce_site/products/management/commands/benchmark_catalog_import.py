@@ -0,0 +1,201 @@
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+from django.core.management import call_command
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+
+from products.catalog_import.mappings import DEFAULT_BATCH_SIZE
+from products.catalog_import.synthetic import write_synthetic_catalog
+
+DEFAULT_BENCHMARK_SIZES = [1_000, 100_000, 1_000_000]
+
+
+def get_peak_rss_megabytes():
+    peak_rss = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    return peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_import_benchmark(feed_path, database_path, import_options, result_queue):
+    """
+    Imports one feed into a fresh SQLite file. Runs in its own spawned process so
+    that peak RSS belongs to this run alone.
+    """
+    django.setup()
+
+    from django.db import connection
+    from products.benchmarks import throwaway_sqlite_database
+    from products.models import Product
+
+    executed_queries_counter = 0
+
+    def count_query(execute, sql, params, many, context):
+        nonlocal executed_queries_counter
+        executed_queries_counter += 1
+
+        return execute(sql, params, many, context)
+
+    with throwaway_sqlite_database(database_path):
+        with open(os.devnull, "w") as devnull, connection.execute_wrapper(count_query):
+            import_started_at = time.perf_counter()
+            call_command(
+                "load_product_catalog_json_and_populate_models",
+                file=feed_path,
+                stdout=devnull,
+                **import_options,
+            )
+            import_duration = time.perf_counter() - import_started_at
+
+        imported_products_counter = Product.objects.count()
+
+    result_queue.put({
+        "wall_time_seconds": round(import_duration, 3),
+        "query_count": executed_queries_counter,
+        "peak_rss_mb": round(get_peak_rss_megabytes(), 1),
+        "imported_products": imported_products_counter,
+        "rows_per_second": round(imported_products_counter / max(import_duration, 1e-9), 1),
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the catalog import command against synthetic 'clothes.json'-shaped "
+        "feeds on a throwaway SQLite database, reporting wall time, query count, peak RSS "
+        "and rows/sec, and appends the results to a JSON file for regression tracking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=DEFAULT_BENCHMARK_SIZES,
+            help="Synthetic feed sizes to benchmark (default: 1000 100000 1000000).",
+        )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Benchmark the bulk import mode instead of the row-by-row mode.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Chunk size passed to the import command (default: {DEFAULT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Cleaning processes passed to the import command in bulk mode (default: 1).",
+        )
+        parser.add_argument(
+            "--json-lines",
+            action="store_true",
+            help="Generate JSON Lines feeds instead of a JSON array.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed for the synthetic feed generator (default: 0).",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            default=Path("catalog_import_benchmarks.json"),
+            help="JSON file that benchmark runs are appended to (default: catalog_import_benchmarks.json).",
+        )
+
+    def append_benchmark_run(self, output_path, benchmark_run):
+        benchmark_runs = []
+
+        if output_path.exists():
+            try:
+                benchmark_runs = json.loads(output_path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                raise CommandError(f"Existing results file '{output_path}' is not valid JSON.")
+
+        benchmark_runs.append(benchmark_run)
+        output_path.write_text(json.dumps(benchmark_runs, indent=2) + "\n", encoding="utf-8")
+
+    def handle(self, *args, **options):
+        if any(feed_size < 1 for feed_size in options["sizes"]):
+            raise CommandError("--sizes must all be positive integers.")
+
+        import_options = {
+            "bulk": options["bulk"],
+            "batch_size": options["batch_size"],
+            "workers": options["workers"],
+        }
+        benchmark_results = []
+        spawn_context = multiprocessing.get_context("spawn")
+
+        with tempfile.TemporaryDirectory(prefix="catalog_benchmark_") as benchmark_directory:
+            for feed_size in options["sizes"]:
+                feed_path = Path(benchmark_directory) / (
+                    f"catalog_{feed_size}.{'jsonl' if options['json_lines'] else 'json'}"
+                )
+
+                with open(feed_path, "w", encoding="utf-8") as feed_file:
+                    write_synthetic_catalog(
+                        feed_file, feed_size, seed=options["seed"], json_lines=options["json_lines"]
+                    )
+
+                result_queue = spawn_context.Queue()
+                benchmark_process = spawn_context.Process(
+                    target=run_import_benchmark,
+                    args=(
+                        str(feed_path),
+                        str(Path(benchmark_directory) / f"catalog_{feed_size}.sqlite3"),
+                        import_options,
+                        result_queue,
+                    ),
+                )
+                benchmark_process.start()
+                benchmark_result = result_queue.get() if benchmark_process.is_alive() else None
+                benchmark_process.join()
+
+                if benchmark_process.exitcode != 0 or benchmark_result is None:
+                    raise CommandError(f"Benchmark for {feed_size} records failed.")
+
+                benchmark_result = {"records": feed_size, **benchmark_result}
+                benchmark_results.append(benchmark_result)
+                feed_path.unlink()
+
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{feed_size} records: {benchmark_result['wall_time_seconds']}s, "
+                        f"{benchmark_result['query_count']} queries, "
+                        f"{benchmark_result['peak_rss_mb']} MB peak RSS, "
+                        f"{benchmark_result['rows_per_second']} rows/sec"
+                    )
+                )
+
+        self.append_benchmark_run(options["output"], {
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "import_options": {**import_options, "json_lines": options["json_lines"]},
+            "seed": options["seed"],
+            "results": benchmark_results,
+        })
+
+        self.stdout.write(f"Results appended to {options['output']}.")
@@ -0,0 +1,202 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import django
+from django.core.management import call_command
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+
+from products.catalog_import.synthetic import write_synthetic_catalog
+
+# The stock profile mirrors the original settings: default journal and a new
+# connection per request. The tuned profile adds WAL and, like a threaded WSGI
+# deployment setting DATABASE_CONN_MAX_AGE, keeps each worker's connection open
+# across requests; DEFAULT_CONN_MAX_AGE alone would close it like the stock one.
+BENCHMARKED_PROFILES = {
+    "sqlite-default": {"DATABASE_CONN_MAX_AGE": "0"},
+    "sqlite": {"DATABASE_CONN_MAX_AGE": "600"},
+}
+
+
+def run_profile_benchmark(database_profile, profile_environ, database_path, feed_path, options, result_queue):
+    """
+    Runs readers and writers against one SQLite file under one DATABASE_PROFILE.
+    Runs in its own spawned process because settings.DATABASES is built at import.
+    """
+    os.environ.update({
+        "DATABASE_PROFILE": database_profile,
+        "DATABASE_NAME": database_path,
+        **profile_environ,
+    })
+    django.setup()
+
+    from django.conf import settings
+    from django.db import (
+        OperationalError, close_old_connections, connection, transaction
+    )
+    from django.db.models import F
+
+    from products.models import ProductDetail
+    from products.pagination import paginate_by_created
+    from products.views import (
+        get_catalog_queryset,
+        serialize_catalog_product
+    )
+
+    settings.DEBUG = False
+
+    with open(os.devnull, "w") as devnull:
+        call_command("migrate", verbosity=0, stdout=devnull)
+        call_command(
+            "load_product_catalog_json_and_populate_models", file=feed_path, bulk=True, stdout=devnull
+        )
+
+    product_detail_ids = list(ProductDetail.objects.values_list("id", flat=True))
+    connection.close()
+
+    operation_counters = {"reads": 0, "writes": 0, "lock_errors": 0}
+    counters_lock = threading.Lock()
+    stop_at = time.perf_counter() + options["duration"]
+
+    def read_catalog_page():
+        products, _ = paginate_by_created(get_catalog_queryset({}), {})
+        [serialize_catalog_product(product) for product in products]
+
+    def write_product_detail(operation_random):
+        # Read then write, like most request handlers that change data.
+        with transaction.atomic():
+            product_detail = ProductDetail.objects.get(pk=operation_random.choice(product_detail_ids))
+            ProductDetail.objects.filter(pk=product_detail.pk).update(stock=F("stock") + 1)
+
+    def run_worker(operation, counter_name, worker_seed):
+        operation_random = random.Random(worker_seed)
+        worker_counters = {"ok": 0, "lock_errors": 0}
+
+        try:
+            while time.perf_counter() < stop_at:
+                try:
+                    if counter_name == "writes":
+                        operation(operation_random)
+                    else:
+                        operation()
+
+                    worker_counters["ok"] += 1
+                except OperationalError:
+                    worker_counters["lock_errors"] += 1
+
+                # Stands in for the end of a request: closes the connection unless
+                # CONN_MAX_AGE keeps it.
+                close_old_connections()
+        finally:
+            connection.close()
+
+            with counters_lock:
+                operation_counters[counter_name] += worker_counters["ok"]
+                operation_counters["lock_errors"] += worker_counters["lock_errors"]
+
+    workers = [
+        threading.Thread(target=run_worker, args=(read_catalog_page, "reads", worker_index))
+        for worker_index in range(options["readers"])
+    ] + [
+        threading.Thread(target=run_worker, args=(write_product_detail, "writes", worker_index))
+        for worker_index in range(options["writers"])
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    for worker in workers:
+        worker.join()
+
+    result_queue.put({
+        "reads_per_second": round(operation_counters["reads"] / options["duration"], 1),
+        "writes_per_second": round(operation_counters["writes"] / options["duration"], 1),
+        "lock_errors": operation_counters["lock_errors"],
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests concurrent catalog reads and stock writes against a local SQLite "
+        "file under SQLite's stock settings with a connection per request, and under "
+        "the tuned sqlite profile (WAL, synchronous=NORMAL, mmap, busy timeout) with "
+        "DATABASE_CONN_MAX_AGE set so connections persist, and reports the throughput "
+        "of each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--products",
+            type=int,
+            default=2000,
+            help="Synthetic products loaded before the run (default: 2000).",
+        )
+        parser.add_argument(
+            "--readers",
+            type=int,
+            default=8,
+            help="Reader threads (default: 8).",
+        )
+        parser.add_argument(
+            "--writers",
+            type=int,
+            default=2,
+            help="Writer threads (default: 2).",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10.0,
+            help="Seconds each profile is loaded for (default: 10).",
+        )
+
+    def handle(self, *args, **options):
+        if options["products"] < 1 or options["duration"] <= 0:
+            raise CommandError("--products and --duration must be positive.")
+
+        if options["readers"] < 0 or options["writers"] < 0 or not options["readers"] + options["writers"]:
+            raise CommandError("Run at least one reader or writer.")
+
+        spawn_context = multiprocessing.get_context("spawn")
+
+        with tempfile.TemporaryDirectory(prefix="database_benchmark_") as benchmark_directory:
+            feed_path = Path(benchmark_directory) / "catalog.json"
+
+            with open(feed_path, "w", encoding="utf-8") as feed_file:
+                write_synthetic_catalog(feed_file, options["products"], seed=0)
+
+            for database_profile, profile_environ in BENCHMARKED_PROFILES.items():
+                result_queue = spawn_context.Queue()
+                benchmark_process = spawn_context.Process(
+                    target=run_profile_benchmark,
+                    args=(
+                        database_profile,
+                        profile_environ,
+                        str(Path(benchmark_directory) / f"{database_profile}.sqlite3"),
+                        str(feed_path),
+                        {key: options[key] for key in ("readers", "writers", "duration")},
+                        result_queue,
+                    ),
+                )
+                benchmark_process.start()
+                benchmark_result = result_queue.get() if benchmark_process.is_alive() else None
+                benchmark_process.join()
+
+                if benchmark_process.exitcode != 0 or benchmark_result is None:
+                    raise CommandError(f"Benchmark of the {database_profile} profile failed.")
+
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{database_profile} (DATABASE_CONN_MAX_AGE="
+                        f"{profile_environ['DATABASE_CONN_MAX_AGE']}): "
+                        f"{benchmark_result['reads_per_second']} reads/sec, "
+                        f"{benchmark_result['writes_per_second']} writes/sec, "
+                        f"{benchmark_result['lock_errors']} 'database is locked' errors"
+                    )
+                )
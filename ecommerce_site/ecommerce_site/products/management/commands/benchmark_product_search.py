@@ -0,0 +1,101 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+
+from products.benchmarks import throwaway_sqlite_database
+from products.catalog_import.synthetic import write_synthetic_catalog
+from products.search import (
+    LikeSearchBackend,
+    SQLiteFTS5SearchBackend
+)
+
+DEFAULT_BENCHMARK_QUERIES = [
+    "cotton kurta", "black", "waist", "blended sandals", "peshawari chappal", "navy lawn kurti",
+    "maroon khaddar shawl",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the SQLite FTS5 product search index against icontains (LIKE) scans "
+        "on a throwaway SQLite database filled with a synthetic catalog."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--products",
+            type=int,
+            default=100_000,
+            help="Number of synthetic products to import (default: 100000).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Times each query is run per backend; the best run is reported (default: 5).",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Results requested per query (default: 20).",
+        )
+        parser.add_argument(
+            "queries",
+            nargs="*",
+            default=DEFAULT_BENCHMARK_QUERIES,
+            help="Search queries to time (default: a fixed set of catalog searches).",
+        )
+
+    def time_best_query(self, search_backend, query, limit, repeat):
+        query_durations = []
+
+        for _ in range(repeat):
+            query_started_at = time.perf_counter()
+            search_backend.search(query, limit)
+            query_durations.append(time.perf_counter() - query_started_at)
+
+        return min(query_durations)
+
+    def handle(self, *args, **options):
+        if options["products"] < 1 or options["repeat"] < 1 or options["limit"] < 1:
+            raise CommandError("--products, --repeat and --limit must be positive integers.")
+
+        with tempfile.TemporaryDirectory(prefix="search_benchmark_") as benchmark_directory:
+            feed_path = Path(benchmark_directory) / "catalog.json"
+
+            with open(feed_path, "w", encoding="utf-8") as feed_file:
+                write_synthetic_catalog(feed_file, options["products"])
+
+            with throwaway_sqlite_database(Path(benchmark_directory) / "search.sqlite3"):
+                with open(os.devnull, "w") as devnull:
+                    call_command(
+                        "load_product_catalog_json_and_populate_models",
+                        file=feed_path,
+                        bulk=True,
+                        stdout=devnull,
+                    )
+
+                self.stdout.write(f"Imported {options['products']} synthetic products.")
+
+                fts_backend, like_backend = SQLiteFTS5SearchBackend(), LikeSearchBackend()
+
+                for query in options["queries"]:
+                    fts_duration = self.time_best_query(
+                        fts_backend, query, options["limit"], options["repeat"]
+                    )
+                    like_duration = self.time_best_query(
+                        like_backend, query, options["limit"], options["repeat"]
+                    )
+
+                    self.stdout.write(
+                        f"{query!r}: FTS5 {fts_duration * 1000:.2f} ms, "
+                        f"LIKE {like_duration * 1000:.2f} ms "
+                        f"({like_duration / max(fts_duration, 1e-9):.0f}x)"
+                    )
@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+
+from products.snapshots import (
+    SNAPSHOT_PAGE_SIZE,
+    export_catalog_snapshot
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports the active catalog as static JSON pages per category with a manifest "
+        "of ETags, regenerating only the categories that changed since the last export."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.CATALOG_SNAPSHOT_ROOT,
+            help="Snapshot directory (default: CATALOG_SNAPSHOT_ROOT).",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=SNAPSHOT_PAGE_SIZE,
+            help=f"Products per page (default: {SNAPSHOT_PAGE_SIZE}).",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Regenerate every category, changed or not.",
+        )
+
+    def handle(self, *args, **options):
+        if options["page_size"] < 1:
+            raise CommandError("--page-size must be a positive integer.")
+
+        export_started_at = time.perf_counter()
+        exported_categories_counter, unchanged_categories_counter, removed_categories_counter = (
+            export_catalog_snapshot(options["output"], options["page_size"], full=options["full"])
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported {exported_categories_counter} categories, left "
+                f"{unchanged_categories_counter} unchanged and removed "
+                f"{removed_categories_counter} in "
+                f"{time.perf_counter() - export_started_at:.2f}s."
+            )
+        )
@@ -1,6 +1,9 @@
+import itertools
 import json
 import os
-from decimal import Decimal, InvalidOperation
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from django.core.management.base import (
@@ -8,19 +11,23 @@ from django.core.management.base import (
 )
 from django.db import transaction
 
-from products.choices import SizeChoices
+from products.catalog_import.cleaning import (
+    InvalidPriceError,
+    clean_product_chunk,
+    clean_product_record
+)
+from products.catalog_import.mappings import (
+    DEFAULT_BATCH_SIZE,
+    STREAM_READ_SIZE
+)
+from products.catalog_import.reader import iter_product_records
+from products.catalog_import.upsert import CatalogBulkUpserter
 from products.models import (
     Category,
     Product,
     ProductDetail,
     ProductImage
 )
-from .mappings import (
-    CATEGORY_MAPPING,
-    DEFAULT_SIZE,
-    DEFAULT_STOCK,
-    PRODUCT_MATERIALS
-)
 
 
 class Command(BaseCommand):
@@ -31,140 +38,267 @@ class Command(BaseCommand):
         "and ProductImage models to ensure data consistency and integrity."
     )
 
-    def get_category_from_product_name(self, product_name):
-        assigned_category_name = next(
-            (
-                category_name
-                for category_identifier, category_name in CATEGORY_MAPPING.items()
-                if category_identifier != "OTHERS"
-                   and category_identifier in product_name.upper()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            type=Path,
+            default=Path(os.path.abspath(__file__)).parent.parent / "data" / "clothes.json",
+            help="Catalog feed to import, as a JSON array or JSON Lines (default: clothes.json).",
+        )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Write products in chunks with bulk upserts instead of one row at a time.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Number of products written per chunk in bulk mode (default: {DEFAULT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of processes cleaning feed chunks in bulk mode. Chunks are still "
+                "written by this process, in feed order (default: 1)."
             ),
-            CATEGORY_MAPPING["OTHERS"]
+        )
+        parser.add_argument(
+            "--delta",
+            action="store_true",
+            help=(
+                "Bulk mode only: skip products whose content hash matches the stored one "
+                "and only write new or changed products."
+            ),
+        )
+        parser.add_argument(
+            "--deactivate-missing",
+            action="store_true",
+            help="Bulk mode only: mark active products that are absent from the feed as inactive.",
         )
 
-        return assigned_category_name
+    def import_product_record(self, product_record):
+        product_category, category_created = Category.objects.get_or_create(
+            name=product_record["category_name"]
+        )
 
-    def get_product_material(self, product_details):
-        product_material_details = " ".join(product_details).upper()
+        if category_created:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f" Created new Category: {product_category.name}"
+                )
+            )
 
-        return next(
-            (
-                product_material
-                for product_material in PRODUCT_MATERIALS
-                if product_material.upper() in product_material_details
-            ),
-            "N/A"
+        product_instance, _ = Product.objects.update_or_create(
+            code=product_record["code"],
+            defaults={
+                "name": product_record["name"],
+                "category": product_category,
+                "content_hash": product_record["content_hash"],
+                "is_active": True,
+            }
         )
 
-    def handle(self, *args, **options):
-        try:
-            with open(
-                    Path(os.path.abspath(__file__)).parent.parent / "data" / "clothes.json",
-                    "r",
-                    encoding="utf-8"
-            ) as json_file:
-                product_data_list = json.load(json_file)
-        except json.JSONDecodeError:
-            raise CommandError(
-                "Error decoding JSON file. Check for syntax errors."
+        ProductDetail.objects.update_or_create(
+            product=product_instance,
+            defaults={
+                "size": product_record["size"],
+                "material": product_record["material"],
+                "color": product_record["color"],
+                "stock": product_record["stock"],
+                "price": product_record["price"],
+                "description": product_record["description"],
+            }
+        )
+
+        for image_source_url, image_alt_text in product_record["images"]:
+            ProductImage.objects.update_or_create(
+                url_hash=ProductImage.get_url_hash(image_source_url),
+                defaults={
+                    "url": image_source_url,
+                    "product": product_instance,
+                    "alt_text": image_alt_text,
+                }
             )
 
-        total_products_counter = len(product_data_list)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"  [SUCCESS] Product: {product_record['name']} ({product_category.name})"
+            )
+        )
+
+    def count_product_records(self, product_json_records):
+        for product_json_record in product_json_records:
+            self.total_products_counter += 1
+            yield product_json_record
+
+    def import_products_row_by_row(self, product_json_records):
         success_imports_counter = 0
 
         with transaction.atomic():
-            for product_json_record in product_data_list:
+            for product_json_record in product_json_records:
                 try:
-                    price_string = (
-                        product_json_record.get("product_price", "0.00")
-                        .replace("PKR\xa0", "")
-                        .replace("PKR ", "")
-                        .replace(",", "")
-                        .strip()
+                    product_record = clean_product_record(product_json_record)
+                    self.import_product_record(product_record)
+                    success_imports_counter += 1
+
+                except InvalidPriceError as error:
+                    self.stdout.write(self.style.WARNING(str(error)))
+
+                except Exception as error:
+                    self.stdout.write(
+                        self.style.ERROR(
+                            f"Failed to process product: "
+                            f"{product_json_record.get('product_name', 'N/A')}. "
+                            f"Error: {error}"
+                        )
                     )
 
-                    try:
-                        product_price = Decimal(price_string)
-                    except InvalidOperation:
-                        self.stdout.write(self.style.WARNING(
-                            f"Skipping '{product_json_record.get('product_name')}': "
-                            f"Invalid price format '{price_string}'"
-                        ))
-                        continue
+        return success_imports_counter
 
-                    product_name = product_json_record.get("product_name").strip()
-                    product_code = product_json_record.get("product_code", product_name)
+    def write_product_chunk(self, bulk_upserter, product_records):
+        try:
+            written_products_counter = bulk_upserter.write_chunk(product_records)
+        except Exception as error:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"Failed to write a chunk of {len(product_records)} products. Error: {error}"
+                )
+            )
+            return 0
 
-                    assigned_category_name = self.get_category_from_product_name(
-                        product_name
-                    )
+        self.stdout.write(
+            self.style.SUCCESS(f"  [SUCCESS] Wrote chunk of {written_products_counter} products")
+        )
 
-                    product_category, category_created = Category.objects.get_or_create(
-                        name=assigned_category_name
-                    )
+        return written_products_counter
 
-                    if category_created:
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f" Created new Category: {assigned_category_name}"
-                            )
-                        )
+    def iter_product_json_chunks(self, product_json_records, batch_size):
+        product_json_records = iter(product_json_records)
 
-                    product_instance, _ = Product.objects.update_or_create(
-                        code=product_code,
-                        defaults={
-                            "name": product_name,
-                            "category": product_category,
-                        }
-                    )
+        while product_json_chunk := list(itertools.islice(product_json_records, batch_size)):
+            yield product_json_chunk
 
-                    product_info_list = product_json_record.get(
-                        "product_info", []
-                    )
+    def iter_cleaned_chunks_in_parallel(self, product_json_chunks, workers):
+        # Keep a bounded window of chunks in flight and collect them in submission
+        # order, so memory stays flat and the writer sees the same order as serially.
+        with ProcessPoolExecutor(max_workers=workers) as process_pool:
+            pending_chunks = deque()
 
-                    ProductDetail.objects.update_or_create(
-                        product=product_instance,
-                        defaults={
-                            "size": DEFAULT_SIZE,
-                            "material": self.get_product_material(product_info_list),
-                            "color": product_info_list[0] if product_info_list else "N/A",
-                            "stock": DEFAULT_STOCK,
-                            "price": product_price,
-                            "description": "\n".join(product_info_list),
-                        }
-                    )
+            for product_json_chunk in product_json_chunks:
+                pending_chunks.append(process_pool.submit(clean_product_chunk, product_json_chunk))
 
-                    for image_index, image_source_url in enumerate(
-                        product_json_record.get("product_images", [])
-                    ):
-                        ProductImage.objects.update_or_create(
-                            url=image_source_url,
-                            defaults={
-                                "product": product_instance,
-                                "alt_text": f"{product_name} - Image {image_index + 1}",
-                            }
-                        )
+                if len(pending_chunks) >= workers * 2:
+                    yield pending_chunks.popleft().result()
 
-                    success_imports_counter += 1
+            while pending_chunks:
+                yield pending_chunks.popleft().result()
 
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"  [SUCCESS] Product: {product_name} ({product_category.name})"
-                        )
-                    )
+    def import_products_in_bulk(
+        self, product_json_records, batch_size, workers, delta, deactivate_missing
+    ):
+        bulk_upserter = CatalogBulkUpserter(batch_size, delta=delta)
+        bulk_upserter.load_categories()
 
-                except Exception as error:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"Failed to process product: "
-                            f"{product_json_record.get('product_name', 'N/A')}. "
-                            f"Error: {error}"
-                        )
+        product_json_chunks = self.iter_product_json_chunks(product_json_records, batch_size)
+
+        if workers > 1:
+            cleaned_chunks = self.iter_cleaned_chunks_in_parallel(product_json_chunks, workers)
+        else:
+            cleaned_chunks = map(clean_product_chunk, product_json_chunks)
+
+        written_products_counter = 0
+        seen_product_codes = set()
+
+        for product_records, cleaning_failures in cleaned_chunks:
+            for style_name, failure_message in cleaning_failures:
+                self.stdout.write(getattr(self.style, style_name)(failure_message))
+
+            if product_records:
+                seen_product_codes.update(
+                    product_record["code"] for product_record in product_records
+                )
+                written_products_counter += self.write_product_chunk(bulk_upserter, product_records)
+
+        for category_name in bulk_upserter.created_category_names:
+            self.stdout.write(self.style.SUCCESS(f" Created new Category: {category_name}"))
+
+        self.unchanged_products_counter = bulk_upserter.unchanged_products_counter
+
+        if deactivate_missing:
+            self.deactivated_products_counter = bulk_upserter.deactivate_products_missing_from(
+                seen_product_codes
+            )
+
+        return written_products_counter
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        if options["workers"] < 1:
+            raise CommandError("--workers must be a positive integer.")
+
+        if not options["bulk"] and (
+            options["workers"] > 1 or options["delta"] or options["deactivate_missing"]
+        ):
+            raise CommandError("--workers, --delta and --deactivate-missing require --bulk.")
+
+        self.total_products_counter = 0
+        self.unchanged_products_counter = 0
+        self.deactivated_products_counter = 0
+        import_started_at = time.perf_counter()
+
+        try:
+            with open(options["file"], "r", encoding="utf-8") as json_file:
+                product_json_records = self.count_product_records(
+                    iter_product_records(json_file, STREAM_READ_SIZE)
+                )
+
+                if options["bulk"]:
+                    written_products_counter = self.import_products_in_bulk(
+                        product_json_records,
+                        options["batch_size"],
+                        options["workers"],
+                        options["delta"],
+                        options["deactivate_missing"],
                     )
+                else:
+                    written_products_counter = self.import_products_row_by_row(
+                        product_json_records
+                    )
+        except OSError as error:
+            raise CommandError(f"Could not read catalog file: {error}")
+        except json.JSONDecodeError as error:
+            raise CommandError(
+                f"Error decoding JSON file. Check for syntax errors. ({error})"
+            )
+
+        import_duration = time.perf_counter() - import_started_at
 
         self.stdout.write("\n")
         self.stdout.write(
             self.style.SUCCESS(
-                f"Successfully imported {success_imports_counter}/{total_products_counter} products."
+                f"Successfully imported {written_products_counter}/"
+                f"{self.total_products_counter} products."
+            )
+        )
+
+        # Skipped and deactivated products are reported apart from written ones, so
+        # the import rate only counts rows that were actually written.
+        if options["delta"]:
+            self.stdout.write(f"Skipped {self.unchanged_products_counter} unchanged products.")
+
+        if options["deactivate_missing"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Deactivated {self.deactivated_products_counter} products missing from the feed."
+                )
             )
+
+        self.stdout.write(
+            f"Import took {import_duration:.2f}s "
+            f"({written_products_counter / max(import_duration, 1e-9):.0f} rows/sec)."
         )
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+
+from products.images import (
+    IMAGE_PROCESSING_BATCH_SIZE,
+    IMAGE_PROCESSING_WORKERS,
+    LocalFileImageSource,
+    process_product_images
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetches pending product images, writes their resized variants into the "
+        "content-addressed image cache and records their size and variant paths."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=IMAGE_PROCESSING_WORKERS,
+            help=f"Fetch and resize threads (default: {IMAGE_PROCESSING_WORKERS}).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMAGE_PROCESSING_BATCH_SIZE,
+            help=f"Images saved per transaction (default: {IMAGE_PROCESSING_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Also retry images that failed before.",
+        )
+        parser.add_argument(
+            "--source-root",
+            help=(
+                "Read originals from this directory, laid out as <host>/<path>, instead "
+                "of the configured PRODUCT_IMAGE_SOURCE."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--workers and --batch-size must be positive integers.")
+
+        processing_started_at = time.perf_counter()
+        ready_images_counter, failed_images_counter = process_product_images(
+            image_source=LocalFileImageSource(options["source_root"]) if options["source_root"] else None,
+            max_workers=options["workers"],
+            batch_size=options["batch_size"],
+            retry_failed=options["retry_failed"],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {ready_images_counter + failed_images_counter} images in "
+                f"{time.perf_counter() - processing_started_at:.1f}s: "
+                f"{ready_images_counter} ready, {failed_images_counter} failed."
+            )
+        )
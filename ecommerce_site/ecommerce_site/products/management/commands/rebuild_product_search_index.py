@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the product search index from scratch with the configured "
+        "PRODUCT_SEARCH_BACKEND, e.g. after restoring a database dump."
+    )
+
+    def handle(self, *args, **options):
+        search_backend = get_search_backend()
+
+        with transaction.atomic():
+            search_backend.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt the product search index ({type(search_backend).__name__}).")
+        )
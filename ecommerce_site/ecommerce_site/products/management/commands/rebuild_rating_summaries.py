@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.listings import refresh_product_listings
+from products.models import ProductRatingSummary
+from products.ratings import rebuild_rating_summaries
+from products.refresh import invalidate_cached_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the per-product review rating counters from the Review table to "
+        "repair drift, then refreshes the affected product listings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "product_ids",
+            nargs="*",
+            type=int,
+            help="Only rebuild these products (default: all products).",
+        )
+
+    def handle(self, *args, **options):
+        product_ids = options["product_ids"] or None
+
+        with transaction.atomic():
+            # Products that lose their summary need their listing refreshed too.
+            summarised_product_ids = set(
+                ProductRatingSummary.objects.values_list("product_id", flat=True)
+            )
+            rebuilt_summaries_counter = rebuild_rating_summaries(product_ids)
+            summarised_product_ids.update(
+                ProductRatingSummary.objects.values_list("product_id", flat=True)
+            )
+
+            affected_category_ids = refresh_product_listings(product_ids or summarised_product_ids)
+
+        invalidate_cached_catalog(product_ids or summarised_product_ids, affected_category_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt rating summaries for {rebuilt_summaries_counter} products.")
+        )
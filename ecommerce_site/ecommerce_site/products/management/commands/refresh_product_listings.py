@@ -0,0 +1,52 @@
+from django.core.management.base import (
+    BaseCommand, CommandError
+)
+from django.db import transaction
+
+from products.listings import (
+    LISTING_REFRESH_BATCH_SIZE,
+    refresh_product_listings
+)
+from products.models import Product
+from products.refresh import invalidate_cached_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the denormalised ProductListing rows from Product, ProductDetail, "
+        "ProductImage and Review, either for every product or for the given product ids."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "product_ids",
+            nargs="*",
+            type=int,
+            help="Only refresh these products (default: all products).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=LISTING_REFRESH_BATCH_SIZE,
+            help=f"Products refreshed per transaction (default: {LISTING_REFRESH_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+
+        product_ids = options["product_ids"] or list(
+            Product.objects.order_by("id").values_list("id", flat=True)
+        )
+
+        for batch_start in range(0, len(product_ids), options["batch_size"]):
+            product_ids_batch = product_ids[batch_start:batch_start + options["batch_size"]]
+
+            with transaction.atomic():
+                affected_category_ids = refresh_product_listings(product_ids_batch)
+
+            invalidate_cached_catalog(product_ids_batch, affected_category_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Refreshed listings for {len(product_ids)} products.")
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_alter_review_product_alter_review_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='code',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_content_hash_is_active'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['name'], name='category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productdetail',
+            index=models.Index(fields=['price', 'stock'], name='productdetail_price_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productimage',
+            index=models.Index(fields=['url'], name='productimage_url_idx'),
+        ),
+    ]
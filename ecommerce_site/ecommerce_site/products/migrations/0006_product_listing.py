@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductListing',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='products.product')),
+                ('name', models.CharField(max_length=100)),
+                ('code', models.CharField(max_length=50)),
+                ('category_name', models.CharField(max_length=100)),
+                ('image_url', models.URLField(blank=True, max_length=500)),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('total_stock', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.DecimalField(decimal_places=2, max_digits=3, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('product_created', models.DateTimeField()),
+                ('refreshed', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listings', to='products.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['is_active', 'category', '-product_created'], name='listing_category_created_idx'), models.Index(fields=['is_active', 'min_price'], name='listing_min_price_idx')],
+            },
+        ),
+    ]
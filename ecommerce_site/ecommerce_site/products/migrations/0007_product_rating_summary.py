@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_listing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='products.product')),
+                ('one_star_count', models.PositiveIntegerField(default=0)),
+                ('two_star_count', models.PositiveIntegerField(default=0)),
+                ('three_star_count', models.PositiveIntegerField(default=0)),
+                ('four_star_count', models.PositiveIntegerField(default=0)),
+                ('five_star_count', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_rating_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created', '-id'], name='product_active_created_idx'),
+        ),
+    ]
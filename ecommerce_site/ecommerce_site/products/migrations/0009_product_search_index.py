@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+def create_product_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE products_product_search USING fts5("
+        "name, category, color, material, description, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO products_product_search (rowid, name, category, color, material, description) "
+        "SELECT product.id, product.name, category.name, "
+        "COALESCE(group_concat(detail.color, ' '), ''), "
+        "COALESCE(group_concat(detail.material, ' '), ''), "
+        "COALESCE(group_concat(detail.description, ' '), '') "
+        "FROM products_product AS product "
+        "INNER JOIN products_category AS category ON category.id = product.category_id "
+        "LEFT OUTER JOIN products_productdetail AS detail ON detail.product_id = product.id "
+        "WHERE product.is_active GROUP BY product.id"
+    )
+
+
+def drop_product_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS products_product_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_active_created_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_product_search_index, drop_product_search_index),
+    ]
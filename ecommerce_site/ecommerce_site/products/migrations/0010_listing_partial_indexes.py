@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productlisting',
+            name='listing_category_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='productlisting',
+            name='listing_min_price_idx',
+        ),
+        migrations.AddIndex(
+            model_name='productlisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-product_created'], name='listing_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productlisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['min_price'], name='listing_min_price_idx'),
+        ),
+    ]
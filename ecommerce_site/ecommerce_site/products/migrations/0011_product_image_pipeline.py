@@ -0,0 +1,81 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_url_hashes_and_drop_duplicates(apps, schema_editor):
+    # Duplicate urls were possible before the unique index; the oldest row is kept.
+    ProductImage = apps.get_model("products", "ProductImage")
+    image_ids_by_url_hash = {}
+    duplicate_image_ids = []
+    hashed_images = []
+
+    for product_image in ProductImage.objects.order_by("id").only("id", "url").iterator(chunk_size=2000):
+        product_image.url_hash = hashlib.sha256(product_image.url.encode("utf-8")).hexdigest()
+
+        if product_image.url_hash in image_ids_by_url_hash:
+            duplicate_image_ids.append(product_image.id)
+        else:
+            image_ids_by_url_hash[product_image.url_hash] = product_image.id
+            hashed_images.append(product_image)
+
+    ProductImage.objects.filter(id__in=duplicate_image_ids).delete()
+    ProductImage.objects.bulk_update(hashed_images, ["url_hash"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_listing_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='url_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='processing_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='variant_paths',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(fill_url_hashes_and_drop_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='productimage',
+            name='url_hash',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.RemoveIndex(
+            model_name='productimage',
+            name='productimage_url_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='productimage',
+            constraint=models.UniqueConstraint(fields=('url_hash',), name='productimage_url_hash_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='productimage',
+            index=models.Index(condition=models.Q(('processing_status', 'PENDING')), fields=['id'], name='productimage_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_image_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productlisting',
+            index=models.Index(fields=['category', 'refreshed'], name='listing_category_refreshed_idx'),
+        ),
+    ]
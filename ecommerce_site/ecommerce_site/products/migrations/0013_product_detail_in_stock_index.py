@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_listing_category_refreshed_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productdetail',
+            index=models.Index(condition=models.Q(('stock__gt', 0)), fields=['price'], name='productdetail_in_stock_idx'),
+        ),
+    ]
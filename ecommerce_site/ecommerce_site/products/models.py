@@ -1,14 +1,22 @@
+import hashlib
+
+from django.conf import settings
 from django.db import models
 from django_extensions.db.models import TimeStampedModel
 
 from .choices import (
-    RatingChoices, SizeChoices
+    ImageProcessingStatusChoices, RatingChoices, SizeChoices
 )
 
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["name"], name="category_name_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -19,6 +27,8 @@ class Product(TimeStampedModel):
         max_length=50,
         unique=True,
     )
+    content_hash = models.CharField(max_length=64, blank=True)
+    is_active = models.BooleanField(default=True)
 
     category = models.ForeignKey(
         "products.Category",
@@ -26,15 +36,46 @@ class Product(TimeStampedModel):
         related_name="products",
     )
 
+    class Meta(TimeStampedModel.Meta):
+        indexes = [
+            models.Index(
+                fields=["-created", "-id"],
+                condition=models.Q(is_active=True),
+                name="product_active_created_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
 class ProductImage(TimeStampedModel):
+    """
+    A product image from the feed. url is the remote original; the image pipeline
+    (products.images) fills in its size and the paths of its resized variants.
+    """
+
+    # The variant listing pages show instead of the original.
+    LISTING_VARIANT = "listing"
+
     alt_text = models.CharField(max_length=100)
     url = models.URLField(
         max_length=500,
     )
+    # SHA-256 of url: a short, fixed-length key for the unique index.
+    url_hash = models.CharField(max_length=64)
+
+    processing_status = models.CharField(
+        max_length=10,
+        choices=ImageProcessingStatusChoices.choices,
+        default=ImageProcessingStatusChoices.PENDING,
+    )
+    # SHA-256 of the original's bytes, which also names its variants on disk.
+    content_hash = models.CharField(max_length=64, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    # {variant name: path under PRODUCT_IMAGE_CACHE_ROOT}
+    variant_paths = models.JSONField(default=dict, blank=True)
 
     product = models.ForeignKey(
         "products.Product",
@@ -42,8 +83,38 @@ class ProductImage(TimeStampedModel):
         related_name="images",
     )
 
+    class Meta(TimeStampedModel.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=["url_hash"], name="productimage_url_hash_unique"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(processing_status=ImageProcessingStatusChoices.PENDING),
+                name="productimage_pending_idx",
+            ),
+        ]
+
+    @staticmethod
+    def get_url_hash(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get_variant_url(variant_path):
+        return f"{settings.PRODUCT_IMAGE_CACHE_URL}{variant_path}"
+
+    def get_variant_urls(self):
+        return {
+            variant_name: self.get_variant_url(variant_path)
+            for variant_name, variant_path in self.variant_paths.items()
+        }
+
+    def save(self, *args, **kwargs):
+        self.url_hash = self.get_url_hash(self.url)
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        return f"Image {self.image} for {self.product.name}"
+        return f"Image {self.url} for {self.product.name}"
 
 
 class ProductDetail(models.Model):
@@ -61,6 +132,16 @@ class ProductDetail(models.Model):
         related_name="product_details",
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["price", "stock"], name="productdetail_price_stock_idx"),
+            models.Index(
+                fields=["price"],
+                name="productdetail_in_stock_idx",
+                condition=models.Q(stock__gt=0),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.product.name} Details"
 
@@ -83,3 +164,106 @@ class Review(models.Model):
 
     def __str__(self):
         return f"{self.rating} by {self.user.username} for {self.product.name}"
+
+
+class ProductRatingSummary(models.Model):
+    """
+    Running review counters per product, maintained by products.ratings so rating
+    display and sorting never aggregate the Review table.
+    """
+
+    product = models.OneToOneField(
+        "products.Product",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="rating_summary",
+    )
+
+    one_star_count = models.PositiveIntegerField(default=0)
+    two_star_count = models.PositiveIntegerField(default=0)
+    three_star_count = models.PositiveIntegerField(default=0)
+    four_star_count = models.PositiveIntegerField(default=0)
+    five_star_count = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+
+    RATING_COUNT_FIELDS = {
+        RatingChoices.ONE: "one_star_count",
+        RatingChoices.TWO: "two_star_count",
+        RatingChoices.THREE: "three_star_count",
+        RatingChoices.FOUR: "four_star_count",
+        RatingChoices.FIVE: "five_star_count",
+    }
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+
+        return self.rating_sum / self.rating_count
+
+    @property
+    def rating_distribution(self):
+        return {
+            rating: getattr(self, count_field_name)
+            for rating, count_field_name in self.RATING_COUNT_FIELDS.items()
+        }
+
+    def __str__(self):
+        return f"Rating summary for {self.product.name}"
+
+
+class ProductListing(models.Model):
+    """
+    Denormalised product card, kept in sync by products.listings so listing pages
+    read one indexed table instead of joining details, images and reviews.
+    """
+
+    product = models.OneToOneField(
+        "products.Product",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="listing",
+    )
+
+    name = models.CharField(max_length=100)
+    code = models.CharField(max_length=50)
+    category_name = models.CharField(max_length=100)
+    image_url = models.URLField(max_length=500, blank=True)
+
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    total_stock = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    average_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True)
+
+    is_active = models.BooleanField(default=True)
+    product_created = models.DateTimeField()
+    refreshed = models.DateTimeField(auto_now=True)
+
+    category = models.ForeignKey(
+        "products.Category",
+        on_delete=models.CASCADE,
+        related_name="listings",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["category", "-product_created"],
+                name="listing_category_created_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["min_price"],
+                name="listing_min_price_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["category", "refreshed"],
+                name="listing_category_refreshed_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} Listing"
@@ -0,0 +1,91 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def encode_cursor(instance, created_field="created"):
+    cursor_values = [getattr(instance, created_field).isoformat(), instance.pk]
+
+    return base64.urlsafe_b64encode(json.dumps(cursor_values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        created_value, instance_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        created = parse_datetime(created_value)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise InvalidPageRequest("Invalid cursor.")
+
+    if created is None or not isinstance(instance_id, int):
+        raise InvalidPageRequest("Invalid cursor.")
+
+    return created, instance_id
+
+
+def get_page_size(query_params):
+    try:
+        page_size = int(query_params.get("page_size", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise InvalidPageRequest("page_size must be an integer.")
+
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise InvalidPageRequest(f"page_size must be between 1 and {MAX_PAGE_SIZE}.")
+
+    return page_size
+
+
+def get_page_queryset(queryset, query_params, created_field="created"):
+    """
+    Returns the queryset of one newest-first page plus one extra row, which tells
+    split_page whether another page follows, and the page size.
+
+    Pages are keyed on (created_field, pk) instead of OFFSET, so every page is an
+    index range scan of the same cost no matter how deep the client has paged.
+    """
+    page_size = get_page_size(query_params)
+    queryset = queryset.order_by(f"-{created_field}", "-pk")
+
+    if query_params.get("cursor"):
+        cursor_created, cursor_id = decode_cursor(query_params["cursor"])
+        # The redundant lte bound lets the database seek the index to the cursor
+        # instead of walking it from the newest row.
+        queryset = queryset.filter(**{f"{created_field}__lte": cursor_created}).filter(
+            Q(**{f"{created_field}__lt": cursor_created}) | Q(pk__lt=cursor_id)
+        )
+
+    return queryset[:page_size + 1], page_size
+
+
+def split_page(page_items, page_size, created_field="created"):
+    next_cursor = (
+        encode_cursor(page_items[page_size - 1], created_field)
+        if len(page_items) > page_size
+        else None
+    )
+
+    return page_items[:page_size], next_cursor
+
+
+def paginate_by_created(queryset, query_params, created_field="created"):
+    """
+    Returns one newest-first page of a queryset and the cursor of the next page.
+    """
+    page_queryset, page_size = get_page_queryset(queryset, query_params, created_field)
+
+    return split_page(list(page_queryset), page_size, created_field)
+
+
+async def apaginate_by_created(queryset, query_params, created_field="created"):
+    page_queryset, page_size = get_page_queryset(queryset, query_params, created_field)
+
+    return split_page([page_item async for page_item in page_queryset], page_size, created_field)
@@ -0,0 +1,96 @@
+from django.db.models import (
+    Count, Exists, F, OuterRef, Q, Sum
+)
+
+from .models import (
+    ProductRatingSummary,
+    Review
+)
+
+RATING_SUMMARY_REBUILD_BATCH_SIZE = 500
+
+
+def apply_rating_change(product_id, rating, direction):
+    """
+    Adds (direction=1) or removes (direction=-1) one rating from a product's summary
+    with a single conditional UPDATE, so concurrent reviews never lose increments.
+
+    Only increments create a missing summary. When a product or category is
+    deleted, the cascade removes the summary before its reviews' post_delete
+    signals run, so their decrements must match no row instead of recreating one.
+    """
+    if direction == 1:
+        ProductRatingSummary.objects.bulk_create(
+            [ProductRatingSummary(product_id=product_id)], ignore_conflicts=True
+        )
+
+    count_field_name = ProductRatingSummary.RATING_COUNT_FIELDS[rating]
+
+    ProductRatingSummary.objects.filter(product_id=product_id).update(**{
+        count_field_name: F(count_field_name) + direction,
+        "rating_count": F("rating_count") + direction,
+        "rating_sum": F("rating_sum") + direction * rating,
+    })
+
+
+def remember_review_rating(review):
+    review._rating_summary_state = (review.product_id, review.rating)
+
+
+def record_review_saved(review, created):
+    previous_product_id, previous_rating = getattr(
+        review, "_rating_summary_state", (None, None)
+    )
+
+    if not created and (previous_product_id, previous_rating) == (review.product_id, review.rating):
+        return
+
+    if not created and previous_product_id is not None:
+        apply_rating_change(previous_product_id, previous_rating, -1)
+
+    apply_rating_change(review.product_id, review.rating, 1)
+    remember_review_rating(review)
+
+
+def record_review_deleted(review):
+    apply_rating_change(review.product_id, review.rating, -1)
+
+
+def rebuild_rating_summaries(product_ids=None):
+    """
+    Recomputes summaries from the Review table, for repairing drift after raw SQL or
+    bulk writes that bypassed the signals. Returns the number of summaries written.
+    """
+    reviews = Review.objects.all()
+    summaries = ProductRatingSummary.objects.all()
+
+    if product_ids is not None:
+        reviews = reviews.filter(product_id__in=product_ids)
+        summaries = summaries.filter(product_id__in=product_ids)
+
+    rating_totals = reviews.values("product_id").order_by("product_id").annotate(
+        rating_count=Count("id"),
+        rating_sum=Sum("rating"),
+        **{
+            count_field_name: Count("id", filter=Q(rating=rating))
+            for rating, count_field_name in ProductRatingSummary.RATING_COUNT_FIELDS.items()
+        }
+    )
+
+    summaries.exclude(
+        Exists(Review.objects.filter(product=OuterRef("product")))
+    ).delete()
+
+    rebuilt_summaries = [ProductRatingSummary(**rating_total) for rating_total in rating_totals]
+
+    ProductRatingSummary.objects.bulk_create(
+        rebuilt_summaries,
+        batch_size=RATING_SUMMARY_REBUILD_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=[
+            "rating_count", "rating_sum", *ProductRatingSummary.RATING_COUNT_FIELDS.values()
+        ],
+    )
+
+    return len(rebuilt_summaries)
@@ -0,0 +1,96 @@
+import threading
+
+from django.db import connection, transaction
+
+from .catalog_cache import bump_versions
+from .facets import invalidate_facet_index
+from .listings import refresh_product_listings
+from .search import get_search_backend
+
+_stale_products = threading.local()
+
+
+def invalidate_cached_catalog(product_ids, category_ids, facets_changed=True):
+    bump_versions("product", product_ids)
+    bump_versions("category", category_ids)
+
+    if facets_changed:
+        invalidate_facet_index()
+
+
+def refresh_product_projections(product_ids, category_ids=(), reindexed_product_ids=None):
+    """
+    Brings every read model derived from products (listing rows, the search index,
+    the facet index and cached catalog payloads) up to date for the given products.
+    category_ids names extra categories whose cached listings are stale, such as
+    the category of a deleted product.
+
+    The search and facet indexes only hold names, categories, sizes, colors,
+    materials, prices and active status. reindexed_product_ids (default: all of
+    product_ids) names the products where one of those may have changed; stock,
+    image and review changes leave both indexes alone, so checkout traffic does
+    not rebuild the facet index.
+    """
+    product_ids = set(product_ids)
+    reindexed_product_ids = (
+        product_ids if reindexed_product_ids is None else set(reindexed_product_ids)
+    )
+
+    affected_category_ids = refresh_product_listings(product_ids) | set(category_ids)
+
+    if reindexed_product_ids:
+        get_search_backend().index_products(reindexed_product_ids)
+
+    facets_changed = bool(reindexed_product_ids or category_ids)
+
+    # Cache versions move only after commit; bumping earlier would let a concurrent
+    # reader cache pre-commit data under the new version.
+    transaction.on_commit(
+        lambda: invalidate_cached_catalog(product_ids, affected_category_ids, facets_changed)
+    )
+
+
+def flush_stale_products():
+    stale_product_ids = _stale_products.product_ids
+    stale_category_ids = _stale_products.category_ids
+    reindexed_product_ids = _stale_products.reindexed_product_ids
+    _stale_products.product_ids = None
+    _stale_products.category_ids = None
+    _stale_products.reindexed_product_ids = None
+
+    refresh_product_projections(stale_product_ids, stale_category_ids, reindexed_product_ids)
+
+
+def mark_products_stale(product_ids, category_ids=(), reindex=True):
+    """
+    Schedules a projection refresh for the given products once the current
+    transaction commits, so a transaction touching many rows of one product
+    refreshes it once. Pass reindex=False for changes that cannot affect search
+    or facets, such as stock, images and reviews.
+    """
+    product_ids = set(product_ids)
+
+    if not connection.in_atomic_block:
+        refresh_product_projections(product_ids, category_ids, product_ids if reindex else ())
+        return
+
+    stale_product_ids = getattr(_stale_products, "product_ids", None)
+
+    # A rolled back savepoint drops its on_commit callbacks, so only reuse the pending
+    # sets while their flush is still queued.
+    if stale_product_ids is not None and any(
+        on_commit_callback is flush_stale_products
+        for _, on_commit_callback, _ in connection.run_on_commit
+    ):
+        stale_product_ids.update(product_ids)
+        _stale_products.category_ids.update(category_ids)
+
+        if reindex:
+            _stale_products.reindexed_product_ids.update(product_ids)
+
+        return
+
+    _stale_products.product_ids = product_ids
+    _stale_products.category_ids = set(category_ids)
+    _stale_products.reindexed_product_ids = set(product_ids) if reindex else set()
+    transaction.on_commit(flush_stale_products)
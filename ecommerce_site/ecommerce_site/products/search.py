@@ -0,0 +1,152 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (
+    Exists, OuterRef, Q
+)
+from django.utils.module_loading import import_string
+
+from .models import (
+    Category,
+    Product,
+    ProductDetail
+)
+
+DEFAULT_SEARCH_BACKEND = "products.search.SQLiteFTS5SearchBackend"
+SEARCH_INDEX_BATCH_SIZE = 500
+SEARCH_TERM_PATTERN = re.compile(r"\w+")
+
+
+def get_search_terms(query):
+    return SEARCH_TERM_PATTERN.findall(query.lower())
+
+
+class ProductSearchBackend:
+    """
+    Interface for product search. index_products is called with the ids of every
+    product that was created, changed or deleted; search returns ranked product ids.
+    """
+
+    def index_products(self, product_ids):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def search(self, query, limit):
+        raise NotImplementedError
+
+
+class LikeSearchBackend(ProductSearchBackend):
+    """
+    Unindexed fallback that matches every term with icontains scans. Works on any
+    database, but reads every row, so it is only meant for small catalogs.
+    """
+
+    def index_products(self, product_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit):
+        products = Product.objects.filter(is_active=True)
+
+        for search_term in get_search_terms(query):
+            products = products.filter(
+                Q(name__icontains=search_term)
+                | Q(category__name__icontains=search_term)
+                | Exists(
+                    ProductDetail.objects.filter(product=OuterRef("pk")).filter(
+                        Q(color__icontains=search_term)
+                        | Q(material__icontains=search_term)
+                        | Q(description__icontains=search_term)
+                    )
+                )
+            )
+
+        return list(products.order_by("-created", "-id").values_list("id", flat=True)[:limit])
+
+
+class SQLiteFTS5SearchBackend(ProductSearchBackend):
+    """
+    Ranked prefix search over an FTS5 table whose rowid is the product id. Rows are
+    rebuilt from SQL in one statement per batch, so indexing never loads models.
+    """
+
+    SEARCH_TABLE = "products_product_search"
+    # bm25 weights for name, category, color, material and description.
+    COLUMN_WEIGHTS = (10.0, 5.0, 3.0, 3.0, 1.0)
+
+    def get_index_source_sql(self):
+        return f"""
+            SELECT product.id, product.name, category.name,
+                   COALESCE(group_concat(detail.color, ' '), ''),
+                   COALESCE(group_concat(detail.material, ' '), ''),
+                   COALESCE(group_concat(detail.description, ' '), '')
+            FROM {Product._meta.db_table} AS product
+            INNER JOIN {Category._meta.db_table} AS category
+                ON category.id = product.category_id
+            LEFT OUTER JOIN {ProductDetail._meta.db_table} AS detail
+                ON detail.product_id = product.id
+            WHERE product.is_active
+        """
+
+    def index_products(self, product_ids):
+        product_ids = sorted(product_ids)
+
+        for batch_start in range(0, len(product_ids), SEARCH_INDEX_BATCH_SIZE):
+            product_ids_batch = product_ids[batch_start:batch_start + SEARCH_INDEX_BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(product_ids_batch))
+
+            # Concurrent refreshes of one product would otherwise both delete and then
+            # both insert its rowid.
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {self.SEARCH_TABLE} WHERE rowid IN ({placeholders})",
+                    product_ids_batch,
+                )
+                cursor.execute(
+                    f"INSERT INTO {self.SEARCH_TABLE} "
+                    f"(rowid, name, category, color, material, description) "
+                    f"{self.get_index_source_sql()} AND product.id IN ({placeholders}) "
+                    f"GROUP BY product.id",
+                    product_ids_batch,
+                )
+
+    def rebuild(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.SEARCH_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {self.SEARCH_TABLE} "
+                f"(rowid, name, category, color, material, description) "
+                f"{self.get_index_source_sql()} GROUP BY product.id"
+            )
+
+    def get_match_expression(self, query):
+        # Quoting each term keeps FTS5 operators in user input from being parsed;
+        # the trailing * makes every term a prefix match.
+        return " AND ".join(f'"{search_term}"*' for search_term in get_search_terms(query))
+
+    def search(self, query, limit):
+        match_expression = self.get_match_expression(query)
+
+        if not match_expression:
+            return []
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.SEARCH_TABLE} WHERE {self.SEARCH_TABLE} MATCH %s "
+                f"ORDER BY bm25({self.SEARCH_TABLE}, {', '.join(map(str, self.COLUMN_WEIGHTS))}) "
+                f"LIMIT %s",
+                [match_expression, limit],
+            )
+
+            return [product_id for (product_id,) in cursor.fetchall()]
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    return import_string(getattr(settings, "PRODUCT_SEARCH_BACKEND", DEFAULT_SEARCH_BACKEND))()
@@ -0,0 +1,68 @@
+from django.db.models import Prefetch
+
+from .models import (
+    Product,
+    ProductDetail,
+    ProductImage
+)
+
+
+def get_catalog_product_queryset():
+    return Product.objects.filter(is_active=True).select_related("category").prefetch_related(
+        Prefetch("product_details", queryset=ProductDetail.objects.order_by("id")),
+        Prefetch("images", queryset=ProductImage.objects.order_by("id")),
+    )
+
+
+def serialize_catalog_product(product):
+    return {
+        "id": product.id,
+        "code": product.code,
+        "name": product.name,
+        "category": product.category.name,
+        "created": product.created.isoformat(),
+        "details": [
+            {
+                "size": product_detail.size,
+                "material": product_detail.material,
+                "color": product_detail.color,
+                "price": str(product_detail.price),
+                "stock": product_detail.stock,
+            }
+            for product_detail in product.product_details.all()
+        ],
+        "images": serialize_product_images(product.images.all()),
+    }
+
+
+def serialize_product_images(product_images):
+    return [
+        {
+            "url": product_image.url,
+            "alt_text": product_image.alt_text,
+            "width": product_image.width,
+            "height": product_image.height,
+            "variants": product_image.get_variant_urls(),
+        }
+        for product_image in product_images
+    ]
+
+
+def serialize_product_listing(product_listing):
+    return {
+        "id": product_listing.product_id,
+        "code": product_listing.code,
+        "name": product_listing.name,
+        "category": product_listing.category_name,
+        "image_url": product_listing.image_url,
+        "min_price": str(product_listing.min_price) if product_listing.min_price is not None else None,
+        "max_price": str(product_listing.max_price) if product_listing.max_price is not None else None,
+        "total_stock": product_listing.total_stock,
+        "review_count": product_listing.review_count,
+        "average_rating": (
+            str(product_listing.average_rating)
+            if product_listing.average_rating is not None
+            else None
+        ),
+        "created": product_listing.product_created.isoformat(),
+    }
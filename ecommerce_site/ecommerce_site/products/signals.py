@@ -0,0 +1,78 @@
+from django.db.models.signals import (
+    post_delete, post_init, post_save
+)
+from django.dispatch import receiver
+
+from .models import (
+    Category,
+    Product,
+    ProductDetail,
+    ProductImage,
+    Review
+)
+from .ratings import (
+    record_review_deleted,
+    record_review_saved,
+    remember_review_rating
+)
+from .refresh import mark_products_stale
+
+
+@receiver(post_init, sender=Review)
+def remember_loaded_review_rating(sender, instance, **kwargs):
+    remember_review_rating(instance)
+
+
+@receiver(post_save, sender=Review)
+def count_saved_review_rating(sender, instance, created, **kwargs):
+    record_review_saved(instance, created)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_deleted_review_rating(sender, instance, **kwargs):
+    record_review_deleted(instance)
+
+
+@receiver(post_save, sender=Product)
+def refresh_saved_product(sender, instance, **kwargs):
+    mark_products_stale([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def refresh_deleted_product(sender, instance, **kwargs):
+    # The listing row is already gone by now, so its category is passed explicitly.
+    mark_products_stale([instance.pk], category_ids=[instance.category_id])
+
+
+@receiver(post_save, sender=ProductDetail)
+def refresh_product_of_saved_detail(sender, instance, update_fields=None, **kwargs):
+    # A stock-only save cannot change what search and facets index.
+    mark_products_stale(
+        [instance.product_id], reindex=update_fields is None or set(update_fields) != {"stock"}
+    )
+
+
+@receiver(post_delete, sender=ProductDetail)
+def refresh_product_of_deleted_detail(sender, instance, **kwargs):
+    mark_products_stale([instance.product_id])
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_related_product(sender, instance, **kwargs):
+    mark_products_stale([instance.product_id], reindex=False)
+
+
+@receiver(post_save, sender=Category)
+def refresh_products_of_renamed_category(sender, instance, created, **kwargs):
+    if not created:
+        mark_products_stale(
+            instance.products.values_list("id", flat=True), category_ids=[instance.pk]
+        )
+
+
+@receiver(post_delete, sender=Category)
+def refresh_deleted_category(sender, instance, **kwargs):
+    mark_products_stale([], category_ids=[instance.pk])
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import (
+    Count, Max, Q
+)
+from django.utils import timezone
+
+from .images import write_file_atomically
+from .models import (
+    Category,
+    ProductListing
+)
+from .serializers import (
+    get_catalog_product_queryset,
+    serialize_catalog_product
+)
+
+SNAPSHOT_MANIFEST_NAME = "manifest.json"
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_PAGE_SIZE = 50
+
+
+def encode_snapshot(snapshot_data):
+    return json.dumps(snapshot_data, cls=DjangoJSONEncoder, separators=(",", ":")).encode("utf-8")
+
+
+def get_snapshot_digest(snapshot_bytes):
+    return hashlib.sha256(snapshot_bytes).hexdigest()[:32]
+
+
+def get_category_fingerprints():
+    """
+    Returns {category_id: fingerprint} for every category with products, from one
+    grouped query over ProductListing.
+
+    Every product change (its details, stock, images, reviews, or the product
+    itself) reaches the catalog through a listing refresh, so the newest
+    `refreshed` time and the active product count of a category change whenever
+    any of its pages would.
+    """
+    return {
+        category_fingerprint["category_id"]: (
+            f"{category_fingerprint['category__name']}|"
+            f"{category_fingerprint['last_refreshed'].isoformat()}|"
+            f"{category_fingerprint['active_products']}"
+        )
+        for category_fingerprint in ProductListing.objects.values("category_id", "category__name")
+        .annotate(
+            last_refreshed=Max("refreshed"),
+            active_products=Count("product_id", filter=Q(is_active=True)),
+        )
+        .order_by()
+    }
+
+
+def serialize_snapshot_product(product):
+    rating_summary = getattr(product, "rating_summary", None)
+
+    return {
+        **serialize_catalog_product(product),
+        "rating": {
+            "count": rating_summary.rating_count if rating_summary else 0,
+            "average": (
+                round(rating_summary.average_rating, 2)
+                if rating_summary and rating_summary.rating_count
+                else None
+            ),
+            "distribution": rating_summary.rating_distribution if rating_summary else {},
+        },
+    }
+
+
+def get_category_page_path(category_id, page_number, page_digest):
+    # Named by content, so a page file never changes once written.
+    return f"categories/{category_id}/page-{page_number}-{page_digest}.json"
+
+
+def export_category(snapshot_root, category, page_size):
+    """
+    Writes the category's active products, newest first, as pages of page_size
+    and returns their manifest entries.
+    """
+    category_products = (
+        get_catalog_product_queryset()
+        .filter(category=category)
+        .select_related("rating_summary")
+        .order_by("-created", "-id")
+    )
+    pages = []
+    page_products = []
+
+    def write_page():
+        page_number = len(pages) + 1
+        page_bytes = encode_snapshot({
+            "category": {"id": category.id, "name": category.name},
+            "page": page_number,
+            "results": page_products,
+        })
+        page_digest = get_snapshot_digest(page_bytes)
+        page_path = get_category_page_path(category.id, page_number, page_digest)
+
+        if not (snapshot_root / page_path).exists():
+            write_file_atomically(snapshot_root / page_path, page_bytes)
+
+        pages.append({
+            "path": page_path,
+            "etag": f'"{page_digest}"',
+            "products": len(page_products),
+        })
+
+    for product in category_products.iterator(chunk_size=page_size):
+        page_products.append(serialize_snapshot_product(product))
+
+        if len(page_products) == page_size:
+            write_page()
+            page_products = []
+
+    if page_products or not pages:
+        write_page()
+
+    return pages
+
+
+def read_snapshot_manifest(snapshot_root):
+    try:
+        return json.loads((snapshot_root / SNAPSHOT_MANIFEST_NAME).read_bytes())
+    except (OSError, ValueError):
+        return {"categories": {}}
+
+
+def remove_unlisted_pages(snapshot_root, category_id, category_pages):
+    listed_page_paths = {snapshot_root / category_page["path"] for category_page in category_pages}
+
+    for page_path in (snapshot_root / "categories" / category_id).glob("page-*.json"):
+        if page_path not in listed_page_paths:
+            page_path.unlink()
+
+
+def export_catalog_snapshot(snapshot_root, page_size=SNAPSHOT_PAGE_SIZE, full=False):
+    """
+    Brings the static catalog snapshot under snapshot_root up to date and returns
+    (exported, unchanged, removed) category counts.
+
+    Each category is exported as compact JSON pages under
+    categories/<id>/page-<n>-<digest>.json, named by their content, and
+    manifest.json, which lists every page with its ETag, is replaced last. Pages
+    are never rewritten in place: a reader holding the previous manifest keeps
+    getting the bytes its ETags describe until the pages that manifest alone
+    lists are pruned, right after the swap. Categories whose fingerprint matches
+    the previous manifest are left untouched, unless full is set or the page
+    size changed.
+    """
+    snapshot_root = Path(snapshot_root)
+    previous_manifest = read_snapshot_manifest(snapshot_root)
+    reuse_previous_pages = not full and (
+        previous_manifest.get("version") == SNAPSHOT_FORMAT_VERSION
+        and previous_manifest.get("page_size") == page_size
+    )
+
+    category_fingerprints = get_category_fingerprints()
+    categories_by_id = Category.objects.in_bulk(category_fingerprints)
+    manifest_categories = {}
+    exported_category_ids = []
+    unchanged_categories_counter = 0
+
+    for category_id, category_fingerprint in sorted(category_fingerprints.items()):
+        previous_category_entry = previous_manifest["categories"].get(str(category_id))
+
+        if (
+            reuse_previous_pages
+            and previous_category_entry
+            and previous_category_entry["fingerprint"] == category_fingerprint
+        ):
+            manifest_categories[str(category_id)] = previous_category_entry
+            unchanged_categories_counter += 1
+            continue
+
+        category_pages = export_category(snapshot_root, categories_by_id[category_id], page_size)
+        manifest_categories[str(category_id)] = {
+            "name": categories_by_id[category_id].name,
+            "fingerprint": category_fingerprint,
+            "products": sum(category_page["products"] for category_page in category_pages),
+            "pages": category_pages,
+        }
+        exported_category_ids.append(str(category_id))
+
+    removed_category_ids = set(previous_manifest["categories"]) - set(manifest_categories)
+
+    write_file_atomically(
+        snapshot_root / SNAPSHOT_MANIFEST_NAME,
+        encode_snapshot({
+            "version": SNAPSHOT_FORMAT_VERSION,
+            "generated": timezone.now(),
+            "page_size": page_size,
+            "categories": manifest_categories,
+        }),
+    )
+
+    # Superseded pages are deleted only once the new manifest no longer lists them.
+    for exported_category_id in exported_category_ids:
+        remove_unlisted_pages(
+            snapshot_root, exported_category_id, manifest_categories[exported_category_id]["pages"]
+        )
+
+    for removed_category_id in removed_category_ids:
+        shutil.rmtree(snapshot_root / "categories" / removed_category_id, ignore_errors=True)
+
+    return len(exported_category_ids), unchanged_categories_counter, len(removed_category_ids)
@@ -0,0 +1,522 @@
+import json
+import tempfile
+import unittest
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import (
+    connection, transaction
+)
+from django.test import (
+    SimpleTestCase, TestCase
+)
+from django.urls import reverse
+
+from products.catalog_cache import (
+    get_cache_statistics,
+    get_catalog_cache
+)
+from products.catalog_import.reader import iter_product_records
+from products.choices import SizeChoices
+from products.facets import (
+    get_facet_index_version,
+    invalidate_facet_index
+)
+from products.images import (
+    HTTPImageSource,
+    ImageFetchError
+)
+from products.models import (
+    Category,
+    Product,
+    ProductDetail,
+    ProductImage,
+    ProductRatingSummary,
+    Review
+)
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "Reads SQLite's EXPLAIN QUERY PLAN output.")
+class HotQueryIndexTests(TestCase):
+    def assertUsesIndex(self, queryset, index_name):
+        query_plan = queryset.explain()
+
+        self.assertIn(f"INDEX {index_name}", query_plan)
+        self.assertNotIn("USE TEMP B-TREE", query_plan)
+
+    def test_product_detail_price_range_uses_index(self):
+        self.assertUsesIndex(
+            ProductDetail.objects.filter(price__gte=100, price__lte=500),
+            "productdetail_price_stock_idx",
+        )
+
+    def test_product_detail_in_stock_filters_use_index(self):
+        self.assertUsesIndex(ProductDetail.objects.filter(stock__gt=0), "productdetail_in_stock_idx")
+        self.assertUsesIndex(
+            ProductDetail.objects.filter(stock__gt=0, price__gte=100, price__lte=500),
+            "productdetail_in_stock_idx",
+        )
+
+    def test_image_url_lookup_uses_index(self):
+        self.assertUsesIndex(
+            ProductImage.objects.filter(url_hash=ProductImage.get_url_hash("https://example.com/a.jpg")),
+            "sqlite_autoindex_products_productimage_1",
+        )
+
+    def test_category_name_lookup_uses_index(self):
+        self.assertUsesIndex(Category.objects.filter(name="Shirts"), "category_name_idx")
+
+
+class ProductRatingSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="reviewer", email="reviewer@example.com", password="password"
+        )
+
+    def create_reviewed_product(self, category, code, ratings):
+        product = Product.objects.create(name=code, code=code, category=category)
+
+        for rating in ratings:
+            Review.objects.create(rating=rating, comment="", product=product, user=self.user)
+
+        return product
+
+    def test_review_delete_uncounts_rating(self):
+        product = self.create_reviewed_product(Category.objects.create(name="Shirts"), "P-1", [3, 5])
+
+        Review.objects.filter(product=product, rating=5).get().delete()
+
+        rating_summary = ProductRatingSummary.objects.get(product=product)
+        self.assertEqual(rating_summary.rating_count, 1)
+        self.assertEqual(rating_summary.five_star_count, 0)
+        self.assertEqual(rating_summary.three_star_count, 1)
+
+    def test_product_delete_cascades_through_reviews(self):
+        product = self.create_reviewed_product(Category.objects.create(name="Shirts"), "P-1", [3, 3])
+
+        product.delete()
+
+        self.assertFalse(ProductRatingSummary.objects.exists())
+        self.assertFalse(Review.objects.exists())
+
+    def test_category_delete_cascades_through_reviews(self):
+        category = Category.objects.create(name="Shirts")
+        self.create_reviewed_product(category, "P-1", [5, 5])
+        self.create_reviewed_product(category, "P-2", [1, 4])
+
+        category.delete()
+
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(ProductRatingSummary.objects.exists())
+
+
+class CatalogProductListQueryCountTests(TestCase):
+    # Products, then their details and their images, each in one query.
+    QUERIES_PER_PAGE = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        for category_name in ("Shirts", "Trousers"):
+            category = Category.objects.create(name=category_name)
+
+            for product_number in range(12):
+                product = Product.objects.create(
+                    name=f"{category_name} {product_number}",
+                    code=f"{category_name}-{product_number}",
+                    category=category,
+                )
+
+                for size, color in ((SizeChoices.S, "Red"), (SizeChoices.L, "Blue")):
+                    ProductDetail.objects.create(
+                        size=size,
+                        material="Cotton",
+                        color=color,
+                        stock=product_number,
+                        price=Decimal(1000 + 100 * product_number),
+                        description="",
+                        product=product,
+                    )
+
+                for image_number in range(2):
+                    ProductImage.objects.create(
+                        alt_text="",
+                        url=f"https://example.com/{product.code}/{image_number}.jpg",
+                        product=product,
+                    )
+
+    def walk_pages(self, query_params):
+        walked_products_counter = 0
+        cursor = ""
+
+        while True:
+            with self.assertNumQueries(self.QUERIES_PER_PAGE):
+                response = self.client.get(
+                    reverse("products:catalog-product-list"),
+                    {**query_params, "page_size": 5, "cursor": cursor},
+                )
+
+            self.assertEqual(response.status_code, 200)
+            walked_products_counter += len(response.json()["results"])
+            cursor = response.json()["next_cursor"]
+
+            if cursor is None:
+                return walked_products_counter
+
+    def test_queries_per_page_are_constant(self):
+        for query_params, expected_products_counter in (
+            ({}, 24),
+            ({"category": "shirts"}, 12),
+            ({"size": SizeChoices.L, "color": "blue"}, 24),
+            ({"category": "Trousers", "min_price": "1500", "max_price": "2000"}, 6),
+        ):
+            with self.subTest(query_params=query_params):
+                self.assertEqual(self.walk_pages(query_params), expected_products_counter)
+
+    def test_invalid_prices_are_rejected(self):
+        for price in ("abc", "NaN", "sNaN", "Infinity", "-inf"):
+            with self.subTest(price=price):
+                response = self.client.get(reverse("products:catalog-product-list"), {"min_price": price})
+
+                self.assertEqual(response.status_code, 400)
+
+
+class CatalogFacetCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        shirts = Category.objects.create(name="Shirts")
+        trousers = Category.objects.create(name="Trousers")
+
+        for code, category, details in (
+            ("S-1", shirts, [(SizeChoices.S, "Red", "1500"), (SizeChoices.L, "Blue", "2500")]),
+            ("S-2", shirts, [(SizeChoices.S, "Blue", "3000")]),
+            ("T-1", trousers, [(SizeChoices.L, "Blue", "5000")]),
+        ):
+            product = Product.objects.create(name=code, code=code, category=category)
+
+            for size, color, price in details:
+                ProductDetail.objects.create(
+                    size=size,
+                    material="Cotton",
+                    color=color,
+                    stock=1,
+                    price=Decimal(price),
+                    description="",
+                    product=product,
+                )
+
+    def setUp(self):
+        invalidate_facet_index()
+
+    def get_listed_products_counter(self, query_params):
+        return len(
+            self.client.get(reverse("products:catalog-product-list"), query_params).json()["results"]
+        )
+
+    def test_totals_match_the_catalog_list(self):
+        for query_params in (
+            {},
+            {"size": SizeChoices.S, "color": "Blue"},
+            {"size": SizeChoices.L, "color": "Red"},
+            {"category": "shirts"},
+            {"category": "SHIRTS", "color": "blue"},
+            {"material": "cotton", "min_price": "2000", "max_price": "3000"},
+            {"size": SizeChoices.S, "max_price": "1500"},
+        ):
+            with self.subTest(query_params=query_params):
+                response = self.client.get(reverse("products:catalog-facet-counts"), query_params)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json()["total"], self.get_listed_products_counter(query_params)
+                )
+
+    def test_value_counts_need_one_detail_matching_every_filter(self):
+        facet_counts = self.client.get(
+            reverse("products:catalog-facet-counts"), {"size": SizeChoices.S}
+        ).json()["facets"]
+
+        self.assertEqual(facet_counts["color"], {"Blue": 1, "Red": 1})
+        self.assertEqual(facet_counts["category"], {"Shirts": 2})
+
+    def test_invalid_price_is_rejected(self):
+        response = self.client.get(reverse("products:catalog-facet-counts"), {"min_price": "NaN"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class FacetIndexInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="reviewer", email="reviewer@example.com", password="password"
+        )
+
+        # Flush the refresh queued by these saves, so each test queues its own.
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.product = Product.objects.create(
+                name="S-1", code="S-1", category=Category.objects.create(name="Shirts")
+            )
+            cls.product_detail = ProductDetail.objects.create(
+                size=SizeChoices.S,
+                material="Cotton",
+                color="Red",
+                stock=5,
+                price=Decimal("1500"),
+                description="",
+                product=cls.product,
+            )
+
+    def assertFacetIndexInvalidated(self, expected_invalidated, change_product):
+        facet_index_version = get_facet_index_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            change_product()
+
+        self.assertEqual(get_facet_index_version() != facet_index_version, expected_invalidated)
+
+    def test_stock_images_and_reviews_keep_facet_index(self):
+        def save_stock():
+            self.product_detail.stock = 4
+            self.product_detail.save(update_fields=["stock"])
+
+        for change_product in (
+            save_stock,
+            lambda: ProductImage.objects.create(
+                alt_text="", url="https://example.com/S-1.jpg", product=self.product
+            ),
+            lambda: Review.objects.create(rating=4, comment="", product=self.product, user=self.user),
+        ):
+            with self.subTest(change_product=change_product):
+                self.assertFacetIndexInvalidated(False, change_product)
+
+    def test_indexed_detail_fields_invalidate_facet_index(self):
+        for field, value in (("price", Decimal("2500")), ("color", "Blue")):
+            with self.subTest(field=field):
+                setattr(self.product_detail, field, value)
+                self.assertFacetIndexInvalidated(True, self.product_detail.save)
+
+    def test_deactivating_product_invalidates_facet_index(self):
+        self.product.is_active = False
+
+        self.assertFacetIndexInvalidated(True, self.product.save)
+
+
+class CatalogDeltaImportTests(TestCase):
+    def setUp(self):
+        feed_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(feed_directory.cleanup)
+        self.feed_path = Path(feed_directory.name) / "catalog.json"
+
+    def get_product_json_record(self, code, price):
+        return {
+            "product_code": code,
+            "product_name": f"Cotton Shirt {code}",
+            "product_price": f"PKR {price}",
+            "product_info": ["Red", "Cotton"],
+            "product_images": [],
+        }
+
+    def import_feed(self, product_json_records):
+        self.feed_path.write_text(json.dumps(product_json_records), encoding="utf-8")
+        output = StringIO()
+        call_command(
+            "load_product_catalog_json_and_populate_models",
+            file=self.feed_path,
+            bulk=True,
+            delta=True,
+            stdout=output,
+        )
+
+        return output.getvalue()
+
+    def test_rerun_writes_only_changed_products(self):
+        product_json_records = [
+            self.get_product_json_record("A", "1,500"),
+            self.get_product_json_record("B", "2,000"),
+        ]
+
+        self.assertIn("Successfully imported 2/2 products.", self.import_feed(product_json_records))
+
+        rerun_output = self.import_feed(product_json_records)
+
+        self.assertIn("Successfully imported 0/2 products.", rerun_output)
+        self.assertIn("Skipped 2 unchanged products.", rerun_output)
+
+        product_json_records[1] = self.get_product_json_record("B", "2,500")
+        changed_output = self.import_feed(product_json_records)
+
+        self.assertIn("Successfully imported 1/2 products.", changed_output)
+        self.assertIn("Skipped 1 unchanged products.", changed_output)
+        self.assertEqual(ProductDetail.objects.get(product__code="B").price, Decimal("2500"))
+
+
+class ConditionalCatalogGetTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="reviewer", email="reviewer@example.com", password="password"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(
+                name="S-1", code="S-1", category=Category.objects.create(name="Shirts")
+            )
+            self.product_detail = ProductDetail.objects.create(
+                size=SizeChoices.S,
+                material="Cotton",
+                color="Red",
+                stock=5,
+                price=Decimal("1500"),
+                description="",
+                product=self.product,
+            )
+
+        self.detail_url = reverse("products:catalog-product-detail", args=[self.product.pk])
+
+    def get_etag(self):
+        response = self.client.get(self.detail_url)
+
+        self.assertEqual(response.status_code, 200)
+
+        return response.headers["ETag"]
+
+    def test_repeat_get_with_etag_is_not_modified(self):
+        etag = self.get_etag()
+
+        response = self.client.get(self.detail_url, headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_related_changes_give_new_etag(self):
+        def save_price():
+            self.product_detail.price = Decimal("1800")
+            self.product_detail.save()
+
+        for change_product in (
+            lambda: Review.objects.create(rating=4, comment="", product=self.product, user=self.user),
+            lambda: ProductImage.objects.create(
+                alt_text="", url="https://example.com/S-1.jpg", product=self.product
+            ),
+            save_price,
+        ):
+            with self.subTest(change_product=change_product):
+                etag = self.get_etag()
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    change_product()
+
+                self.assertNotEqual(self.get_etag(), etag)
+                self.assertEqual(
+                    self.client.get(self.detail_url, headers={"if-none-match": etag}).status_code,
+                    200,
+                )
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        get_catalog_cache().clear()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(
+                name="S-1", code="S-1", category=Category.objects.create(name="Shirts")
+            )
+            self.product_detail = ProductDetail.objects.create(
+                size=SizeChoices.S,
+                material="Cotton",
+                color="Red",
+                stock=5,
+                price=Decimal("1500"),
+                description="",
+                product=self.product,
+            )
+
+        self.client.get(reverse("products:catalog-product-detail", args=[self.product.pk]))
+
+    def get_detail_lookup(self):
+        cache_hits_counter = get_cache_statistics()["hits"]
+        response = self.client.get(reverse("products:catalog-product-detail", args=[self.product.pk]))
+        cache_lookup = "hits" if get_cache_statistics()["hits"] > cache_hits_counter else "misses"
+
+        return cache_lookup, response.json()
+
+    def test_warm_read_hits(self):
+        self.assertEqual(self.get_detail_lookup()[0], "hits")
+
+    def test_related_save_misses(self):
+        self.product_detail.price = Decimal("1800")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product_detail.save()
+
+        cache_lookup, product_payload = self.get_detail_lookup()
+
+        self.assertEqual(cache_lookup, "misses")
+        self.assertEqual(Decimal(product_payload["details"][0]["price"]), Decimal("1800"))
+
+    def test_rolled_back_edit_keeps_cache_warm(self):
+        self.product_detail.price = Decimal("1800")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.product_detail.save()
+                transaction.set_rollback(True)
+
+        self.assertEqual(self.get_detail_lookup()[0], "hits")
+
+    def test_statistics_need_staff(self):
+        statistics_url = reverse("products:catalog-cache-statistics")
+
+        self.assertEqual(self.client.get(statistics_url).status_code, 403)
+
+        self.client.force_login(
+            get_user_model().objects.create_user(
+                username="staff", email="staff@example.com", password="password", is_staff=True
+            )
+        )
+
+        self.assertEqual(self.client.get(statistics_url).json(), get_cache_statistics())
+
+
+class CatalogFeedReaderTests(SimpleTestCase):
+    READ_SIZES = (1, 2, 3, 7, 64)
+
+    def read_feed(self, feed_text, read_size):
+        return list(iter_product_records(StringIO(feed_text), read_size))
+
+    def test_array_items_split_across_reads(self):
+        for feed_text, expected_records in (
+            ('[1.5,"ab"]', [1.5, "ab"]),
+            ("[-1e5,2]", [-100000.0, 2]),
+            (
+                ' [ 12 , -0.25e-3 ,{"code": "A", "tags": [1, 2]}, true ] ',
+                [12, -0.00025, {"code": "A", "tags": [1, 2]}, True],
+            ),
+            ("[]", []),
+        ):
+            for read_size in self.READ_SIZES:
+                with self.subTest(feed_text=feed_text, read_size=read_size):
+                    self.assertEqual(self.read_feed(feed_text, read_size), expected_records)
+
+    def test_json_lines(self):
+        self.assertEqual(
+            self.read_feed('\n{"code": "A"}\n\n{"code": "B"}\n', 1), [{"code": "A"}, {"code": "B"}]
+        )
+
+    def test_invalid_feeds_raise(self):
+        for feed_text in ("", "  \n", "[1,", "[1 2]", '{"code": "A"}\n{"code"'):
+            for read_size in self.READ_SIZES:
+                with self.subTest(feed_text=feed_text, read_size=read_size):
+                    with self.assertRaises(json.JSONDecodeError):
+                        self.read_feed(feed_text, read_size)
+
+
+class HTTPImageSourceTests(SimpleTestCase):
+    def test_non_http_urls_are_refused_before_opening(self):
+        for image_url in ("file:///etc/passwd", "FTP://example.com/a.jpg", "data:image/png;base64,AA=="):
+            with self.subTest(image_url=image_url):
+                with self.assertRaisesMessage(ImageFetchError, "is not an http or https url"):
+                    HTTPImageSource().fetch(image_url)
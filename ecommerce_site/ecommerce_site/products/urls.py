@@ -0,0 +1,23 @@
+from django.urls import path
+
+from . import views
+
+app_name = "products"
+
+urlpatterns = [
+    path("", views.catalog_product_list, name="catalog-product-list"),
+    path("search/", views.catalog_product_search, name="catalog-product-search"),
+    path("facets/", views.catalog_facet_counts, name="catalog-facet-counts"),
+    path("cache-stats/", views.catalog_cache_statistics, name="catalog-cache-statistics"),
+    path(
+        "categories/<int:category_id>/",
+        views.catalog_category_listing,
+        name="catalog-category-listing",
+    ),
+    path("<int:product_id>/", views.catalog_product_detail, name="catalog-product-detail"),
+    path(
+        "<int:product_id>/images/",
+        views.catalog_product_images,
+        name="catalog-product-images",
+    ),
+]
@@ -0,0 +1,239 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import (
+    Exists, OuterRef
+)
+from django.http import (
+    Http404, JsonResponse
+)
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.http import require_GET
+
+from ecommerce_site.access import staff_required_json
+
+from .catalog_cache import (
+    aget_or_build,
+    get_cache_statistics
+)
+from .conditional import (
+    aget_category_listing_validators,
+    aget_product_validators,
+    conditional_get
+)
+from .facets import (
+    FacetIndex,
+    get_facet_index
+)
+from .models import (
+    Category,
+    Product,
+    ProductDetail,
+    ProductImage,
+    ProductListing
+)
+from .pagination import (
+    InvalidPageRequest,
+    apaginate_by_created,
+    get_page_size
+)
+from .search import get_search_backend
+from .serializers import (
+    get_catalog_product_queryset,
+    serialize_catalog_product,
+    serialize_product_images,
+    serialize_product_listing
+)
+
+PRODUCT_DETAIL_FILTERS = {
+    "size": "size",
+    "color": "color__iexact",
+    "material": "material__iexact",
+    "min_price": "price__gte",
+    "max_price": "price__lte",
+}
+
+
+def get_price_filter_value(query_params, query_param):
+    try:
+        price = Decimal(query_params[query_param])
+    except InvalidOperation:
+        raise InvalidPageRequest(f"{query_param} must be a number.")
+
+    # Decimal accepts NaN and Infinity, which no price column can be compared with.
+    if not price.is_finite():
+        raise InvalidPageRequest(f"{query_param} must be a finite number.")
+
+    return price
+
+
+def get_product_detail_filters(query_params):
+    product_detail_filters = {}
+
+    for query_param, lookup in PRODUCT_DETAIL_FILTERS.items():
+        if not query_params.get(query_param):
+            continue
+
+        filter_value = query_params[query_param]
+
+        if lookup.startswith("price"):
+            filter_value = get_price_filter_value(query_params, query_param)
+
+        product_detail_filters[lookup] = filter_value
+
+    return product_detail_filters
+
+
+def get_catalog_queryset(query_params):
+    products = get_catalog_product_queryset()
+
+    if query_params.get("category"):
+        products = products.filter(category__name__iexact=query_params["category"])
+
+    product_detail_filters = get_product_detail_filters(query_params)
+
+    # A correlated EXISTS keeps one row per product, where a join would need DISTINCT.
+    if product_detail_filters:
+        products = products.filter(
+            Exists(ProductDetail.objects.filter(product=OuterRef("pk"), **product_detail_filters))
+        )
+
+    return products
+
+
+async def abuild_product_detail_payload(product_id):
+    # Http404 escapes aget_or_build before anything is cached, so a product that
+    # appears later is served straight away.
+    return serialize_catalog_product(
+        await aget_object_or_404(get_catalog_product_queryset(), pk=product_id)
+    )
+
+
+async def abuild_product_images_payload(product_id):
+    if not await Product.objects.filter(pk=product_id, is_active=True).aexists():
+        raise Http404("No Product matches the given query.")
+
+    return serialize_product_images(
+        [
+            product_image
+            async for product_image in ProductImage.objects.filter(product_id=product_id).order_by("id")
+        ]
+    )
+
+
+async def abuild_category_listing_payload(category_id, query_params):
+    if not await Category.objects.filter(pk=category_id).aexists():
+        raise Http404("No Category matches the given query.")
+
+    product_listings, next_cursor = await apaginate_by_created(
+        ProductListing.objects.filter(category_id=category_id, is_active=True),
+        query_params,
+        created_field="product_created",
+    )
+
+    return {
+        "results": [serialize_product_listing(product_listing) for product_listing in product_listings],
+        "next_cursor": next_cursor,
+    }
+
+
+# The catalog reads are async views: under ASGI a slow client holds a coroutine
+# rather than a worker thread, and queries run through the async ORM.
+@require_GET
+async def catalog_product_list(request):
+    try:
+        products, next_cursor = await apaginate_by_created(
+            get_catalog_queryset(request.GET), request.GET
+        )
+    except InvalidPageRequest as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    return JsonResponse({
+        "results": [serialize_catalog_product(product) for product in products],
+        "next_cursor": next_cursor,
+    })
+
+
+@require_GET
+def catalog_product_search(request):
+    try:
+        page_size = get_page_size(request.GET)
+    except InvalidPageRequest as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    ranked_product_ids = get_search_backend().search(request.GET.get("q", ""), page_size)
+    products_by_id = get_catalog_product_queryset().in_bulk(ranked_product_ids)
+
+    return JsonResponse({
+        "results": [
+            serialize_catalog_product(products_by_id[product_id])
+            for product_id in ranked_product_ids
+            if product_id in products_by_id
+        ],
+    })
+
+
+@require_GET
+@conditional_get(aget_product_validators)
+async def catalog_product_detail(request, product_id):
+    return JsonResponse(
+        await aget_or_build(
+            "product", product_id, "detail", lambda: abuild_product_detail_payload(product_id)
+        )
+    )
+
+
+@require_GET
+@conditional_get(aget_product_validators)
+async def catalog_product_images(request, product_id):
+    return JsonResponse(
+        {
+            "results": await aget_or_build(
+                "product", product_id, "images", lambda: abuild_product_images_payload(product_id)
+            )
+        }
+    )
+
+
+@require_GET
+@conditional_get(aget_category_listing_validators)
+async def catalog_category_listing(request, category_id):
+    try:
+        page_size = get_page_size(request.GET)
+    except InvalidPageRequest as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    try:
+        category_listing_payload = await aget_or_build(
+            "category",
+            category_id,
+            f"listing:{page_size}:{request.GET.get('cursor', '')}",
+            lambda: abuild_category_listing_payload(category_id, request.GET),
+        )
+    except InvalidPageRequest as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    return JsonResponse(category_listing_payload)
+
+
+@require_GET
+@staff_required_json
+def catalog_cache_statistics(request):
+    return JsonResponse(get_cache_statistics())
+
+
+@require_GET
+def catalog_facet_counts(request):
+    facet_filters = {
+        facet: request.GET[facet] for facet in FacetIndex.FILTER_FACETS if request.GET.get(facet)
+    }
+
+    try:
+        for query_param in ("min_price", "max_price"):
+            if request.GET.get(query_param):
+                facet_filters[query_param] = get_price_filter_value(request.GET, query_param)
+    except InvalidPageRequest as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    matching_products_counter, facet_counts = get_facet_index().count(facet_filters)
+
+    return JsonResponse({"total": matching_products_counter, "facets": facet_counts})